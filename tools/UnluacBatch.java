@@ -0,0 +1,79 @@
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.TimeoutException;
+
+/**
+ * unluac 批量反编译 worker：一个常驻 JVM 处理全部 .luac，省去每个文件一次的 JVM 启动。
+ *
+ * 协议（UTF-8，按行）:
+ *   启动后输出 "READY"
+ *   stdin  每行 "<输入.luac>\t<输出.lua>"
+ *   stdout 每行 "OK\t<输入>\t<毫秒>" / "FAIL\t<输入>\t<原因>" / "TIMEOUT\t<输入>\t<毫秒>"
+ * 超时后卡住的反编译线程无法安全中止，worker 以退出码 3 结束，由调用方重启。
+ *
+ * 用法: java -cp unluac.jar tools/UnluacBatch.java [单文件超时毫秒]
+ */
+public class UnluacBatch {
+    // 深层嵌套的函数在 unluac 中递归很深，默认线程栈容易 StackOverflowError
+    private static final long STACK_SIZE = 256L * 1024 * 1024;
+
+    public static void main(String[] args) throws Exception {
+        long timeoutMs = args.length > 0 ? Long.parseLong(args[0]) : 60000L;
+        PrintStream report = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        // unluac 自己的打印不能混进协议输出
+        System.setOut(System.err);
+
+        ExecutorService exec = Executors.newSingleThreadExecutor(r -> {
+            Thread t = new Thread(null, r, "unluac", STACK_SIZE);
+            t.setDaemon(true);
+            return t;
+        });
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, "UTF-8"));
+        report.println("READY");
+
+        String line;
+        while ((line = in.readLine()) != null) {
+            if (line.isEmpty()) {
+                continue;
+            }
+            String[] parts = line.split("\t", 2);
+            if (parts.length != 2) {
+                report.println("FAIL\t" + line + "\tbad request");
+                continue;
+            }
+            final String src = parts[0];
+            final String dst = parts[1];
+            long start = System.nanoTime();
+            Future<?> job = exec.submit(() -> {
+                File parent = new File(dst).getAbsoluteFile().getParentFile();
+                if (parent != null) {
+                    parent.mkdirs();
+                }
+                unluac.Main.decompile(src, dst, new unluac.Configuration());
+                return null;
+            });
+            try {
+                job.get(timeoutMs, TimeUnit.MILLISECONDS);
+                report.println("OK\t" + src + "\t" + (System.nanoTime() - start) / 1000000);
+            } catch (TimeoutException e) {
+                new File(dst).delete();
+                report.println("TIMEOUT\t" + src + "\t" + timeoutMs);
+                System.exit(3);
+            } catch (ExecutionException e) {
+                new File(dst).delete();
+                String reason = String.valueOf(e.getCause()).replace('\t', ' ').replace('\n', ' ');
+                report.println("FAIL\t" + src + "\t" + reason);
+            }
+        }
+        exec.shutdownNow();
+    }
+}
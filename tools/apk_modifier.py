@@ -237,7 +237,7 @@ class APKModifier:
   Get-ChildItem decompiled/java_src -Recurse -Filter *.java
 
 搜索特定代码:
-  Select-String -Path 'decompiled/lua_decompiled/**/*.lua' -Pattern '关键字'
+  python tools/source_index.py '关键字'       # 索引搜索，输出 文件:行号（-e 正则, -w 标识符）
 
 统计修改的文件:
   Get-ChildItem decompiled -Recurse -Filter *.lua | Measure-Object | Select-Object Count
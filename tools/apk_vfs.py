@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+APK 虚拟文件系统
+直接读 APK 的 zip 中央目录，不必先 extractall 到磁盘：
+压缩的成员按需解压，存储（未压缩）的成员直接切片 mmap，零拷贝。
+DirFS 对已解压的目录提供相同接口，工具可以不关心输入是 APK 还是目录
+
+用法:
+    fs = open_source('base.apk')        # 或 open_source('apk_unzip')
+    for root, dirs, files in fs.walk('assets'):
+        ...
+    data = fs.read('classes.dex')
+"""
+import fnmatch
+import os
+import posixpath
+import shutil
+import struct
+import zipfile
+
+from stream_reader import MappedFile
+
+_LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+_LOCAL_MAGIC = b'PK\x03\x04'
+
+
+class _BaseFS:
+    """ApkFS / DirFS 共用的遍历逻辑，子类只需提供 namelist()"""
+
+    def _tree(self):
+        if self._dirs is None:
+            dirs = {'': (set(), [])}
+            for name in self.namelist():
+                parent, base = posixpath.split(name)
+                dirs.setdefault(parent, (set(), []))[1].append(base)
+                # 逐级向上登记父目录，遇到已登记的即停止
+                child = parent
+                while child:
+                    up, leaf = posixpath.split(child)
+                    subdirs = dirs.setdefault(up, (set(), []))[0]
+                    if leaf in subdirs:
+                        break
+                    subdirs.add(leaf)
+                    child = up
+            self._dirs = dirs
+        return self._dirs
+
+    def exists(self, name):
+        return self.isfile(name) or self.isdir(name)
+
+    def isdir(self, name):
+        return name.strip('/') in self._tree()
+
+    def walk(self, top=''):
+        """与 os.walk 相同的 (dirpath, dirnames, filenames)，路径用 / 分隔"""
+        tree = self._tree()
+        top = top.strip('/')
+        if top not in tree:
+            return
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            subdirs, files = tree[path]
+            dirnames = sorted(subdirs)
+            yield path, dirnames, sorted(files)
+            stack.extend(posixpath.join(path, d) if path else d for d in reversed(dirnames))
+
+    def rglob(self, pattern, top=''):
+        """递归匹配文件名（如 '*.luac'），返回成员路径列表"""
+        top = top.strip('/')
+        prefix = top + '/' if top else ''
+        return [n for n in self.namelist()
+                if n.startswith(prefix) and fnmatch.fnmatch(posixpath.basename(n), pattern)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ApkFS(_BaseFS):
+    """以 APK(zip) 中央目录为索引的只读文件系统"""
+
+    def __init__(self, apk_path):
+        self.path = apk_path
+        self._zip = zipfile.ZipFile(apk_path, 'r')
+        self._mapped = MappedFile(apk_path)
+        self._infos = {i.filename: i for i in self._zip.infolist() if not i.is_dir()}
+        self._dirs = None
+
+    def close(self):
+        self._zip.close()
+        try:
+            self._mapped.close()
+        except BufferError:
+            # 仍有 view() 返回的 memoryview 在用，映射随其释放
+            pass
+
+    def namelist(self):
+        return list(self._infos)
+
+    def isfile(self, name):
+        return name in self._infos
+
+    def getsize(self, name):
+        """解压后的大小"""
+        return self._infos[name].file_size
+
+    def compressed_size(self, name):
+        return self._infos[name].compress_size
+
+    def is_stored(self, name):
+        return self._infos[name].compress_type == zipfile.ZIP_STORED
+
+    def _data_offset(self, info):
+        header = _LOCAL_HEADER.unpack_from(self._mapped.data, info.header_offset)
+        if header[0] != _LOCAL_MAGIC:
+            raise zipfile.BadZipFile(f'bad local header for {info.filename}')
+        name_len, extra_len = header[9], header[10]
+        return info.header_offset + _LOCAL_HEADER.size + name_len + extra_len
+
+    def view(self, name):
+        """
+        成员内容：存储的成员返回 APK mmap 上的 memoryview（零拷贝），
+        压缩的成员解压后返回 bytes
+        """
+        info = self._infos[name]
+        if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+            start = self._data_offset(info)
+            return memoryview(self._mapped.data)[start:start + info.file_size]
+        return self._zip.read(info)
+
+    def read(self, name):
+        """成员内容（bytes）"""
+        data = self.view(name)
+        return data.tobytes() if isinstance(data, memoryview) else data
+
+    def open(self, name):
+        """流式读取的文件对象，大成员不必整体解压进内存"""
+        return self._zip.open(self._infos[name])
+
+    def local_path(self, name):
+        """成员在磁盘上的路径；APK 内的成员没有，返回 None"""
+        return None
+
+    def extract(self, name, dest_dir):
+        """只把单个成员写到磁盘（供 java/unluac 等需要真实路径的外部工具使用）"""
+        target = os.path.join(dest_dir, *name.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with self.open(name) as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        return target
+
+
+class DirFS(_BaseFS):
+    """已解压目录的同接口封装（apk_unzip、decompiled/extracted）"""
+
+    def __init__(self, root):
+        self.path = root
+        self._dirs = None
+        self._names = None
+
+    def close(self):
+        pass
+
+    def _real(self, name):
+        return os.path.join(self.path, *name.split('/'))
+
+    def namelist(self):
+        if self._names is None:
+            names = []
+            for root, _dirs, files in os.walk(self.path):
+                rel = os.path.relpath(root, self.path).replace(os.sep, '/')
+                rel = '' if rel == '.' else rel
+                names.extend(posixpath.join(rel, f) if rel else f for f in files)
+            self._names = names
+        return self._names
+
+    def isfile(self, name):
+        return os.path.isfile(self._real(name))
+
+    def getsize(self, name):
+        return os.path.getsize(self._real(name))
+
+    def view(self, name):
+        return self.read(name)
+
+    def read(self, name):
+        with open(self._real(name), 'rb') as f:
+            return f.read()
+
+    def open(self, name):
+        return open(self._real(name), 'rb')
+
+    def local_path(self, name):
+        return self._real(name)
+
+    def extract(self, name, dest_dir):
+        return self._real(name)
+
+
+def open_source(path):
+    """APK 文件返回 ApkFS，目录返回 DirFS"""
+    if os.path.isdir(path):
+        return DirFS(path)
+    return ApkFS(path)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+resources.arsc 懒解析
+mmap 映射文件，只遍历 chunk 头建立 package/type/config 索引；
+全局字符串池、key 字符串池按需解码，按资源 ID 查名字/取值时只读取所需的 entry，
+不会把每个 config 变体全部解码
+
+用法:
+    python tools/arsc.py [resources.arsc] 0x7f0d001b [0x7f0c0000 ...]
+"""
+import struct
+import sys
+from collections import namedtuple
+
+from axml import StringPool, format_value, TYPE_STRING
+from stream_reader import MappedFile
+
+RES_STRING_POOL_TYPE = 0x0001
+RES_TABLE_TYPE = 0x0002
+RES_TABLE_PACKAGE_TYPE = 0x0200
+RES_TABLE_TYPE_TYPE = 0x0201
+RES_TABLE_TYPE_SPEC_TYPE = 0x0202
+
+NO_ENTRY = 0xFFFFFFFF
+TYPE_FLAG_SPARSE = 0x01
+TYPE_FLAG_OFFSET16 = 0x02
+ENTRY_FLAG_COMPLEX = 0x0001
+ENTRY_FLAG_COMPACT = 0x0008
+
+# 一个 RES_TABLE_TYPE_TYPE chunk（某 type 在某个 config 下的全部 entry）
+TypeChunk = namedtuple('TypeChunk', ['offset', 'entries_start', 'entry_count', 'flags', 'config'])
+
+Package = namedtuple('Package', ['id', 'name', 'type_strings', 'key_strings'])
+
+
+class ArscError(ValueError):
+    """不是合法的 resources.arsc"""
+
+
+class ResourceTable:
+    """
+    资源表索引：(package_id, type_id) -> [TypeChunk]，每个 config 变体一个。
+    name(0x7f0b0012) -> 'string/app_name'，value(0x7f0b0012) -> 默认 config 下的值
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mapped = MappedFile(path)
+        self.data = self._mapped.data
+        self.packages = {}
+        self.types = {}
+        self._names = {}
+        try:
+            self._index()
+        except struct.error as e:
+            self._mapped.close()
+            raise ArscError(f'truncated resources.arsc: {e}') from e
+        except ArscError:
+            self._mapped.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mapped.close()
+
+    def _index(self):
+        data = self.data
+        if len(data) < 12:
+            raise ArscError('file too small')
+        chunk_type, header_size, size, _package_count = struct.unpack_from('<HHII', data, 0)
+        if chunk_type != RES_TABLE_TYPE:
+            raise ArscError('missing RES_TABLE_TYPE header')
+        end = min(size, len(data))
+        self.strings = None
+        off = header_size
+        while off + 8 <= end:
+            c_type, c_header, c_size = struct.unpack_from('<HHI', data, off)
+            if c_size < 8:
+                raise ArscError(f'bad chunk size at {off:#x}')
+            if c_type == RES_STRING_POOL_TYPE and self.strings is None:
+                self.strings = StringPool(data, off)
+            elif c_type == RES_TABLE_PACKAGE_TYPE:
+                self._index_package(off, c_header, min(off + c_size, end))
+            off += c_size
+
+    def _index_package(self, start, header_size, end):
+        data = self.data
+        pkg_id = struct.unpack_from('<I', data, start + 8)[0]
+        name = bytes(data[start + 12:start + 12 + 256]).decode('utf-16-le', errors='replace').split('\x00')[0]
+        type_strings_off, _last_public_type, key_strings_off = struct.unpack_from('<III', data, start + 268)
+        self.packages[pkg_id] = Package(
+            pkg_id, name,
+            StringPool(data, start + type_strings_off),
+            StringPool(data, start + key_strings_off),
+        )
+        off = start + header_size
+        while off + 8 <= end:
+            c_type, c_header, c_size = struct.unpack_from('<HHI', data, off)
+            if c_size < 8:
+                raise ArscError(f'bad chunk size at {off:#x}')
+            if c_type == RES_TABLE_TYPE_TYPE:
+                type_id, flags, _reserved, entry_count, entries_start = \
+                    struct.unpack_from('<BBHII', data, off + 8)
+                config_size = struct.unpack_from('<I', data, off + 20)[0]
+                config = bytes(data[off + 20:off + 20 + config_size])
+                self.types.setdefault((pkg_id, type_id), []).append(
+                    TypeChunk(off, off + entries_start, entry_count, flags, config))
+            off += c_size
+
+    # ---- entry 定位 ----
+
+    def _entry_offset(self, chunk, entry_id):
+        """entry 在文件中的绝对偏移；该 config 没有此 entry 时返回 None"""
+        data = self.data
+        table = chunk.offset + struct.unpack_from('<H', data, chunk.offset + 2)[0]
+        if chunk.flags & TYPE_FLAG_SPARSE:
+            # 稀疏表: (u16 entry_id, u16 offset/4) 按 id 排序，二分查找
+            lo, hi = 0, chunk.entry_count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                idx, off4 = struct.unpack_from('<HH', data, table + 4 * mid)
+                if idx == entry_id:
+                    return chunk.entries_start + off4 * 4
+                if idx < entry_id:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return None
+        if entry_id >= chunk.entry_count:
+            return None
+        if chunk.flags & TYPE_FLAG_OFFSET16:
+            off = struct.unpack_from('<H', data, table + 2 * entry_id)[0]
+            return None if off == 0xFFFF else chunk.entries_start + off * 4
+        off = struct.unpack_from('<I', data, table + 4 * entry_id)[0]
+        return None if off == NO_ENTRY else chunk.entries_start + off
+
+    def _find_entry(self, res_id, prefer_default=False):
+        """
+        返回 (package, type_id, entry 偏移)；找不到返回 None。
+        prefer_default: 优先取默认 config（ResTable_config 除 size 外全 0）中的 entry，
+        没有时才退回第一个含该 entry 的 config（可能是语言 / 密度变体）
+        """
+        pkg_id, type_id, entry_id = res_id >> 24, (res_id >> 16) & 0xFF, res_id & 0xFFFF
+        package = self.packages.get(pkg_id)
+        if package is None:
+            return None
+        first = None
+        for chunk in self.types.get((pkg_id, type_id), ()):
+            off = self._entry_offset(chunk, entry_id)
+            if off is None:
+                continue
+            if not prefer_default or not any(chunk.config[4:]):
+                return package, type_id, off
+            if first is None:
+                first = package, type_id, off
+        return first
+
+    def _read_entry(self, off):
+        """解码 entry 头: (key_index, flags, 值类型, 值)；复杂 entry 的值为 None"""
+        data = self.data
+        size_or_key, flags = struct.unpack_from('<HH', data, off)
+        if flags & ENTRY_FLAG_COMPACT:
+            return size_or_key, flags, flags >> 8, struct.unpack_from('<I', data, off + 4)[0]
+        key = struct.unpack_from('<I', data, off + 4)[0]
+        if flags & ENTRY_FLAG_COMPLEX:
+            return key, flags, None, None
+        _vsize, _res0, data_type, value = struct.unpack_from('<HBBI', data, off + size_or_key)
+        return key, flags, data_type, value
+
+    # ---- 查询 ----
+
+    def name(self, res_id, with_package=False):
+        """0x7f0d001b -> 'string/app_name'；未知 ID 返回 None（结果缓存）"""
+        key = (res_id, with_package)
+        if key in self._names:
+            return self._names[key]
+        found = self._find_entry(res_id)
+        result = None
+        if found:
+            package, type_id, off = found
+            type_name = package.type_strings.get(type_id - 1)
+            entry_name = package.key_strings.get(self._read_entry(off)[0])
+            result = f'{type_name}/{entry_name}'
+            if with_package:
+                result = f'{package.name}:{result}'
+        self._names[key] = result
+        return result
+
+    def value(self, res_id):
+        """默认 config 下的值（默认 config 没有时取第一个含它的 config）；字符串从全局池取，复杂资源返回 None"""
+        found = self._find_entry(res_id, prefer_default=True)
+        if not found:
+            return None
+        _, _, data_type, value = self._read_entry(found[2])
+        if data_type is None:
+            return None
+        if data_type == TYPE_STRING:
+            return self.strings.get(value)
+        return format_value(data_type, value)
+
+    def reference(self, res_id):
+        """给 axml.parse 的 resolve 回调用: 0x7f0d001b -> '@string/app_name'"""
+        name = self.name(res_id)
+        return f'@{name}' if name else None
+
+    def _entry_ids(self, chunk):
+        """某个 config chunk 中存在的 entry id（只读 entry 表）"""
+        data = self.data
+        table = chunk.offset + struct.unpack_from('<H', data, chunk.offset + 2)[0]
+        if chunk.flags & TYPE_FLAG_SPARSE:
+            for i in range(chunk.entry_count):
+                yield struct.unpack_from('<H', data, table + 4 * i)[0]
+        elif chunk.flags & TYPE_FLAG_OFFSET16:
+            for i, (off,) in enumerate(struct.iter_unpack('<H', data[table:table + 2 * chunk.entry_count])):
+                if off != 0xFFFF:
+                    yield i
+        else:
+            for i, (off,) in enumerate(struct.iter_unpack('<I', data[table:table + 4 * chunk.entry_count])):
+                if off != NO_ENTRY:
+                    yield i
+
+    def iter_ids(self, pkg_id=0x7f):
+        """产出某个 package 的全部资源 ID（不解码值）"""
+        for (p, type_id), chunks in sorted(self.types.items()):
+            if p != pkg_id:
+                continue
+            seen = set()
+            for chunk in chunks:
+                seen.update(self._entry_ids(chunk))
+            for entry_id in sorted(seen):
+                yield (p << 24) | (type_id << 16) | entry_id
+
+
+def load(path):
+    return ResourceTable(path)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    paths = [a for a in args if not a.startswith('0x')]
+    with ResourceTable(paths[0] if paths else 'apk_unzip/resources.arsc') as table:
+        for arg in args:
+            if arg.startswith('0x'):
+                res_id = int(arg, 16)
+                print(f'{res_id:#010x} -> {table.name(res_id, with_package=True)} = {table.value(res_id)!r}')
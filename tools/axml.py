@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Android 二进制 XML (AXML) 解析
+按 chunk 顺序流式解码 AndroidManifest.xml / res 下的二进制 XML：
+字符串池（UTF-8 与 UTF-16）、资源 ID 映射、命名空间与元素开始/结束 chunk，
+输出事件流或 ElementTree 元素树
+
+用法（自检资源 ID -> 属性名表）:
+    python tools/axml.py [AndroidManifest.xml]
+"""
+import struct
+import xml.etree.ElementTree as ET
+
+RES_STRING_POOL_TYPE = 0x0001
+RES_XML_TYPE = 0x0003
+RES_XML_START_NAMESPACE_TYPE = 0x0100
+RES_XML_END_NAMESPACE_TYPE = 0x0101
+RES_XML_START_ELEMENT_TYPE = 0x0102
+RES_XML_END_ELEMENT_TYPE = 0x0103
+RES_XML_CDATA_TYPE = 0x0104
+RES_XML_RESOURCE_MAP_TYPE = 0x0180
+
+UTF8_FLAG = 0x100
+
+# Res_value 数据类型
+TYPE_NULL = 0x00
+TYPE_REFERENCE = 0x01
+TYPE_ATTRIBUTE = 0x02
+TYPE_STRING = 0x03
+TYPE_FLOAT = 0x04
+TYPE_DIMENSION = 0x05
+TYPE_FRACTION = 0x06
+TYPE_INT_DEC = 0x10
+TYPE_INT_HEX = 0x11
+TYPE_INT_BOOLEAN = 0x12
+TYPE_FIRST_COLOR_INT = 0x1c
+TYPE_LAST_COLOR_INT = 0x1f
+
+ANDROID_NS = 'http://schemas.android.com/apk/res/android'
+
+# 混淆过的 manifest 常把属性名字符串清空，只能靠资源 ID 还原（ID 取自 AOSP public.xml）
+ANDROID_ATTR_NAMES = {
+    0x01010000: 'theme', 0x01010001: 'label', 0x01010002: 'icon', 0x01010003: 'name',
+    0x01010006: 'permission', 0x01010007: 'readPermission', 0x01010008: 'writePermission',
+    0x01010009: 'protectionLevel', 0x0101000a: 'permissionGroup', 0x0101000b: 'sharedUserId',
+    0x0101000c: 'hasCode', 0x0101000d: 'persistent', 0x0101000e: 'enabled',
+    0x0101000f: 'debuggable', 0x01010010: 'exported', 0x01010011: 'process',
+    0x01010012: 'taskAffinity', 0x01010017: 'excludeFromRecents', 0x01010018: 'authorities',
+    0x01010019: 'syncable', 0x0101001b: 'grantUriPermissions', 0x0101001c: 'priority',
+    0x0101001d: 'launchMode', 0x0101001e: 'screenOrientation', 0x0101001f: 'configChanges',
+    0x01010020: 'description', 0x01010021: 'targetPackage', 0x01010024: 'value',
+    0x01010025: 'resource', 0x01010026: 'mimeType', 0x01010027: 'scheme', 0x01010028: 'host',
+    0x01010029: 'port', 0x0101002a: 'path', 0x0101002b: 'pathPrefix', 0x0101002c: 'pathPattern',
+    0x0101002d: 'action', 0x0101002e: 'data', 0x0101020c: 'minSdkVersion',
+    0x0101021b: 'versionCode', 0x0101021c: 'versionName', 0x0101022b: 'windowSoftInputMode',
+    0x01010270: 'targetSdkVersion', 0x01010271: 'maxSdkVersion', 0x01010272: 'testOnly',
+    0x01010280: 'allowBackup', 0x01010281: 'glEsVersion', 0x0101028e: 'required',
+    0x010102b7: 'installLocation', 0x010102d3: 'hardwareAccelerated', 0x0101035a: 'largeHeap',
+    0x010103af: 'supportsRtl', 0x010104ea: 'extractNativeLibs', 0x010104ec: 'usesCleartextTraffic',
+    0x01010527: 'networkSecurityConfig', 0x01010572: 'compileSdkVersion',
+    0x01010573: 'compileSdkVersionCodename', 0x0101057a: 'appComponentFactory',
+}
+
+_COMPLEX_UNITS = ('px', 'dp', 'sp', 'pt', 'in', 'mm')
+_COMPLEX_RADIX = (23, 16, 8, 0)
+
+
+class AXMLError(ValueError):
+    """不是合法的二进制 XML"""
+
+
+class StringPool:
+    """ResStringPool：偏移表一次读出，字符串按需解码并缓存"""
+
+    def __init__(self, data, offset):
+        (chunk_type, header_size, chunk_size, self.count, self.style_count,
+         self.flags, strings_start, _styles_start) = struct.unpack_from('<HHIIIIII', data, offset)
+        if chunk_type != RES_STRING_POOL_TYPE:
+            raise AXMLError(f'expected string pool at {offset:#x}')
+        self.data = data
+        self.utf8 = bool(self.flags & UTF8_FLAG)
+        self._offsets = struct.unpack_from(f'<{self.count}I', data, offset + header_size)
+        self._base = offset + strings_start
+        self._cache = {}
+        self.size = chunk_size
+
+    def __len__(self):
+        return self.count
+
+    def get(self, idx):
+        """第 idx 个字符串；0xFFFFFFFF 或越界返回 None"""
+        if idx is None or idx < 0 or idx >= self.count:
+            return None
+        s = self._cache.get(idx)
+        if s is None:
+            s = self._decode(self._base + self._offsets[idx])
+            self._cache[idx] = s
+        return s
+
+    def _decode(self, off):
+        data = self.data
+        if self.utf8:
+            # UTF-16 长度（跳过）+ UTF-8 字节长度，各 1~2 字节
+            off += 2 if data[off] & 0x80 else 1
+            n = data[off]
+            if n & 0x80:
+                n = ((n & 0x7F) << 8) | data[off + 1]
+                off += 2
+            else:
+                off += 1
+            return bytes(data[off:off + n]).decode('utf-8', errors='replace')
+        n = struct.unpack_from('<H', data, off)[0]
+        off += 2
+        if n & 0x8000:
+            n = ((n & 0x7FFF) << 16) | struct.unpack_from('<H', data, off)[0]
+            off += 2
+        return bytes(data[off:off + 2 * n]).decode('utf-16-le', errors='replace')
+
+
+def format_value(data_type, value, raw=None):
+    """把 Res_value 转成字符串/数值；引用保持 @0x7f... 形式"""
+    if raw is not None and data_type == TYPE_STRING:
+        return raw
+    if data_type == TYPE_REFERENCE:
+        return f'@{value:#010x}' if value else '@null'
+    if data_type == TYPE_ATTRIBUTE:
+        return f'?{value:#010x}'
+    if data_type == TYPE_INT_DEC:
+        return struct.unpack('<i', struct.pack('<I', value))[0]
+    if data_type == TYPE_INT_HEX:
+        return f'{value:#x}'
+    if data_type == TYPE_INT_BOOLEAN:
+        return value != 0
+    if data_type == TYPE_FLOAT:
+        return struct.unpack('<f', struct.pack('<I', value))[0]
+    if data_type == TYPE_DIMENSION:
+        mantissa = struct.unpack('<i', struct.pack('<I', value & 0xFFFFFF00))[0]
+        number = mantissa * (1.0 / (1 << 8)) / (1 << _COMPLEX_RADIX[(value >> 4) & 3])
+        unit = _COMPLEX_UNITS[value & 0xF] if (value & 0xF) < len(_COMPLEX_UNITS) else ''
+        return f'{number:g}{unit}'
+    if data_type == TYPE_FRACTION:
+        mantissa = struct.unpack('<i', struct.pack('<I', value & 0xFFFFFF00))[0]
+        number = mantissa * (1.0 / (1 << 8)) / (1 << _COMPLEX_RADIX[(value >> 4) & 3])
+        return f'{number * 100:g}%' + ('p' if value & 0xF else '')
+    if TYPE_FIRST_COLOR_INT <= data_type <= TYPE_LAST_COLOR_INT:
+        return f'#{value:08x}'
+    if data_type == TYPE_NULL:
+        return None
+    return f'{value:#x}'
+
+
+def iter_events(data, resolve=None):
+    """
+    流式解码二进制 XML，产出事件:
+        ('start_ns', prefix, uri)
+        ('start', tag, attrs, line)   attrs 为 [(qualified_name, value, data_type)]
+        ('end', tag)
+        ('text', text)
+        ('end_ns', prefix, uri)
+    resolve(res_id) 可选，用于把 @0x7f... 引用解析成可读名字
+    """
+    if len(data) < 8:
+        raise AXMLError('file too small')
+    chunk_type, header_size, total = struct.unpack_from('<HHI', data, 0)
+    if chunk_type != RES_XML_TYPE:
+        raise AXMLError('missing RES_XML_TYPE header')
+    total = min(total, len(data))
+    strings = None
+    resource_ids = ()
+    prefixes = {}
+    off = header_size
+
+    def attr_name(ns_idx, name_idx):
+        name = strings.get(name_idx)
+        if not name and name_idx < len(resource_ids):
+            name = ANDROID_ATTR_NAMES.get(resource_ids[name_idx], f'attr_{resource_ids[name_idx]:#010x}')
+        uri = strings.get(ns_idx) if ns_idx != 0xFFFFFFFF else None
+        if uri:
+            prefix = prefixes.get(uri) or ('android' if uri == ANDROID_NS else uri)
+            return f'{prefix}:{name}'
+        return name
+
+    while off + 8 <= total:
+        chunk_type, header_size, size = struct.unpack_from('<HHI', data, off)
+        if size < 8:
+            raise AXMLError(f'bad chunk size at {off:#x}')
+        if chunk_type == RES_STRING_POOL_TYPE:
+            strings = StringPool(data, off)
+        elif chunk_type == RES_XML_RESOURCE_MAP_TYPE:
+            resource_ids = struct.unpack_from(f'<{(size - header_size) // 4}I', data, off + header_size)
+        elif strings is None:
+            raise AXMLError('XML node before string pool')
+        elif chunk_type == RES_XML_START_NAMESPACE_TYPE:
+            p_idx, u_idx = struct.unpack_from('<II', data, off + header_size)
+            prefix, uri = strings.get(p_idx), strings.get(u_idx)
+            prefixes[uri] = prefix
+            yield ('start_ns', prefix, uri)
+        elif chunk_type == RES_XML_END_NAMESPACE_TYPE:
+            p_idx, u_idx = struct.unpack_from('<II', data, off + header_size)
+            yield ('end_ns', strings.get(p_idx), strings.get(u_idx))
+        elif chunk_type == RES_XML_START_ELEMENT_TYPE:
+            line = struct.unpack_from('<I', data, off + 8)[0]
+            ext = off + header_size
+            (_ns, name_idx, attr_start, attr_size,
+             attr_count) = struct.unpack_from('<IIHHH', data, ext)
+            attrs = []
+            pos = ext + attr_start
+            for _ in range(attr_count):
+                a_ns, a_name, a_raw, _vsize, _res0, a_type, a_data = \
+                    struct.unpack_from('<IIIHBBI', data, pos)
+                value = format_value(a_type, a_data, strings.get(a_raw))
+                if a_type == TYPE_REFERENCE and resolve and a_data:
+                    value = resolve(a_data) or value
+                attrs.append((attr_name(a_ns, a_name), value, a_type))
+                pos += attr_size
+            yield ('start', strings.get(name_idx), attrs, line)
+        elif chunk_type == RES_XML_END_ELEMENT_TYPE:
+            _ns, name_idx = struct.unpack_from('<II', data, off + header_size)
+            yield ('end', strings.get(name_idx))
+        elif chunk_type == RES_XML_CDATA_TYPE:
+            text_idx = struct.unpack_from('<I', data, off + header_size)[0]
+            yield ('text', strings.get(text_idx))
+        off += size
+
+
+def parse(data, resolve=None):
+    """解码为 ElementTree 根元素，属性名形如 android:name，值统一转为字符串"""
+    root = None
+    stack = []
+    namespaces = []
+    try:
+        events = list(iter_events(data, resolve))
+    except (struct.error, IndexError) as e:
+        raise AXMLError(f'truncated binary XML: {e}') from e
+    for event in events:
+        kind = event[0]
+        if kind == 'start_ns':
+            namespaces.append(event[1:])
+        elif kind == 'start':
+            _, tag, attrs, _line = event
+            elem = ET.Element(tag)
+            if root is None:
+                for prefix, uri in namespaces:
+                    elem.set(f'xmlns:{prefix}', uri)
+            for name, value, _ in attrs:
+                if value is None:
+                    value = ''
+                elif isinstance(value, bool):
+                    value = 'true' if value else 'false'
+                elem.set(name, str(value))
+            if stack:
+                stack[-1].append(elem)
+            else:
+                root = elem
+            stack.append(elem)
+        elif kind == 'end' and stack:
+            stack.pop()
+        elif kind == 'text' and stack:
+            stack[-1].text = (stack[-1].text or '') + (event[1] or '')
+    if root is None:
+        raise AXMLError('no root element')
+    return root
+
+
+def parse_file(path, resolve=None):
+    with open(path, 'rb') as f:
+        return parse(f.read(), resolve)
+
+
+def is_axml(data):
+    return len(data) >= 8 and struct.unpack_from('<H', data, 0)[0] == RES_XML_TYPE
+
+
+# ---- AndroidManifest 结构化信息 ----
+
+COMPONENT_TAGS = ('activity', 'activity-alias', 'service', 'receiver', 'provider')
+
+
+def _android(elem, name):
+    return elem.get(f'android:{name}')
+
+
+def summarize_manifest(root):
+    """
+    从 manifest 元素树提取包名、SDK、权限与组件信息。
+    组件 exported 未显式声明时，按 Android 规则：带 intent-filter 即视为导出
+    """
+    package = root.get('package')
+    info = {
+        'package_name': package,
+        'version_code': _android(root, 'versionCode'),
+        'version_name': _android(root, 'versionName'),
+        'min_sdk': None,
+        'target_sdk': None,
+        'permissions': [],
+        'declared_permissions': [],
+        'debuggable': False,
+        'allow_backup': None,
+        'uses_cleartext_traffic': None,
+        'components': [],
+    }
+    for elem in root:
+        if elem.tag == 'uses-sdk':
+            info['min_sdk'] = _android(elem, 'minSdkVersion')
+            info['target_sdk'] = _android(elem, 'targetSdkVersion')
+        elif elem.tag in ('uses-permission', 'uses-permission-sdk-23'):
+            name = _android(elem, 'name')
+            if name and name not in info['permissions']:
+                info['permissions'].append(name)
+        elif elem.tag == 'permission':
+            info['declared_permissions'].append({
+                'name': _android(elem, 'name'),
+                'protection_level': _android(elem, 'protectionLevel'),
+            })
+        elif elem.tag == 'application':
+            info['debuggable'] = _android(elem, 'debuggable') == 'true'
+            info['allow_backup'] = _android(elem, 'allowBackup')
+            info['uses_cleartext_traffic'] = _android(elem, 'usesCleartextTraffic')
+            for comp in elem:
+                if comp.tag not in COMPONENT_TAGS:
+                    continue
+                name = _android(comp, 'name') or ''
+                if name.startswith('.') and package:
+                    name = package + name
+                filters = comp.findall('intent-filter')
+                exported = _android(comp, 'exported')
+                if exported is None:
+                    exported = bool(filters)
+                else:
+                    exported = exported == 'true'
+                info['components'].append({
+                    'type': comp.tag,
+                    'name': name,
+                    'exported': exported,
+                    'permission': _android(comp, 'permission'),
+                    'actions': [_android(a, 'name') for f in filters for a in f.findall('action')],
+                    'categories': [_android(c, 'name') for f in filters for c in f.findall('category')],
+                    'schemes': [_android(d, 'scheme') for f in filters for d in f.findall('data')
+                                if _android(d, 'scheme')],
+                })
+    return info
+
+
+def parse_manifest(path, resolve=None):
+    """解析二进制 AndroidManifest.xml，返回 summarize_manifest 的结果"""
+    return summarize_manifest(parse_file(path, resolve))
+
+
+# ---- 属性名还原自检 ----
+
+def strip_attribute_names(data):
+    """
+    模拟加固 / 混淆：把资源映射覆盖到的字符串（即属性名）长度清零，返回新的 bytes。
+    用于核对 ANDROID_ATTR_NAMES 能否从资源 ID 还原出原名
+    """
+    data = bytearray(data)
+    header_size = struct.unpack_from('<HHI', data, 0)[1]
+    off, strings, count = header_size, None, 0
+    while off + 8 <= len(data):
+        chunk_type, header_size, size = struct.unpack_from('<HHI', data, off)
+        if size < 8:
+            break
+        if chunk_type == RES_STRING_POOL_TYPE:
+            strings = StringPool(bytes(data), off)
+        elif chunk_type == RES_XML_RESOURCE_MAP_TYPE:
+            count = (size - header_size) // 4
+            break
+        off += size
+    if strings is None:
+        raise AXMLError('no string pool')
+    for idx in range(min(count, len(strings))):
+        pos = strings._base + strings._offsets[idx]
+        # UTF-8: UTF-16 长度与字节长度各写成单字节 0；UTF-16: 长度字写 0
+        data[pos:pos + 2] = b'\x00\x00'
+    return bytes(data)
+
+
+def check_attribute_names(data):
+    """比较原始解析与属性名被清空后的解析，返回不一致的 [(元素, 原属性名, 还原出的属性名)]"""
+    def attr_names(blob):
+        return [(event[1], [name for name, _value, _type in event[2]])
+                for event in iter_events(blob) if event[0] == 'start']
+
+    mismatches = []
+    for (tag, names), (_tag, recovered) in zip(attr_names(data), attr_names(strip_attribute_names(data))):
+        mismatches.extend((tag, a, b) for a, b in zip(names, recovered) if a != b)
+    return mismatches
+
+
+def main():
+    import sys
+    path = sys.argv[1] if len(sys.argv) > 1 else 'apk_unzip/AndroidManifest.xml'
+    with open(path, 'rb') as f:
+        data = f.read()
+    mismatches = check_attribute_names(data)
+    for tag, name, recovered in mismatches:
+        print(f'[-] <{tag}> {name} -> {recovered}')
+    if mismatches:
+        print(f'[-] {path}: 属性名清空后有 {len(mismatches)} 处还原错误')
+    else:
+        print(f'[+] {path}: 属性名清空后全部按资源 ID 还原一致')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+分片并行 CFR 反编译
+把 JAR 中的类按包分组，按字节数均衡分成若干分片，每个分片一个 CFR 进程（--jarfilter 只处理本分片的类，
+-Xmx 限制单个 JVM 的内存），经 ToolRunner 并发运行；各分片先写到独立的临时目录，成功后合并进输出目录。
+失败或超时的分片对半拆开重跑，单个包仍失败时再拆成单个类，一个病态类只影响它自己
+
+用法:
+    units = package_units(jar_classes('classes.jar'))
+    report = decompile_sharded('classes.jar', 'decompiled/java_src', 'tools/cfr.jar', units)
+"""
+import heapq
+import os
+import re
+import shutil
+import zipfile
+from collections import namedtuple
+
+from tool_runner import ToolJob, ToolRunner
+
+# 单个 CFR JVM 的堆上限；并发数按 堆 + JVM 自身开销 计算
+DEFAULT_HEAP_MB = 1024
+JVM_OVERHEAD_MB = 256
+
+# 分片数 = 并发数 * SHARDS_PER_WORKER：分片更小，负载更均衡，失败影响面也更小
+SHARDS_PER_WORKER = 4
+
+# CFR 超时：按分片内类文件字节数缩放
+SHARD_BASE_TIMEOUT = 120
+SHARD_PER_MB_TIMEOUT = 600
+
+# pattern: 匹配类全名（点分）的正则片段；weight: 类文件字节数；classes: 包含的类（内部名 a/b/C）
+ShardUnit = namedtuple('ShardUnit', ['label', 'pattern', 'weight', 'classes'])
+
+ShardReport = namedtuple('ShardReport', ['ok', 'failed', 'shards', 'rounds'])
+
+
+def jar_classes(jar_path):
+    """{内部类名 a/b/C$D: 未压缩字节数}"""
+    with zipfile.ZipFile(jar_path) as zf:
+        return {info.filename[:-len('.class')]: info.file_size
+                for info in zf.infolist() if info.filename.endswith('.class')}
+
+
+def package_units(classes):
+    """按包分组：每个包一个单元，只匹配直接位于该包内的类（含内部类）"""
+    packages = {}
+    for name, size in classes.items():
+        package = name.rpartition('/')[0]
+        packages.setdefault(package, []).append((name, size))
+    units = []
+    for package, members in packages.items():
+        dotted = package.replace('/', '.')
+        pattern = re.escape(dotted) + r'\.[^.]+' if dotted else r'[^.]+'
+        units.append(ShardUnit(dotted or '(default)', pattern,
+                               sum(size for _, size in members), sorted(name for name, _ in members)))
+    return units
+
+
+def class_units(names, classes):
+    """逐个类的单元（内部类随外部类一起），供只重编译部分类时使用"""
+    units = []
+    for name in sorted(names):
+        dotted = name.replace('/', '.')
+        pattern = re.escape(dotted) + r'(?:\$.*)?'
+        members = [n for n in classes if n == name or n.startswith(name + '$')]
+        units.append(ShardUnit(dotted, pattern, sum(classes[n] for n in members) or 1, members))
+    return units
+
+
+def plan_shards(units, count):
+    """最长处理时间优先的贪心分配：大单元先放，每次放进当前最轻的分片"""
+    count = max(1, min(count, len(units)))
+    heap = [(0, i, []) for i in range(count)]
+    for unit in sorted(units, key=lambda u: (-u.weight, u.label)):
+        weight, i, members = heapq.heappop(heap)
+        members.append(unit)
+        heapq.heappush(heap, (weight + unit.weight, i, members))
+    return [members for _weight, _i, members in sorted(heap, key=lambda item: item[1]) if members]
+
+
+def jar_filter(shard):
+    """分片的 --jarfilter 正则（锚定整个类名，避免前缀误匹配子包）"""
+    return '^(?:' + '|'.join(unit.pattern for unit in shard) + ')$'
+
+
+def _merge(shard_dir, output_dir):
+    """分片输出移入最终目录；各分片的 summary.txt 追加到一起"""
+    for dirpath, _dirs, files in os.walk(shard_dir):
+        for name in files:
+            src = os.path.join(dirpath, name)
+            rel = os.path.relpath(src, shard_dir)
+            if rel == 'summary.txt':
+                with open(src, 'rb') as f, open(os.path.join(output_dir, 'summary.txt'), 'ab') as out:
+                    out.write(f.read())
+                continue
+            dst = os.path.join(output_dir, rel)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            os.replace(src, dst)
+    shutil.rmtree(shard_dir, ignore_errors=True)
+
+
+def decompile_sharded(jar_file, output_dir, cfr_path, units, shards=None, heap_mb=DEFAULT_HEAP_MB,
+                      java='java', runner=None, on_shard=None):
+    """
+    分片反编译 units 覆盖的类，返回 ShardReport(ok 单元列表, failed 单元列表, 首轮分片数, 轮数)。
+    on_shard(result, shard, round) 在每个分片结束时调用（完成顺序）
+    """
+    runner = runner or ToolRunner(mem_mb=heap_mb + JVM_OVERHEAD_MB, base_timeout=SHARD_BASE_TIMEOUT,
+                                  per_mb_timeout=SHARD_PER_MB_TIMEOUT)
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        os.unlink(os.path.join(output_dir, 'summary.txt'))
+    except OSError:
+        pass
+    work_root = output_dir.rstrip('/\\') + '.shards'
+    shutil.rmtree(work_root, ignore_errors=True)
+    plan = plan_shards(units, shards or runner.workers * SHARDS_PER_WORKER)
+    first_count = len(plan)
+    ok, failed, rounds = [], [], 0
+    classes = None
+    while plan:
+        rounds += 1
+        jobs = []
+        for i, shard in enumerate(plan):
+            shard_dir = os.path.join(work_root, f'{rounds}-{i}')
+            cmd = [java, f'-Xmx{heap_mb}m', '-jar', cfr_path, jar_file,
+                   '--outputdir', shard_dir, '--jarfilter', jar_filter(shard)]
+            jobs.append(ToolJob(cmd, name=f'shard {rounds}-{i}', size=sum(u.weight for u in shard)))
+
+        def done(result, plan=plan, jobs=jobs, rounds=rounds):
+            if on_shard is not None:
+                on_shard(result, plan[jobs.index(result.job)], rounds)
+
+        retry = []
+        for shard, job, result in zip(plan, jobs, runner.run_all(jobs, on_done=done)):
+            shard_dir = job.cmd[job.cmd.index('--outputdir') + 1]
+            if result.status == 'OK':
+                if os.path.isdir(shard_dir):
+                    _merge(shard_dir, output_dir)
+                ok.extend(shard)
+                continue
+            shutil.rmtree(shard_dir, ignore_errors=True)
+            if result.status == 'MISSING':
+                failed.extend(shard)
+            elif len(shard) == 1:
+                # 单个包失败：拆成单个类（内部类随外部类）再试；已经是单个类时记为失败
+                top_level = [n for n in shard[0].classes if '$' not in n.rpartition('/')[2]]
+                if len(top_level) > 1:
+                    classes = classes if classes is not None else jar_classes(jar_file)
+                    singles = class_units(top_level, classes)
+                    half = len(singles) // 2
+                    retry.extend([singles[:half], singles[half:]])
+                else:
+                    failed.extend(shard)
+            else:
+                # 对半拆开重跑，把问题收敛到更小的范围
+                half = len(shard) // 2
+                retry.extend([shard[:half], shard[half:]])
+        plan = retry
+    shutil.rmtree(work_root, ignore_errors=True)
+    return ShardReport(ok, failed, first_count, rounds)
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Dalvik 指令解码
+按 opcode 表（名字、格式、索引种类）逐条解码 code_item 的 insns，
+packed-switch / sparse-switch / fill-array-data 的数据负载作为伪指令单独产出。
+iter_references 只定位带索引的指令（字符串、类型、字段、方法……），不解码其余操作数，供指纹与交叉引用使用
+"""
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+# 每种格式占用的 16 位代码单元数
+FORMAT_UNITS = {
+    '10x': 1, '12x': 1, '11n': 1, '11x': 1, '10t': 1,
+    '20t': 2, '22x': 2, '21t': 2, '21s': 2, '21h': 2, '21c': 2,
+    '23x': 2, '22b': 2, '22t': 2, '22s': 2, '22c': 2,
+    '30t': 3, '32x': 3, '31i': 3, '31t': 3, '31c': 3, '35c': 3, '3rc': 3,
+    '45cc': 4, '4rcc': 4, '51l': 5,
+}
+
+# 索引种类
+INDEX_STRING, INDEX_TYPE, INDEX_FIELD, INDEX_METHOD = 'string', 'type', 'field', 'method'
+INDEX_CALL_SITE, INDEX_METHOD_HANDLE, INDEX_PROTO = 'call_site', 'method_handle', 'proto'
+
+# 数据负载（以 nop 的高字节区分）
+PACKED_SWITCH_PAYLOAD = 0x0100
+SPARSE_SWITCH_PAYLOAD = 0x0200
+FILL_ARRAY_DATA_PAYLOAD = 0x0300
+
+Opcode = namedtuple('Opcode', ['name', 'fmt', 'index'])
+
+OPCODES = [None] * 256
+
+
+def _define(first, fmt, names, index=None):
+    for i, name in enumerate(names):
+        OPCODES[first + i] = Opcode(name, fmt, index)
+
+
+def _binops(suffix=''):
+    ops = ['add', 'sub', 'mul', 'div', 'rem', 'and', 'or', 'xor', 'shl', 'shr', 'ushr']
+    names = [f'{op}-int{suffix}' for op in ops] + [f'{op}-long{suffix}' for op in ops]
+    for kind in ('float', 'double'):
+        names += [f'{op}-{kind}{suffix}' for op in ops[:5]]
+    return names
+
+
+_define(0x00, '10x', ['nop'])
+_define(0x01, '12x', ['move'])
+_define(0x02, '22x', ['move/from16'])
+_define(0x03, '32x', ['move/16'])
+_define(0x04, '12x', ['move-wide'])
+_define(0x05, '22x', ['move-wide/from16'])
+_define(0x06, '32x', ['move-wide/16'])
+_define(0x07, '12x', ['move-object'])
+_define(0x08, '22x', ['move-object/from16'])
+_define(0x09, '32x', ['move-object/16'])
+_define(0x0a, '11x', ['move-result', 'move-result-wide', 'move-result-object', 'move-exception'])
+_define(0x0e, '10x', ['return-void'])
+_define(0x0f, '11x', ['return', 'return-wide', 'return-object'])
+_define(0x12, '11n', ['const/4'])
+_define(0x13, '21s', ['const/16'])
+_define(0x14, '31i', ['const'])
+_define(0x15, '21h', ['const/high16'])
+_define(0x16, '21s', ['const-wide/16'])
+_define(0x17, '31i', ['const-wide/32'])
+_define(0x18, '51l', ['const-wide'])
+_define(0x19, '21h', ['const-wide/high16'])
+_define(0x1a, '21c', ['const-string'], INDEX_STRING)
+_define(0x1b, '31c', ['const-string/jumbo'], INDEX_STRING)
+_define(0x1c, '21c', ['const-class'], INDEX_TYPE)
+_define(0x1d, '11x', ['monitor-enter', 'monitor-exit'])
+_define(0x1f, '21c', ['check-cast'], INDEX_TYPE)
+_define(0x20, '22c', ['instance-of'], INDEX_TYPE)
+_define(0x21, '12x', ['array-length'])
+_define(0x22, '21c', ['new-instance'], INDEX_TYPE)
+_define(0x23, '22c', ['new-array'], INDEX_TYPE)
+_define(0x24, '35c', ['filled-new-array'], INDEX_TYPE)
+_define(0x25, '3rc', ['filled-new-array/range'], INDEX_TYPE)
+_define(0x26, '31t', ['fill-array-data'])
+_define(0x27, '11x', ['throw'])
+_define(0x28, '10t', ['goto'])
+_define(0x29, '20t', ['goto/16'])
+_define(0x2a, '30t', ['goto/32'])
+_define(0x2b, '31t', ['packed-switch', 'sparse-switch'])
+_define(0x2d, '23x', ['cmpl-float', 'cmpg-float', 'cmpl-double', 'cmpg-double', 'cmp-long'])
+_define(0x32, '22t', ['if-eq', 'if-ne', 'if-lt', 'if-ge', 'if-gt', 'if-le'])
+_define(0x38, '21t', ['if-eqz', 'if-nez', 'if-ltz', 'if-gez', 'if-gtz', 'if-lez'])
+_define(0x44, '23x', [f'{op}{kind}' for op in ('aget', 'aput')
+                      for kind in ('', '-wide', '-object', '-boolean', '-byte', '-char', '-short')])
+_define(0x52, '22c', [f'{op}{kind}' for op in ('iget', 'iput')
+                      for kind in ('', '-wide', '-object', '-boolean', '-byte', '-char', '-short')], INDEX_FIELD)
+_define(0x60, '21c', [f'{op}{kind}' for op in ('sget', 'sput')
+                      for kind in ('', '-wide', '-object', '-boolean', '-byte', '-char', '-short')], INDEX_FIELD)
+_INVOKES = ['invoke-virtual', 'invoke-super', 'invoke-direct', 'invoke-static', 'invoke-interface']
+_define(0x6e, '35c', _INVOKES, INDEX_METHOD)
+_define(0x74, '3rc', [f'{name}/range' for name in _INVOKES], INDEX_METHOD)
+_define(0x7b, '12x', ['neg-int', 'not-int', 'neg-long', 'not-long', 'neg-float', 'neg-double',
+                      'int-to-long', 'int-to-float', 'int-to-double', 'long-to-int', 'long-to-float',
+                      'long-to-double', 'float-to-int', 'float-to-long', 'float-to-double', 'double-to-int',
+                      'double-to-long', 'double-to-float', 'int-to-byte', 'int-to-char', 'int-to-short'])
+_define(0x90, '23x', _binops())
+_define(0xb0, '12x', _binops('/2addr'))
+_define(0xd0, '22s', ['add-int/lit16', 'rsub-int', 'mul-int/lit16', 'div-int/lit16', 'rem-int/lit16',
+                      'and-int/lit16', 'or-int/lit16', 'xor-int/lit16'])
+_define(0xd8, '22b', ['add-int/lit8', 'rsub-int/lit8', 'mul-int/lit8', 'div-int/lit8', 'rem-int/lit8',
+                      'and-int/lit8', 'or-int/lit8', 'xor-int/lit8', 'shl-int/lit8', 'shr-int/lit8',
+                      'ushr-int/lit8'])
+_define(0xfa, '45cc', ['invoke-polymorphic'], INDEX_METHOD)
+_define(0xfb, '4rcc', ['invoke-polymorphic/range'], INDEX_METHOD)
+_define(0xfc, '35c', ['invoke-custom'], INDEX_CALL_SITE)
+_define(0xfd, '3rc', ['invoke-custom/range'], INDEX_CALL_SITE)
+_define(0xfe, '21c', ['const-method-handle'], INDEX_METHOD_HANDLE)
+_define(0xff, '21c', ['const-method-type'], INDEX_PROTO)
+
+# 未定义的 opcode 按 1 个代码单元跳过
+_WIDTHS = bytes(FORMAT_UNITS[op.fmt] if op else 1 for op in OPCODES)
+_INDEX_KINDS = [op.index if op else None for op in OPCODES]
+
+# addr / size 以代码单元计；regs 为寄存器号元组；target 为跳转目标的绝对地址；
+# index2 仅 invoke-polymorphic 使用（proto 索引）；payload 只在数据负载伪指令上有值
+Instruction = namedtuple('Instruction', [
+    'addr', 'opcode', 'name', 'fmt', 'size', 'regs', 'literal', 'target', 'index', 'index2', 'payload'],
+    defaults=((), None, None, None, None, None))
+
+
+def code_units(insns):
+    """insns 字节 -> 16 位代码单元数组（小端）"""
+    units = array('H')
+    units.frombytes(insns)
+    if sys.byteorder == 'big':
+        units.byteswap()
+    return units
+
+
+def _s8(v):
+    return v - 0x100 if v & 0x80 else v
+
+
+def _s16(v):
+    return v - 0x10000 if v & 0x8000 else v
+
+
+def _s32(v):
+    return v - 0x100000000 if v & 0x80000000 else v
+
+
+def _payload_units(units, pc):
+    """数据负载占用的代码单元数"""
+    ident = units[pc]
+    if ident == PACKED_SWITCH_PAYLOAD:
+        return 4 + 2 * units[pc + 1]
+    if ident == SPARSE_SWITCH_PAYLOAD:
+        return 2 + 4 * units[pc + 1]
+    width = units[pc + 1]
+    count = units[pc + 2] | (units[pc + 3] << 16)
+    return 4 + (width * count + 1) // 2
+
+
+def _is_payload(unit):
+    return unit in (PACKED_SWITCH_PAYLOAD, SPARSE_SWITCH_PAYLOAD, FILL_ARRAY_DATA_PAYLOAD)
+
+
+def _u32(units, i):
+    return units[i] | (units[i + 1] << 16)
+
+
+def _decode_payload(units, pc):
+    ident = units[pc]
+    size = units[pc + 1]
+    if ident == PACKED_SWITCH_PAYLOAD:
+        first_key = _s32(_u32(units, pc + 2))
+        targets = [_s32(_u32(units, pc + 4 + 2 * i)) for i in range(size)]
+        return 'packed-switch-payload', [(first_key + i, t) for i, t in enumerate(targets)]
+    if ident == SPARSE_SWITCH_PAYLOAD:
+        keys = [_s32(_u32(units, pc + 2 + 2 * i)) for i in range(size)]
+        targets = [_s32(_u32(units, pc + 2 + 2 * (size + i))) for i in range(size)]
+        return 'sparse-switch-payload', list(zip(keys, targets))
+    width = size
+    count = _u32(units, pc + 2)
+    chunk = units[pc + 4:pc + 4 + (width * count + 1) // 2]
+    if sys.byteorder == 'big':
+        chunk.byteswap()
+    raw = chunk.tobytes()
+    signed = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}.get(width)
+    if signed:
+        values = list(struct.unpack_from(f'<{count}{signed}', raw))
+    else:
+        values = list(raw[:width * count])
+    return 'array-data', (width, values)
+
+
+def decode(units, pc):
+    """解码 pc 处的一条指令，返回 Instruction"""
+    unit = units[pc]
+    op = unit & 0xFF
+    if op == 0 and _is_payload(unit):
+        name, payload = _decode_payload(units, pc)
+        return Instruction(pc, unit, name, 'payload', _payload_units(units, pc), payload=payload)
+    info = OPCODES[op]
+    if info is None:
+        return Instruction(pc, op, f'unused-{op:02x}', '10x', 1)
+    fmt = info.fmt
+    aa = unit >> 8
+    a, b = aa & 0xF, aa >> 4
+    u1 = units[pc + 1] if FORMAT_UNITS[fmt] > 1 else 0
+    regs, literal, target, index, index2 = (), None, None, None, None
+    if fmt == '12x':
+        regs = (a, b)
+    elif fmt == '11n':
+        regs, literal = (a,), (b - 16 if b & 0x8 else b)
+    elif fmt == '11x':
+        regs = (aa,)
+    elif fmt == '10t':
+        target = pc + _s8(aa)
+    elif fmt == '20t':
+        target = pc + _s16(u1)
+    elif fmt == '22x':
+        regs = (aa, u1)
+    elif fmt == '21t':
+        regs, target = (aa,), pc + _s16(u1)
+    elif fmt == '21s':
+        regs, literal = (aa,), _s16(u1)
+    elif fmt == '21h':
+        regs, literal = (aa,), _s16(u1) << (48 if op == 0x19 else 16)
+    elif fmt == '21c':
+        regs, index = (aa,), u1
+    elif fmt == '23x':
+        regs = (aa, u1 & 0xFF, u1 >> 8)
+    elif fmt == '22b':
+        regs, literal = (aa, u1 & 0xFF), _s8(u1 >> 8)
+    elif fmt == '22t':
+        regs, target = (a, b), pc + _s16(u1)
+    elif fmt == '22s':
+        regs, literal = (a, b), _s16(u1)
+    elif fmt == '22c':
+        regs, index = (a, b), u1
+    elif fmt == '32x':
+        regs = (u1, units[pc + 2])
+    elif fmt == '30t':
+        target = pc + _s32(_u32(units, pc + 1))
+    elif fmt == '31i':
+        regs, literal = (aa,), _s32(_u32(units, pc + 1))
+    elif fmt == '31t':
+        regs, target = (aa,), pc + _s32(_u32(units, pc + 1))
+    elif fmt == '31c':
+        regs, index = (aa,), _u32(units, pc + 1)
+    elif fmt in ('35c', '45cc'):
+        u2 = units[pc + 2]
+        regs = (u2 & 0xF, (u2 >> 4) & 0xF, (u2 >> 8) & 0xF, u2 >> 12, a)[:b]
+        index = u1
+        if fmt == '45cc':
+            index2 = units[pc + 3]
+    elif fmt in ('3rc', '4rcc'):
+        first = units[pc + 2]
+        regs = tuple(range(first, first + aa))
+        index = u1
+        if fmt == '4rcc':
+            index2 = units[pc + 3]
+    elif fmt == '51l':
+        value = _u32(units, pc + 1) | (_u32(units, pc + 3) << 32)
+        regs, literal = (aa,), value - (1 << 64) if value >> 63 else value
+    return Instruction(pc, op, info.name, fmt, FORMAT_UNITS[fmt], regs, literal, target, index, index2)
+
+
+def iter_instructions(insns):
+    """按地址顺序解码全部指令（含数据负载伪指令）；insns 为字节或代码单元数组"""
+    units = insns if isinstance(insns, array) else code_units(insns)
+    pc, end = 0, len(units)
+    while pc < end:
+        try:
+            ins = decode(units, pc)
+        except IndexError:
+            # 截断的指令：剩余部分按未知数据产出，不再继续
+            yield Instruction(pc, units[pc] & 0xFF, 'truncated', '10x', end - pc)
+            return
+        yield ins
+        pc += ins.size
+
+
+def iter_references(units):
+    """
+    只找带索引的指令，产出 (地址, opcode, 索引种类, 索引)；不解码其他操作数。
+    units 为 code_units() 的结果
+    """
+    widths, kinds = _WIDTHS, _INDEX_KINDS
+    pc, end = 0, len(units)
+    while pc < end:
+        unit = units[pc]
+        op = unit & 0xFF
+        if op == 0 and unit and _is_payload(unit):
+            try:
+                pc += _payload_units(units, pc)
+            except IndexError:
+                return
+            continue
+        kind = kinds[op]
+        if kind is not None and pc + 1 < end:
+            if op == 0x1b:
+                if pc + 2 >= end:
+                    return
+                yield pc, op, kind, _u32(units, pc + 1)
+            else:
+                yield pc, op, kind, units[pc + 1]
+        pc += widths[op]
+
+
+def index_units(op):
+    """索引操作数占用的代码单元数（const-string/jumbo 为 2，其余为 1）"""
+    return 2 if op == 0x1b else 1
+
+
+def resolve_reference(dex, kind, idx):
+    """索引 -> smali 风格的符号: 字符串字面量、Lcls;、Lcls;->name:T、Lcls;->name(args)R"""
+    try:
+        if kind == INDEX_STRING:
+            return '"' + dex.string(idx).encode('unicode_escape').decode('ascii').replace('"', '\\"') + '"'
+        if kind == INDEX_TYPE:
+            return dex.type_descriptor(idx)
+        if kind == INDEX_FIELD:
+            cls, name, type_ = dex.field_ref(idx)
+            return f'{cls}->{name}:{type_}'
+        if kind == INDEX_METHOD:
+            cls, name, proto = dex.method_ref(idx)
+            return f'{cls}->{name}{proto}'
+        if kind == INDEX_PROTO:
+            return dex.proto_descriptor(idx)
+    except (struct.error, IndexError, ValueError):
+        pass
+    return f'{kind}@{idx}'
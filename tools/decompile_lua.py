@@ -1,14 +1,29 @@
 #!/usr/bin/env python3
 """
 Lua 反编译工具 - .luac 转 .lua
+
+用法:
+    python tools/decompile_lua.py                    # 全部 .luac
+    python tools/decompile_lua.py --entry [模块]     # 只处理从入口（默认 config.json 的 init_cfg.entry）可达的模块
+        --include-unreachable                       # 可达模块处理完后再处理其余文件
+    --per-file                                      # 每个文件启动一次 java
 """
 
+import itertools
+import json
 import os
 import sys
-import subprocess
 import zipfile
 from pathlib import Path
 
+from lua_deps import LuaDepsIndex
+from source_index import INDEX_BATCH, index_files
+from tool_runner import ToolJob, ToolRunner
+from unluac_batch import UnluacWorkerError, WORKER_MEM_MB, decompile_parallel
+
+# 可达性模式使用的依赖索引（根目录是提取出的 .luac 树，与 lua_deps 默认索引分开保存）
+REACHABILITY_INDEX_PATH = ".analysis_cache/lua_deps_extracted.json"
+
 def download_unluac():
     """下载 unluac 反编译工具"""
     url = "https://sourceforge.net/projects/unluac/files/latest/download"
@@ -29,20 +44,18 @@ def download_unluac():
         print("📝 请从这里手动下载: https://sourceforge.net/projects/unluac/")
         return None
 
+def unluac_job(luac_path, output_path, unluac_jar):
+    """单个文件启动一次 java 的命令（超时按 .luac 大小缩放）"""
+    return ToolJob(["java", "-jar", unluac_jar, "-o", output_path, luac_path],
+                   name=os.path.basename(luac_path), size=os.path.getsize(luac_path))
+
 def decompile_lua_file(luac_path, output_path, unluac_jar):
     """反编译单个 Lua 文件"""
-    try:
-        cmd = ["java", "-jar", unluac_jar, "-o", output_path, luac_path]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0:
-            return True
-        else:
-            print(f"⚠️  反编译失败 {luac_path}: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"❌ 执行错误: {e}")
-        return False
+    result = ToolRunner(workers=1).run_all([unluac_job(luac_path, output_path, unluac_jar)])[0]
+    if result.status == 'OK':
+        return True
+    print(f"⚠️  反编译失败 {luac_path}: {result.status} {result.stderr.strip()}")
+    return False
 
 def extract_luac_from_apk():
     """从 APK 中提取 Lua 文件"""
@@ -81,6 +94,86 @@ def extract_luac_from_apk():
         print(f"❌ 提取失败: {e}")
         return None
 
+def run_unluac_jobs(jobs, unluac_jar, report, per_file=False):
+    """
+    运行一批 (输入, 输出) 反编译任务，report(输入, 输出, 状态, 详情) 按完成顺序调用；
+    返回之后是否应改为逐个文件调用 java
+    """
+    if not jobs:
+        return per_file
+    # 默认批量模式：按核数与内存启动若干常驻 JVM 并行处理；
+    # --per-file 或 worker 无法启动时每个文件启动一次 java（同样并发执行）
+    if not per_file:
+        try:
+            results = decompile_parallel(unluac_jar, jobs)
+            # 生成器在第一次取值时才启动 worker
+            first = next(results, None)
+            print("✅ unluac 批量 worker 已启动")
+            for item in itertools.chain([first] if first else [], results):
+                report(*item)
+            return False
+        except UnluacWorkerError as e:
+            print(f"⚠️  {e}，改为逐个文件调用 java")
+    runner = ToolRunner(mem_mb=WORKER_MEM_MB)
+    print(f"✅ 并发调用 java: {runner.workers} 个进程")
+    runner.run_all([unluac_job(src, dst, unluac_jar) for src, dst in jobs],
+                   on_done=lambda r: report(r.job.cmd[-1], r.job.cmd[-2], r.status,
+                                            ' '.join(r.stderr.strip().splitlines()[-1:])))
+    return True
+
+def _option(name):
+    """命令行中 name 后面的值（没有或后面是另一个选项时返回 None）"""
+    if name not in sys.argv:
+        return None
+    i = sys.argv.index(name) + 1
+    if i < len(sys.argv) and not sys.argv[i].startswith('--'):
+        return sys.argv[i]
+    return None
+
+def configured_entry(lua_source_dir):
+    """config.json 的 init_cfg.entry（如 base/src/main.lua）"""
+    candidates = [os.path.join(lua_source_dir, "assets", "base", "config.json"),
+                  os.path.join("apk_unzip", "assets", "base", "config.json")]
+    for path in candidates:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)["init_cfg"]["entry"]
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+    return None
+
+def decompile_reachable(lua_source_dir, output_dir, entry, job_for, unluac_jar, report, counts, per_file):
+    """
+    从入口模块出发按 BFS 距离分波反编译：每一波结束后用新生成的源码补充依赖边，
+    直到没有新的可达模块。返回入口不可达（未处理）的 .luac 列表；入口无法解析时返回 None
+    """
+    index = LuaDepsIndex(lua_source_dir, REACHABILITY_INDEX_PATH)
+    index.update(output_dir)
+    root = index.resolve(entry)
+    if root is None:
+        print(f"❌ 入口模块不在 {lua_source_dir} 中: {entry}")
+        return None
+    print(f"🎯 入口: {entry} -> {root}")
+    done = set()
+    wave = 0
+    while True:
+        # 入口在前，其余按与入口的距离排序
+        pending = [m for m in [root] + index.closure(root) if m not in done]
+        files = [os.path.join(lua_source_dir, *rel.split('/'))
+                 for m in pending for rel in index.paths_of(m) if rel.endswith('.luac')]
+        done.update(pending)
+        if not files:
+            break
+        wave += 1
+        print(f"\n🌊 第 {wave} 波: {len(pending)} 个可达模块, {len(files)} 个文件")
+        counts['planned'] += len(files)
+        per_file = run_unluac_jobs([job_for(f) for f in files], unluac_jar, report, per_file)
+        index.update(output_dir)
+    index.save()
+    return sorted(os.path.join(lua_source_dir, *rel.split('/'))
+                  for rel, entry_ in index.files.items()
+                  if rel.endswith('.luac') and entry_['module'] not in done)
+
 def decompile_lua_files(lua_source_dir):
     """反编译所有 Lua 文件"""
     print("\n【步骤 2】反编译 Lua 文件...")
@@ -115,23 +208,62 @@ def decompile_lua_files(lua_source_dir):
     output_dir = "decompiled/lua_decompiled"
     os.makedirs(output_dir, exist_ok=True)
     
-    success_count = 0
-    failed_count = 0
-    
-    for idx, luac_file in enumerate(luac_files, 1):
+    def job_for(luac_file):
         # 生成输出文件路径
-        rel_path = luac_file.relative_to(lua_source_dir)
+        rel_path = Path(luac_file).relative_to(lua_source_dir)
         output_file = Path(output_dir) / rel_path.with_suffix('.lua')
         output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        print(f"[{idx}/{len(luac_files)}] 反编译: {rel_path}")
-        
-        if decompile_lua_file(str(luac_file), str(output_file), unluac_jar):
-            success_count += 1
-            print(f"        ✅ -> {output_file.name}")
+        return (str(luac_file), str(output_file))
+    
+    counts = {'OK': 0, 'FAIL': 0, 'planned': 0}
+    # 产出的 .lua 分批加入源码搜索索引（tools/source_index.py）；
+    # 每批打开索引、一个短事务写入后关闭，unluac 运行期间不占着写锁
+    to_index = []
+    
+    def flush_index():
+        if to_index:
+            index_files(to_index)
+            to_index.clear()
+    
+    def report(src, dst, status, detail):
+        # 结果按完成顺序到达
+        idx = counts['OK'] + counts['FAIL'] + 1
+        rel_path = Path(src).relative_to(lua_source_dir)
+        print(f"[{idx}/{counts['planned']}] 反编译: {rel_path}")
+        if status == 'OK':
+            counts['OK'] += 1
+            print(f"        ✅ -> {Path(dst).name}")
+            to_index.append(dst)
+            if len(to_index) >= INDEX_BATCH:
+                flush_index()
+        else:
+            counts['FAIL'] += 1
+            print(f"        ❌ 失败 {status} {detail}".rstrip())
+    
+    try:
+        per_file = '--per-file' in sys.argv
+        if '--entry' in sys.argv:
+            # 可达性模式：只反编译从入口经 require 可达的模块
+            entry = _option('--entry') or configured_entry(lua_source_dir)
+            if not entry:
+                print("❌ 未指定入口，且 config.json 中没有 init_cfg.entry")
+                return False
+            deferred = decompile_reachable(lua_source_dir, output_dir, entry, job_for, unluac_jar,
+                                           report, counts, per_file)
+            if deferred is None:
+                return False
+            if deferred and '--include-unreachable' in sys.argv:
+                print(f"\n📦 处理入口不可达的 {len(deferred)} 个文件（延后）")
+                counts['planned'] += len(deferred)
+                run_unluac_jobs([job_for(f) for f in deferred], unluac_jar, report, per_file)
+            elif deferred:
+                print(f"\n⏭️  跳过入口不可达的 {len(deferred)} 个文件（--include-unreachable 可一并处理）")
         else:
-            failed_count += 1
-            print(f"        ❌ 失败")
+            counts['planned'] = len(luac_files)
+            run_unluac_jobs([job_for(f) for f in luac_files], unluac_jar, report, per_file)
+    finally:
+        flush_index()
+    success_count, failed_count = counts['OK'], counts['FAIL']
     
     print(f"\n【反编译结果】")
     print(f"  ✅ 成功: {success_count}")
@@ -235,7 +367,7 @@ def main():
         print(f"\n【快速查看】")
         print(f"  Get-ChildItem '{lua_decompiled}' -Recurse -Filter '*.lua' | Select-Object -First 10")
         print(f"\n【代码分析】")
-        print(f"  Select-String -Path '{lua_decompiled}\\*.lua' -Pattern 'http|require|function'")
+        print(f"  python tools/source_index.py -e 'http|require|function'    # 索引搜索，输出 文件:行号")
     else:
         print("\n⚠️  反编译失败，请检查 unluac 工具")
 
@@ -9,6 +9,8 @@ import zipfile
 import shutil
 from pathlib import Path
 
+from apk_vfs import ApkFS, DirFS
+
 def extract_apk(apk_path, output_dir):
     """解压 APK 文件"""
     print("=" * 80)
@@ -43,8 +45,8 @@ def extract_apk(apk_path, output_dir):
         print(f"❌ 解压失败: {e}")
         return False
 
-def list_apk_contents(extract_path):
-    """列出 APK 内容"""
+def list_apk_contents(fs):
+    """列出 APK 内容（fs 为 apk_vfs 的 ApkFS 或 DirFS）"""
     print("=" * 80)
     print("【步骤 2: APK 内容分析】")
     print("=" * 80 + "\n")
@@ -59,9 +61,8 @@ def list_apk_contents(extract_path):
     ]
     
     for filename, desc in key_files:
-        filepath = os.path.join(extract_path, filename)
-        if os.path.exists(filepath):
-            size = os.path.getsize(filepath)
+        if fs.isfile(filename):
+            size = fs.getsize(filename)
             size_mb = size / 1024 / 1024
             print(f"  ✅ {filename:30s} ({size_mb:6.2f} MB) - {desc}")
         else:
@@ -78,34 +79,31 @@ def list_apk_contents(extract_path):
     }
     
     for dirname, desc in dirs.items():
-        dirpath = os.path.join(extract_path, dirname)
-        if os.path.exists(dirpath):
-            file_count = len(list(Path(dirpath).rglob('*')))
+        if fs.isdir(dirname):
+            file_count = len(fs.rglob('*', dirname))
             print(f"  ✅ {dirname:15s} ({file_count:4d} 个文件) - {desc}")
         else:
             print(f"  ❌ {dirname:15s} - 未找到")
     
     print("\n【Lua 文件统计】\n")
-    lua_files = list(Path(extract_path).rglob("*.luac"))
+    lua_files = fs.rglob("*.luac")
     print(f"  📊 发现 {len(lua_files)} 个 Lua 编译文件 (.luac)")
     
     if lua_files:
         print("\n  示例:")
-        for lua_file in lua_files[:5]:
-            rel_path = lua_file.relative_to(extract_path)
+        for rel_path in lua_files[:5]:
             print(f"    - {rel_path}")
         if len(lua_files) > 5:
             print(f"    ... 还有 {len(lua_files) - 5} 个文件")
     
     print("\n【Native 库统计】\n")
-    so_files = list(Path(extract_path).rglob("*.so"))
+    so_files = fs.rglob("*.so")
     print(f"  📊 发现 {len(so_files)} 个 Native 库 (.so)")
     
     if so_files:
         print("\n  示例:")
-        for so_file in so_files[:5]:
-            rel_path = so_file.relative_to(extract_path)
-            size = so_file.stat().st_size / 1024
+        for rel_path in so_files[:5]:
+            size = fs.getsize(rel_path) / 1024
             print(f"    - {rel_path} ({size:.1f} KB)")
 
 def create_navigation_guide(extract_path):
@@ -275,15 +273,15 @@ java_src/
 
 【常用命令】
 
-查找特定字符串:
-  $ Get-ChildItem decompiled -Recurse | Select-String "api_key|password|secret"
+查找特定字符串（倒排索引，首次运行或反编译后加 --update）:
+  $ python tools/source_index.py --update -e "api_key|password|secret"
 
 统计代码行数:
   $ (Get-ChildItem decompiled/lua_decompiled -Recurse -Filter '*.lua' | 
      Measure-Object -Property Length -Sum).Sum
 
 查找网络调用:
-  $ Select-String -Path 'decompiled/java_src/*.java' -Pattern 'http|socket|request'
+  $ python tools/source_index.py -e "http|socket|request"
 
 【需要的工具】
 
@@ -324,6 +322,15 @@ def main():
     apk_file = "base.apk"
     output_dir = "decompiled"
     
+    # --no-extract: 直接读 APK 中央目录做快速分诊，不写出任何文件
+    if "--no-extract" in sys.argv:
+        if not os.path.exists(apk_file):
+            print(f"❌ APK 文件未找到: {apk_file}")
+            return False
+        with ApkFS(apk_file) as fs:
+            list_apk_contents(fs)
+        return True
+    
     # 步骤 1: 解压 APK
     extract_path = extract_apk(apk_file, output_dir)
     if not extract_path:
@@ -331,7 +338,7 @@ def main():
         return False
     
     # 步骤 2: 分析内容
-    list_apk_contents(extract_path)
+    list_apk_contents(DirFS(extract_path))
     
     # 步骤 3: 创建导航指南
     guide_file = create_navigation_guide(extract_path)
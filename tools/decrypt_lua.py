@@ -7,97 +7,96 @@
 
 import os
 import sys
-import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
+from lua_crypto import try_method
+from lua_formats import classify_tree, detect, summarize
+from mirror_tree import MirrorTree, atomic_write, digest_files
+from xxtea_keys import discover_key
+
+# 解码逻辑（格式注册表 / 方法搜索）变化时递增，镜像目录中旧版本的输出会被重新生成
+DECODER_VERSION = '1'
+
+# 镜像输出目录（--in-place 时仍写到输入文件旁边）
+DEFAULT_OUTPUT_DIR = "decompiled/lua_decrypted"
+
 def analyze_lua_format(data):
-    """分析 Lua 文件格式"""
+    """分析 Lua 文件格式，返回 lua_formats 中注册的格式（无法识别时为 None）"""
     print("[File Information]")
     print(f"  Size: {len(data)} bytes")
     print(f"  Header (hex): {' '.join(f'{b:02x}' for b in data[:32])}")
     print(f"  Header (ASCII): {repr(data[:32])}")
     
-    # 检查已知的格式签名
-    if data[:10] == b'RY_QP_2016':
-        print("  Format: RY_QP_2016 (Custom encrypted)")
-        return "RY_QP_2016"
-    elif data[:4] == b'\x1bLuaQ':
-        print("  Format: Lua 5.1 bytecode")
-        return "lua51"
-    elif data[:4] == b'\x1bLuaT':
-        print("  Format: Lua 5.3 bytecode")
-        return "lua53"
-    else:
-        print("  Format: Unknown")
-        return "unknown"
+    # 按注册表逐个探测文件头
+    fmt = detect(data)
+    print(f"  Format: {fmt.description if fmt else 'Unknown'}")
+    return fmt
+
+def decrypt_with(data, method, fmt=None):
+    """用已知方法直接解密（去掉格式的 sign 前缀后），验证失败返回 None"""
+    fmt = fmt or detect(data)
+    if fmt is None or not fmt.encrypted:
+        return None
+    return try_method(data[len(fmt.sign):], method)
 
-def decrypt_ry_qp_2016(data):
+def search_method(data, xxtea_key=None, fmt=None):
+    """交给格式自己的解码器做完整方法搜索，返回 (method, 明文)；失败返回 (None, None)"""
+    fmt = fmt or detect(data)
+    if fmt is None or not fmt.encrypted:
+        return None, None
+    return fmt.decode(data, xxtea_key)
+
+_METHOD_LABELS = {
+    'xxtea': 'XXTEA key',
+    'xor': 'XOR key',
+    'cyclic': 'Cyclic XOR key',
+    'base64': 'Base64 decoding',
+    'zlib': 'DEFLATE decompression',
+}
+
+def decrypt_ry_qp_2016(data, xxtea_key=None):
     """
     Attempt to decrypt RY_QP_2016 format
-    This format uses simple XOR and shift encryption
+    RY_QP_2016 is the cocos2d-x XXTEA sign; the body is XXTEA-encrypted.
+    Simple XOR / shift / base64 / DEFLATE schemes are still tried as a fallback
     """
     print("[Decrypting RY_QP_2016]")
     
-    # Skip header 10 bytes (RY_QP_2016)
-    header = data[:10]
-    encrypted = data[10:]
+    # Skip the sign (10 bytes for RY_QP_2016)
+    fmt = detect(data)
+    sign_len = len(fmt.sign) if fmt else 10
+    header = data[:sign_len]
+    encrypted = data[sign_len:]
     
     print(f"  Header: {header}")
     print(f"  Encrypted data size: {len(encrypted)} bytes")
     
-    # Try multiple decryption methods
-    
-    # Method 1: Simple XOR
-    print("  Trying method 1: Simple XOR...")
-    for xor_key in range(256):
-        decrypted = bytes(b ^ xor_key for b in encrypted)
-        if decrypted[:4] == b'\x1bLuaQ' or decrypted[:4] == b'\x1bLuaT':
-            print(f"  [OK] Success! XOR key: {xor_key:02x}")
-            return header + decrypted
-    
-    # Method 2: Cyclic XOR
-    print("  Trying method 2: Cyclic XOR...")
-    for xor_key in range(256):
-        decrypted = bytes((b ^ ((xor_key + i) % 256)) for i, b in enumerate(encrypted))
-        if decrypted[:4] == b'\x1bLuaQ' or decrypted[:4] == b'\x1bLuaT':
-            print(f"  [OK] Success! Cyclic XOR key: {xor_key:02x}")
-            return header + decrypted
-    
-    # Method 3: Byte reversal + XOR
-    print("  Trying method 3: Byte reversal...")
-    reversed_data = bytes(255 - b for b in encrypted)
-    if reversed_data[:4] == b'\x1bLuaQ' or reversed_data[:4] == b'\x1bLuaT':
-        print("  [OK] Success! Byte reversal")
-        return header + reversed_data
-    
-    # Method 4: Check encoding characteristics
-    print("  Trying method 4: Checking encoding features...")
-    if all(b < 128 for b in encrypted):
-        print("  Hint: Encrypted data looks like ASCII printable characters")
-        try:
-            import base64
-            decoded = base64.b64decode(bytes(encrypted))
-            if decoded[:4] == b'\x1bLuaQ' or decoded[:4] == b'\x1bLuaT':
-                print("  [OK] Success! Base64 decoding")
-                return header + decoded
-        except:
-            pass
-    
-    # Method 5: Check if it's simple DEFLATE compression
-    print("  Trying method 5: Checking DEFLATE compression...")
-    try:
-        import zlib
-        decompressed = zlib.decompress(encrypted)
-        if decompressed[:4] == b'\x1bLuaQ' or decompressed[:4] == b'\x1bLuaT':
-            print("  [OK] Success! DEFLATE decompression")
-            return header + decompressed
-    except:
-        pass
-    
-    print("  [FAIL] All methods failed")
-    return None
+    # XXTEA first, then XOR keys derived from the header (known Lua signature),
+    # then base64 / DEFLATE
+    method, decrypted = search_method(data, xxtea_key, fmt)
+    if method is None:
+        print("  [FAIL] All methods failed")
+        return None
+    print(f"  [OK] Success! {describe_method(method)}")
+    return decrypted
 
-def process_lua_file(input_path):
+def describe_method(method):
+    """('xor', 0x37) -> 'XOR key: 37'"""
+    if method is None:
+        return 'none'
+    kind, key = method
+    if key is None:
+        return _METHOD_LABELS[kind]
+    return f"{_METHOD_LABELS[kind]}: {key:02x}" if isinstance(key, int) else f"{_METHOD_LABELS[kind]}: {key!r}"
+
+def output_path_for(input_path, decrypted):
+    """输出文件路径：解密结果为 _decrypted.lua，原本就是字节码的为 .lua_bytecode"""
+    return input_path.replace('.luac', '_decrypted.lua' if decrypted else '.lua_bytecode')
+
+def process_lua_file(input_path, xxtea_key=None):
     """Process a single Lua file"""
     print(f"\n{'='*60}")
     print(f"File: {input_path}")
@@ -107,21 +106,21 @@ def process_lua_file(input_path):
         data = f.read()
     
     # Analyze format
-    format_type = analyze_lua_format(data)
+    fmt = analyze_lua_format(data)
     
-    if format_type == "RY_QP_2016":
+    if fmt and fmt.encrypted:
         # Try to decrypt
-        decrypted = decrypt_ry_qp_2016(data)
+        decrypted = decrypt_ry_qp_2016(data, xxtea_key)
         if decrypted:
             print("[Output]")
-            output_path = input_path.replace('.luac', '_decrypted.lua')
+            output_path = output_path_for(input_path, True)
             with open(output_path, 'wb') as f:
                 f.write(decrypted)
             print(f"  Saved to: {output_path}")
             return True
-    elif format_type == "lua51" or format_type == "lua53":
+    elif fmt:
         print("[Result] Already Lua bytecode, can decompile directly")
-        output_path = input_path.replace('.luac', '.lua_bytecode')
+        output_path = output_path_for(input_path, False)
         with open(output_path, 'wb') as f:
             f.write(data)
         print(f"  Copied to: {output_path}")
@@ -129,6 +128,111 @@ def process_lua_file(input_path):
     
     return False
 
+def batch_decrypt_file(input_path, output_path=None, method=None, xxtea_key=None):
+    """
+    批量模式的单文件处理（在工作进程中执行，不打印）：
+    先用学到的方法直接解密，验证失败才回退到完整搜索。
+    output_path 为 None 时写到输入文件旁边，否则原子写入 output_path。
+    返回 (input_path, 状态, 实际使用的方法)，状态为 learned / searched / copied / failed
+    """
+    try:
+        with open(input_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return input_path, 'failed', None
+    
+    fmt = detect(data)
+    if fmt is None:
+        return input_path, 'failed', None
+    if not fmt.encrypted:
+        out, status = data, 'copied'
+    else:
+        out = decrypt_with(data, method, fmt) if method else None
+        status = 'learned'
+        if out is None:
+            method, out = search_method(data, xxtea_key, fmt)
+            status = 'searched'
+        if out is None:
+            return input_path, 'failed', None
+    
+    if output_path is None:
+        with open(output_path_for(input_path, status != 'copied'), 'wb') as f:
+            f.write(out)
+    else:
+        atomic_write(output_path, out)
+    return input_path, status, method
+
+def learn_method(lua_files, xxtea_key=None, max_tries=8):
+    """在前几个加密文件上做完整搜索，返回第一个成功的方法；都失败返回 None"""
+    tries = 0
+    for lua_file in lua_files:
+        with open(lua_file, 'rb') as f:
+            data = f.read()
+        fmt = detect(data)
+        if fmt is None or not fmt.encrypted:
+            continue
+        method, _ = search_method(data, xxtea_key, fmt)
+        if method:
+            return method
+        tries += 1
+        if tries >= max_tries:
+            break
+    return None
+
+def batch_decrypt(lua_files, xxtea_key=None, workers=None, mirror=None):
+    """
+    批量解密：学一次方法，进程池中直接套用到全部文件；只打印一行进度和一行汇总。
+    mirror 为 MirrorTree 时输出写入镜像目录，输入哈希与解码器版本未变的文件直接跳过
+    """
+    start = time.time()
+    counts = {'learned': 0, 'searched': 0, 'copied': 0, 'failed': 0, 'fresh': 0}
+    total = len(lua_files)
+    if mirror is not None:
+        digests = digest_files(lua_files)
+        mirror.prune(digests)
+        lua_files = [p for p in lua_files if not mirror.is_fresh(p, digests.get(p))]
+        counts['fresh'] = total - len(lua_files)
+        outputs = [mirror.target(p) for p in lua_files]
+    else:
+        outputs = [None] * len(lua_files)
+    
+    method = None
+    if lua_files:
+        method = learn_method(lua_files, xxtea_key)
+        print(f"  Learned method: {describe_method(method)}")
+    
+    worker = partial(batch_decrypt_file, method=method, xxtea_key=xxtea_key)
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(lua_files) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(worker, lua_files, outputs, chunksize=max(1, len(lua_files) // (workers * 8)))
+    else:
+        pool = None
+        results = map(worker, lua_files, outputs)
+    try:
+        for done, (path, status, used) in enumerate(results, 1):
+            counts[status] += 1
+            if mirror is not None:
+                if status == 'failed':
+                    mirror.forget(path)
+                else:
+                    mirror.stamp(path, digests[path], method=describe_method(used))
+            if done % 50 == 0 or done == len(lua_files):
+                print(f"\r  Progress: {done}/{len(lua_files)}", end='', flush=True)
+    finally:
+        if pool:
+            pool.shutdown()
+        if mirror is not None:
+            mirror.save()
+    print()
+    
+    ok = total - counts['failed']
+    print(f"[Summary] {ok}/{total} ok "
+          f"(up to date {counts['fresh']}, learned {counts['learned']}, "
+          f"re-searched {counts['searched']}, copied {counts['copied']}), "
+          f"failed {counts['failed']}, {time.time() - start:.2f}s")
+    return counts
+
 def main():
     """Main program"""
     print("\n" + "="*60)
@@ -143,32 +247,56 @@ def main():
         print("Please run this script in the project root directory")
         return
     
-    lua_files = list(base_path.rglob("*.luac"))
+    lua_files = [str(p) for p in base_path.rglob("*.luac")]
     print(f"\nFound {len(lua_files)} Lua files")
+    # Header-only classification (one small read per file)
+    formats = summarize(classify_tree(str(base_path), ('.luac',)))
+    print("  Formats: " + ", ".join(f"{name} {count}" for name, count in formats.most_common()))
     
     if not lua_files:
         print("[ERROR] No .luac files found")
         return
     
-    # Analyze the first file
+    # Find the XXTEA key once (ranked candidates from native libs / DEX)
+    print("\n[Step 0] Discovering XXTEA key...")
+    if '--xxtea-key' in sys.argv:
+        xxtea_key = sys.argv[sys.argv.index('--xxtea-key') + 1].encode('utf-8')
+    else:
+        xxtea_key = discover_key('apk_unzip', lua_files)
+    print(f"  Key: {xxtea_key!r}" if xxtea_key else "  No candidate key validated")
+    
+    if '--verbose' not in sys.argv:
+        # Batch mode: learn the method once, apply it everywhere in a process pool
+        # 默认写入镜像目录（跳过未变化的文件），--in-place 时写到输入文件旁边
+        mirror = None
+        if '--in-place' not in sys.argv:
+            out_dir = sys.argv[sys.argv.index('--out') + 1] if '--out' in sys.argv else DEFAULT_OUTPUT_DIR
+            mirror = MirrorTree(str(base_path), out_dir, DECODER_VERSION)
+            print(f"\n[Step 1] Batch decrypting {len(lua_files)} files into {out_dir}...")
+        else:
+            print(f"\n[Step 1] Batch decrypting {len(lua_files)} files...")
+        batch_decrypt(lua_files, xxtea_key, mirror=mirror)
+        return
+    
+    # Verbose mode: per-file format dump and full method search
     print("\n[Step 1] Analyzing first file...")
     first_file = lua_files[0]
-    process_lua_file(str(first_file))
+    first_ok = process_lua_file(first_file, xxtea_key)
     
     # Process remaining files in batch
     if len(lua_files) > 1:
         print(f"\n[Step 2] Processing remaining {len(lua_files)-1} files...")
         success_count = 0
         for i, lua_file in enumerate(lua_files[1:], 2):
-            if process_lua_file(str(lua_file)):
+            if process_lua_file(lua_file, xxtea_key):
                 success_count += 1
             if i % 10 == 0:
                 print(f"  Progress: {i}/{len(lua_files)}")
         
         print("\n[Statistics]")
         print(f"  Total files: {len(lua_files)}")
-        print(f"  Successfully processed: {success_count + 1}")
-        print(f"  Failed: {len(lua_files) - success_count - 1}")
+        print(f"  Successfully processed: {success_count + first_ok}")
+        print(f"  Failed: {len(lua_files) - success_count - first_ok}")
 
 if __name__ == "__main__":
     main()
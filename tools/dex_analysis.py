@@ -4,21 +4,39 @@ APK DEX 反编译与安全分析脚本
 """
 import re
 import os
+import sqlite3
+import struct
 from collections import Counter
+from itertools import islice
 
-def extract_strings_from_dex(dex_path, max_strings=5000):
+import stream_reader
+from dex_parser import DexFile, DexFormatError
+from dex_xref import XrefIndex
+from multidex import find_dex_files, map_dex
+from result_cache import ResultCache
+from scan_engine import printable_pattern
+
+# 字符串提取逻辑变化时递增，使旧的缓存结果失效
+ANALYZER_VERSION = '1'
+
+def extract_strings_from_dex(dex_path, max_strings=None):
     """从 dex 文件提取字符串，寻找敏感信息"""
-    with open(dex_path, 'rb') as f:
-        b = f.read()
+    # 直接遍历 string_ids 表（ULEB128 长度 + MUTF-8），覆盖全部字符串
+    try:
+        with DexFile(dex_path) as dex:
+            strings = list(islice(dex.iter_strings(), max_strings))
+        return strings
+    except DexFormatError:
+        pass
     
-    # 提取 ULEB128 编码的字符串与二进制格式字符串
+    # 非标准 DEX：退回可见 ASCII 字符串扫描（4-300 字符），mmap 分块流式扫描
     strings = []
+    for _, part in stream_reader.finditer(dex_path, printable_pattern(4, 300), overlap=300):
+        strings.append(part.decode('utf-8', errors='ignore'))
+        if max_strings is not None and len(strings) >= max_strings:
+            break
     
-    # 寻找可见的 ASCII 字符串（4-300 字符）
-    parts = re.findall(b'([ -~]{4,300})', b)
-    strings = [p.decode('utf-8', errors='ignore') for p in parts]
-    
-    return strings[:max_strings]
+    return strings
 
 def analyze_security_issues(strings):
     """分析安全问题"""
@@ -70,6 +88,48 @@ def analyze_security_issues(strings):
     
     return issues
 
+# 敏感 API（dex_xref 查询目标）：字符串扫描只能说明名字出现过，调用点索引给出实际调用它们的方法
+SENSITIVE_APIS = {
+    'external_commands': [
+        'Ljava/lang/Runtime;->exec',
+        'Ljava/lang/ProcessBuilder;-><init>',
+        'Ljava/lang/ProcessBuilder;->start',
+    ],
+    'permissions_risky': [
+        'Landroid/telephony/SmsManager;->sendTextMessage',
+        'Landroid/telephony/SmsManager;->sendMultipartTextMessage',
+        'Landroid/telephony/SmsManager;->sendDataMessage',
+        'Landroid/telephony/TelephonyManager;->getDeviceId',
+        'Landroid/telephony/TelephonyManager;->getSubscriberId',
+        'Landroid/telephony/TelephonyManager;->getLine1Number',
+        'Landroid/location/LocationManager;->getLastKnownLocation',
+        'Landroid/location/LocationManager;->requestLocationUpdates',
+        'Landroid/media/AudioRecord;->startRecording',
+        'Landroid/media/MediaRecorder;->setAudioSource',
+    ],
+    'dynamic_code_loading': [
+        'Ldalvik/system/DexClassLoader;-><init>',
+        'Ldalvik/system/PathClassLoader;-><init>',
+        'Ljava/lang/System;->load',
+        'Ljava/lang/System;->loadLibrary',
+        'Ljava/lang/reflect/Method;->invoke',
+    ],
+    'webview_js_bridge': [
+        'Landroid/webkit/WebView;->addJavascriptInterface',
+        'Landroid/webkit/WebSettings;->setJavaScriptEnabled',
+    ],
+}
+
+def analyze_api_calls(xref, apis=SENSITIVE_APIS):
+    """按类别查询敏感 API 的调用点: {类别: {API: [(调用者, 被调方法签名, 指令, 次数)]}}，没有调用的 API 不列出"""
+    found = {}
+    for category, targets in apis.items():
+        for target in targets:
+            rows = xref.callers(target)
+            if rows:
+                found.setdefault(category, {})[target] = rows
+    return found
+
 def extract_classes_and_methods(strings):
     """提取类名与方法名"""
     classes = set()
@@ -78,34 +138,82 @@ def extract_classes_and_methods(strings):
             classes.add(s)
     return sorted(list(classes))
 
-print("=" * 80)
-print("APK 安全审计 - DEX 分析")
-print("=" * 80)
+def main():
+    """主程序"""
+    print("=" * 80)
+    print("APK 安全审计 - DEX 分析")
+    print("=" * 80)
+
+    dex_paths = find_dex_files()
+    if not dex_paths:
+        print("[!] 未找到 classes*.dex")
+        return
+    print(f"\n[*] 从 {len(dex_paths)} 个 DEX 提取字符串（每个 DEX 一个工作进程）...")
+    # 按 DEX 内容哈希缓存字符串表，只把未命中的 DEX 交给工作进程
+    cache = ResultCache()
+    digests = {p: cache.digest(p) for p in dex_paths}
+    per_dex = {p: cache.get('dex_strings', ANALYZER_VERSION, digests[p]) for p in dex_paths}
+    missing = [p for p in dex_paths if per_dex[p] is None]
+    for dex_path, dex_strings in map_dex(extract_strings_from_dex, missing):
+        cache.put('dex_strings', ANALYZER_VERSION, digests[dex_path], dex_strings)
+        per_dex[dex_path] = dex_strings
+    cache.close()
+    strings = []
+    for dex_path in dex_paths:
+        cached = '（缓存）' if dex_path not in missing else ''
+        print(f"    {dex_path}: {len(per_dex[dex_path])} 个字符串{cached}")
+        strings.extend(per_dex[dex_path])
+    # 多个 DEX 的字符串池各自独立，按 DEX 顺序去重合并
+    strings = list(dict.fromkeys(strings))
+    print(f"[+] 成功提取 {len(strings)} 个字符串")
+
+    print("\n[*] 分析安全问题...")
+    issues = analyze_security_issues(strings)
 
-dex_path = 'apk_unzip/classes.dex'
-print(f"\n[*] 从 {dex_path} 提取字符串...")
-strings = extract_strings_from_dex(dex_path)
-print(f"[+] 成功提取 {len(strings)} 个字符串")
+    print("\n" + "=" * 80)
+    print("安全问题汇总")
+    print("=" * 80)
 
-print("\n[*] 分析安全问题...")
-issues = analyze_security_issues(strings)
+    for category, items in issues.items():
+        if items:
+            print(f"\n【{category}】 - 发现 {len(items)} 个问题:")
+            for i, item in enumerate(items[:10]):  # 显示前10个
+                print(f"  {i+1}. {item[:100]}")
+            if len(items) > 10:
+                print(f"  ... 还有 {len(items) - 10} 个")
 
-print("\n" + "=" * 80)
-print("安全问题汇总")
-print("=" * 80)
+    print("\n[*] 查询敏感 API 调用点（方法级交叉引用索引）...")
+    try:
+        with XrefIndex(dex_paths) as xref:
+            if xref.built:
+                print(f"    新建索引 {len(xref.built)} 个 DEX")
+            api_calls = analyze_api_calls(xref)
+    except (sqlite3.Error, struct.error, ValueError, OSError) as e:
+        # 调用点索引失败不影响报告其余部分
+        print(f"[!] 调用点索引不可用: {e}")
+        api_calls = None
+    if api_calls is not None and not api_calls:
+        print("[+] 未发现敏感 API 调用")
+    for category, targets in (api_calls or {}).items():
+        print(f"\n【{category}】 - 调用点:")
+        for target, rows in targets.items():
+            # 行按 (调用者, 被调重载, 指令) 分组，同一调用者调用多个重载时合并
+            callers = {}
+            for caller, _callee, _kind, count in rows:
+                callers[caller] = callers.get(caller, 0) + count
+            print(f"  {target}  ({len(callers)} 个调用者)")
+            for caller, count in list(callers.items())[:10]:
+                print(f"    <- {caller}" + (f"  x{count}" if count > 1 else ""))
+            if len(callers) > 10:
+                print(f"    ... 还有 {len(callers) - 10} 个")
 
-for category, items in issues.items():
-    if items:
-        print(f"\n【{category}】 - 发现 {len(items)} 个问题:")
-        for i, item in enumerate(items[:10]):  # 显示前10个
-            print(f"  {i+1}. {item[:100]}")
-        if len(items) > 10:
-            print(f"  ... 还有 {len(items) - 10} 个")
+    print("\n[*] 提取主要类名...")
+    classes = extract_classes_and_methods(strings)
+    print(f"[+] 发现 {len(classes)} 个主要类/包")
+    print("\n主要应用类（前50个）:")
+    for c in classes[:50]:
+        if 'com.' in c or 'org.' in c or 'android.' in c:
+            print(f"  - {c}")
 
-print("\n[*] 提取主要类名...")
-classes = extract_classes_and_methods(strings)
-print(f"[+] 发现 {len(classes)} 个主要类/包")
-print("\n主要应用类（前50个）:")
-for c in classes[:50]:
-    if 'com.' in c or 'org.' in c or 'android.' in c:
-        print(f"  - {c}")
+if __name__ == "__main__":
+    main()
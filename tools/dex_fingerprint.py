@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+DEX 类级指纹
+每个 class_def 的指纹覆盖：类描述符、访问标志、父类、接口、源文件名、静态初始值、注解、
+字段与方法签名，以及每个方法的 code_item（寄存器数、try/catch、指令）。
+指令中的字符串 / 类型 / 字段 / 方法 / 原型索引替换成解析后的符号再参与哈希：
+新版本 DEX 里多了一个字符串会让所有索引整体偏移，但没改过的类指纹不变。
+debug_info（行号、局部变量名）不参与，只改了行号的类不会被当成变化。
+内部类（Outer$Inner）并入外部类的指纹：CFR 把它们输出到同一个 .java 文件
+
+指纹索引以 JSON 保存在 java_src 旁边（java_src.fingerprints.json），
+下一次反编译只处理指纹变化的类
+
+用法:
+    python tools/dex_fingerprint.py classes.dex [旧索引.json]
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+
+from dalvik import code_units, index_units, iter_references, resolve_reference
+from dex_parser import DexFile, NO_INDEX
+from mirror_tree import atomic_write
+from result_cache import ResultCache
+
+FINGERPRINT_VERSION = '2'
+ERROR_FINGERPRINT = 'error'
+# invoke-polymorphic(/range)：除 method 索引外还带一个 proto 索引
+POLYMORPHIC_OPCODES = (0xfa, 0xfb)
+
+
+def _update(h, *parts):
+    for part in parts:
+        h.update(str(part).encode('utf-8', errors='surrogatepass'))
+        h.update(b'\x00')
+
+
+def _hash_code(dex, code, h):
+    """code_item 的哈希：索引操作数清零后的指令 + 解析出的符号 + try/catch"""
+    units = code_units(code.insns)
+    refs = []
+    for pc, op, kind, idx in iter_references(units):
+        refs.append(resolve_reference(dex, kind, idx))
+        for i in range(index_units(op)):
+            units[pc + 1 + i] = 0
+        if op in POLYMORPHIC_OPCODES:
+            # invoke-polymorphic 第 4 个代码单元是 proto 索引，同样随 proto_ids 偏移
+            refs.append(dex.proto_descriptor(units[pc + 3]))
+            units[pc + 3] = 0
+    if sys.byteorder == 'big':
+        units.byteswap()
+    _update(h, code.registers_size, code.ins_size, code.outs_size)
+    h.update(units.tobytes())
+    _update(h, *refs)
+    for start, count, handler_off in code.tries:
+        _update(h, start, count, dex.catch_handler(code, handler_off))
+
+
+def class_fingerprint(dex, class_def):
+    """单个 class_def 的指纹（sha1 十六进制）"""
+    h = hashlib.sha1()
+    source = dex.string(class_def.source_file_idx) if class_def.source_file_idx != NO_INDEX else ''
+    _update(h, dex.type_descriptor(class_def.class_idx), class_def.access_flags,
+            dex.type_descriptor(class_def.superclass_idx), dex.interfaces(class_def), source,
+            dex.static_values(class_def), dex.annotations(class_def))
+    data = dex.class_data(class_def)
+    if data is None:
+        return h.hexdigest()
+    for field in data.static_fields + data.instance_fields:
+        _update(h, dex.field_ref(field.field_idx), field.access_flags)
+    for method in data.direct_methods + data.virtual_methods:
+        _update(h, dex.method_ref(method.method_idx), method.access_flags)
+        code = dex.code_item(method.code_off)
+        if code is not None:
+            _hash_code(dex, code, h)
+    return h.hexdigest()
+
+
+def top_level_name(name, names):
+    """a/B$1$2 -> 本 DEX 中存在的最外层类 a/B；外部类不在 DEX 中时按自身算"""
+    package, _, simple = name.rpartition('/')
+    parts = simple.split('$')
+    for i in range(1, len(parts)):
+        outer = (package + '/' if package else '') + '$'.join(parts[:i])
+        if outer in names:
+            return outer
+    return name
+
+
+def dex_fingerprints(dex_path):
+    """{顶层类内部名 a/b/C: 指纹}，内部类并入顶层类"""
+    per_class = {}
+    with DexFile(dex_path) as dex:
+        for class_def in dex.iter_class_defs():
+            descriptor = dex.type_descriptor(class_def.class_idx)
+            try:
+                fingerprint = class_fingerprint(dex, class_def)
+            except (struct.error, IndexError, ValueError):
+                # 结构损坏的类每次都当作变化（见 diff_fingerprints）
+                fingerprint = ERROR_FINGERPRINT
+            per_class[descriptor[1:-1]] = fingerprint
+    groups = {}
+    for name in per_class:
+        groups.setdefault(top_level_name(name, per_class), []).append(name)
+    result = {}
+    for top, members in groups.items():
+        if len(members) == 1:
+            result[top] = per_class[top]
+            continue
+        h = hashlib.sha1()
+        for name in sorted(members):
+            _update(h, name, per_class[name])
+        broken = any(per_class[name] == ERROR_FINGERPRINT for name in members)
+        result[top] = ERROR_FINGERPRINT if broken else h.hexdigest()
+    return result
+
+
+def cached_dex_fingerprints(dex_path):
+    """按 DEX 内容哈希缓存的 dex_fingerprints()，同一个 DEX 重跑不必重新解析"""
+    cache = ResultCache()
+    try:
+        return cache.cached('dex_fingerprint', FINGERPRINT_VERSION, dex_fingerprints, dex_path)
+    finally:
+        cache.close()
+
+
+def index_path_for(output_dir):
+    """java_src -> java_src.fingerprints.json"""
+    return output_dir.rstrip('/\\') + '.fingerprints.json'
+
+
+def load_index(path):
+    """读取指纹索引 {类名: 指纹}；不存在或版本不符时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if saved.get('version') != FINGERPRINT_VERSION:
+        return None
+    return saved.get('classes', {})
+
+
+def save_index(path, classes):
+    data = dict(version=FINGERPRINT_VERSION, classes=classes)
+    atomic_write(path, json.dumps(data, indent=0, sort_keys=True).encode('utf-8'))
+
+
+def diff_fingerprints(old, new):
+    """返回 (新增或变化的类, 已删除的类)，均已排序"""
+    changed = sorted(name for name, fp in new.items() if fp == ERROR_FINGERPRINT or old.get(name) != fp)
+    removed = sorted(name for name in old if name not in new)
+    return changed, removed
+
+
+def java_source_path(output_dir, name):
+    """CFR 为顶层类 a/b/C 输出的文件 output_dir/a/b/C.java"""
+    return os.path.join(output_dir, *name.split('/')) + '.java'
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    fingerprints = cached_dex_fingerprints(sys.argv[1])
+    print(f'[+] {len(fingerprints)} 个顶层类')
+    if len(sys.argv) > 2:
+        old = load_index(sys.argv[2]) or {}
+        changed, removed = diff_fingerprints(old, fingerprints)
+        print(f'[+] 变化 {len(changed)} 个, 删除 {len(removed)} 个, 未变 {len(fingerprints) - len(changed)} 个')
+        for name in changed[:50]:
+            print(f'    * {name}')
+        for name in removed[:50]:
+            print(f'    - {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+DEX 类型索引
+从 type_ids / class_defs 表取出全部类描述符（每个只出现一次），
+按包名分段存入前缀树，每一层都带有类计数，
+"前 30 个根包"、"com.tencent 下的所有类" 等查询直接查树，不再重扫文件
+"""
+from dex_parser import DexFile, descriptor_to_class_name
+
+
+class PackageNode:
+    """前缀树节点：包名的一段；__slots__ 避免每个节点带 __dict__"""
+    __slots__ = ('children', 'total', 'defined', 'classes')
+
+    def __init__(self):
+        self.children = {}
+        self.total = 0        # 子树中的类数量（定义 + 引用）
+        self.defined = 0      # 子树中本 DEX 定义的类数量
+        self.classes = {}     # 直接位于该包下的类: 简单类名 -> 是否在本 DEX 中定义
+
+
+class PackageTree:
+    """按 . 分段的包名前缀树"""
+
+    def __init__(self):
+        self.root = PackageNode()
+
+    def add(self, class_name, defined=False):
+        """加入一个全限定类名；重复加入同一个类不会重复计数"""
+        *packages, simple = class_name.split('.')
+        path = [self.root]
+        node = self.root
+        for part in packages:
+            node = node.children.setdefault(part, PackageNode())
+            path.append(node)
+        known = node.classes.get(simple)
+        if known is None:
+            node.classes[simple] = defined
+            for n in path:
+                n.total += 1
+                if defined:
+                    n.defined += 1
+        elif defined and not known:
+            node.classes[simple] = True
+            for n in path:
+                n.defined += 1
+
+    def merge(self, other):
+        """合并另一棵树（多个 DEX 的结果汇总）"""
+        for name, defined in other.iter_classes():
+            self.add(name, defined)
+
+    def find(self, package):
+        """定位包节点；不存在返回 None"""
+        node = self.root
+        if not package:
+            return node
+        for part in package.split('.'):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def count(self, package, defined_only=False):
+        node = self.find(package)
+        if node is None:
+            return 0
+        return node.defined if defined_only else node.total
+
+    def packages_at_depth(self, depth=1):
+        """产出 (包名, 节点)，包名正好 depth 段"""
+        level = [('', self.root)]
+        for _ in range(depth):
+            level = [(f'{prefix}.{part}' if prefix else part, child)
+                     for prefix, node in level
+                     for part, child in node.children.items()]
+        return level
+
+    def top(self, n=30, depth=1, defined_only=False):
+        """某一深度下类数量最多的前 n 个包: [(包名, 数量)]"""
+        key = (lambda node: node.defined) if defined_only else (lambda node: node.total)
+        items = [(name, key(node)) for name, node in self.packages_at_depth(depth)]
+        items = [item for item in items if item[1]]
+        items.sort(key=lambda item: (-item[1], item[0]))
+        return items[:n]
+
+    def iter_classes(self, package=''):
+        """产出 (全限定类名, 是否定义)；package 为空时遍历整棵树"""
+        node = self.find(package)
+        if node is None:
+            return
+        stack = [(package, node)]
+        while stack:
+            prefix, node = stack.pop()
+            for simple, defined in node.classes.items():
+                yield (f'{prefix}.{simple}' if prefix else simple), defined
+            for part, child in node.children.items():
+                stack.append((f'{prefix}.{part}' if prefix else part, child))
+
+    def classes_under(self, package, defined_only=False):
+        """包（含子包）下的所有类名，已排序"""
+        return sorted(name for name, defined in self.iter_classes(package)
+                      if defined or not defined_only)
+
+
+def build_type_index(dex):
+    """
+    从 DexFile 构建 PackageTree：class_defs 里的类标记为"定义"，
+    type_ids 里其余的类类型（含数组元素类型）为"引用"
+    """
+    tree = PackageTree()
+    defined = set()
+    for class_def in dex.iter_class_defs():
+        name = descriptor_to_class_name(dex.type_descriptor(class_def.class_idx))
+        if name:
+            defined.add(name)
+            tree.add(name, defined=True)
+    for descriptor in dex.iter_type_descriptors():
+        name = descriptor_to_class_name(descriptor)
+        if name and name not in defined:
+            tree.add(name)
+    return tree
+
+
+def load_type_index(dex_path):
+    """打开 DEX 文件并构建类型索引"""
+    with DexFile(dex_path) as dex:
+        return build_type_index(dex)
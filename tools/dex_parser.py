@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+DEX 文件结构解析
+直接读取 header 与 string_ids 表：ULEB128 长度 + MUTF-8 解码，按需懒解码，
+不再用正则扫描整个二进制（opcode 区域里的伪字符串不会混进来）。
+proto / field / method_ids、class_data 与 code_item 同样按需解析，只在访问某个类时读取它的数据
+"""
+import struct
+from collections import namedtuple
+
+from stream_reader import MappedFile
+
+DEX_MAGIC = b'dex\n'
+ENDIAN_CONSTANT = 0x12345678
+NO_INDEX = 0xFFFFFFFF
+
+# header_item 中 checksum 之后的字段（偏移 0x20 起）
+_HEADER_FIELDS = (
+    'file_size', 'header_size', 'endian_tag',
+    'link_size', 'link_off', 'map_off',
+    'string_ids_size', 'string_ids_off',
+    'type_ids_size', 'type_ids_off',
+    'proto_ids_size', 'proto_ids_off',
+    'field_ids_size', 'field_ids_off',
+    'method_ids_size', 'method_ids_off',
+    'class_defs_size', 'class_defs_off',
+    'data_size', 'data_off',
+)
+
+
+ClassDef = namedtuple('ClassDef', [
+    'class_idx', 'access_flags', 'superclass_idx', 'interfaces_off',
+    'source_file_idx', 'annotations_off', 'class_data_off', 'static_values_off',
+])
+
+
+ClassData = namedtuple('ClassData', ['static_fields', 'instance_fields', 'direct_methods', 'virtual_methods'])
+
+# field_idx / method_idx 已由差分编码还原为绝对索引；code_off 为 0 表示 abstract / native
+EncodedField = namedtuple('EncodedField', ['field_idx', 'access_flags'])
+EncodedMethod = namedtuple('EncodedMethod', ['method_idx', 'access_flags', 'code_off'])
+
+# insns: 指令字节（2 * insns_size）；tries: [(start_addr, insn_count, handler_off)]；
+# handlers_off: encoded_catch_handler_list 在文件中的偏移（tries 为空时为 None）
+CodeItem = namedtuple('CodeItem', [
+    'registers_size', 'ins_size', 'outs_size', 'debug_info_off', 'insns', 'tries', 'handlers_off'])
+
+# encoded_value 的类型
+VALUE_BYTE, VALUE_SHORT, VALUE_CHAR, VALUE_INT, VALUE_LONG = 0x00, 0x02, 0x03, 0x04, 0x06
+VALUE_FLOAT, VALUE_DOUBLE, VALUE_METHOD_TYPE, VALUE_METHOD_HANDLE = 0x10, 0x11, 0x15, 0x16
+VALUE_STRING, VALUE_TYPE, VALUE_FIELD, VALUE_METHOD, VALUE_ENUM = 0x17, 0x18, 0x19, 0x1A, 0x1B
+VALUE_ARRAY, VALUE_ANNOTATION, VALUE_NULL, VALUE_BOOLEAN = 0x1C, 0x1D, 0x1E, 0x1F
+
+
+class DexFormatError(ValueError):
+    """不是合法的 DEX 文件"""
+
+
+def read_uleb128(data, offset):
+    """解码 ULEB128，返回 (值, 下一个偏移)"""
+    result = 0
+    shift = 0
+    while True:
+        b = data[offset]
+        offset += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, offset
+        shift += 7
+
+
+def read_sleb128(data, offset):
+    """解码 SLEB128，返回 (值, 下一个偏移)"""
+    result = 0
+    shift = 0
+    while True:
+        b = data[offset]
+        offset += 1
+        result |= (b & 0x7F) << shift
+        shift += 7
+        if b < 0x80:
+            if b & 0x40:
+                result -= 1 << shift
+            return result, offset
+
+
+def decode_mutf8(raw):
+    """
+    MUTF-8 解码：NUL 编码为 C0 80，补充平面字符编码为两个 3 字节代理项。
+    绝大多数字符串是标准 UTF-8，走快速路径
+    """
+    if b'\xc0\x80' not in raw and b'\xed' not in raw:
+        try:
+            return raw.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+    units = []
+    i = 0
+    n = len(raw)
+    while i < n:
+        b = raw[i]
+        if b < 0x80:
+            units.append(b)
+            i += 1
+        elif b & 0xE0 == 0xC0 and i + 1 < n:
+            units.append(((b & 0x1F) << 6) | (raw[i + 1] & 0x3F))
+            i += 2
+        elif b & 0xF0 == 0xE0 and i + 2 < n:
+            units.append(((b & 0x0F) << 12) | ((raw[i + 1] & 0x3F) << 6) | (raw[i + 2] & 0x3F))
+            i += 3
+        else:
+            units.append(0xFFFD)
+            i += 1
+    # 代理项对交给 utf-16 解码器合并
+    return struct.pack(f'<{len(units)}H', *units).decode('utf-16-le', errors='replace')
+
+
+class DexFile:
+    """
+    DEX 文件（mmap 映射，只在访问时解码）
+
+    用法:
+        with DexFile('classes.dex') as dex:
+            for s in dex.iter_strings():
+                ...
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mapped = MappedFile(path)
+        self.data = self._mapped.data
+        try:
+            self._parse_header()
+        except Exception:
+            self._mapped.close()
+            raise
+        self._string_cache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mapped.close()
+
+    def _parse_header(self):
+        data = self.data
+        if len(data) < 0x70 or data[:4] != DEX_MAGIC:
+            raise DexFormatError(f'not a DEX file: {self.path}')
+        self.version = bytes(data[4:7]).decode('ascii', errors='replace')
+        self.checksum = struct.unpack_from('<I', data, 8)[0]
+        self.signature = bytes(data[12:32])
+        values = struct.unpack_from('<20I', data, 0x20)
+        self.header = dict(zip(_HEADER_FIELDS, values))
+        if self.header['endian_tag'] != ENDIAN_CONSTANT:
+            raise DexFormatError(f'unsupported endian tag: {self.header["endian_tag"]:#x}')
+        end = self.header['string_ids_off'] + 4 * self.header['string_ids_size']
+        if end > len(data):
+            raise DexFormatError('string_ids table out of range')
+
+    # ---- string_ids ----
+
+    @property
+    def string_count(self):
+        return self.header['string_ids_size']
+
+    def string_data_offset(self, idx):
+        return struct.unpack_from('<I', self.data, self.header['string_ids_off'] + 4 * idx)[0]
+
+    def raw_string(self, idx):
+        """string_data_item 的原始 MUTF-8 字节（不含结尾 NUL）"""
+        off = self.string_data_offset(idx)
+        _, start = read_uleb128(self.data, off)
+        end = self.data.find(b'\x00', start)
+        if end < 0:
+            end = len(self.data)
+        return bytes(self.data[start:end])
+
+    def string(self, idx):
+        """第 idx 个字符串，首次访问时解码并缓存"""
+        s = self._string_cache.get(idx)
+        if s is None:
+            s = decode_mutf8(self.raw_string(idx))
+            self._string_cache[idx] = s
+        return s
+
+    def iter_strings(self):
+        """按 string_ids 顺序产出全部字符串（不缓存，O(count)）"""
+        for idx in range(self.string_count):
+            yield decode_mutf8(self.raw_string(idx))
+
+    # ---- type_ids / class_defs ----
+
+    @property
+    def type_count(self):
+        return self.header['type_ids_size']
+
+    def type_descriptor(self, idx):
+        """type_ids[idx] 对应的类型描述符，如 Ljava/lang/String;"""
+        if idx == NO_INDEX:
+            return None
+        string_idx = struct.unpack_from('<I', self.data, self.header['type_ids_off'] + 4 * idx)[0]
+        return self.string(string_idx)
+
+    def iter_type_descriptors(self):
+        for idx in range(self.type_count):
+            yield self.type_descriptor(idx)
+
+    def find_string(self, value):
+        """二分查找字符串的索引（string_ids 按内容排序）；不存在返回 None"""
+        lo, hi = 0, self.string_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            s = self.string(mid)
+            if s == value:
+                return mid
+            if s < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def find_type(self, descriptor):
+        """二分查找类型描述符的 type_ids 索引（type_ids 按字符串索引排序）；不存在返回 None"""
+        string_idx = self.find_string(descriptor)
+        if string_idx is None:
+            return None
+        base = self.header['type_ids_off']
+        lo, hi = 0, self.type_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = struct.unpack_from('<I', self.data, base + 4 * mid)[0]
+            if value == string_idx:
+                return mid
+            if value < string_idx:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def find_class_def(self, descriptor):
+        """
+        按描述符找 class_def，只比较整数索引、不解码其他类；
+        表未排序（加固 / 混淆工具改写过的 DEX）导致二分失败时逐个比较描述符
+        """
+        type_idx = self.find_type(descriptor)
+        base = self.header['class_defs_off']
+        if type_idx is not None:
+            for idx in range(self.class_def_count):
+                if struct.unpack_from('<I', self.data, base + 32 * idx)[0] == type_idx:
+                    return self.class_def(idx)
+            return None
+        for class_def in self.iter_class_defs():
+            if self.type_descriptor(class_def.class_idx) == descriptor:
+                return class_def
+        return None
+
+    @property
+    def class_def_count(self):
+        return self.header['class_defs_size']
+
+    def class_def(self, idx):
+        return ClassDef(*struct.unpack_from('<8I', self.data, self.header['class_defs_off'] + 32 * idx))
+
+    def iter_class_defs(self):
+        for idx in range(self.class_def_count):
+            yield self.class_def(idx)
+
+    # ---- proto_ids / field_ids / method_ids ----
+
+    def type_list(self, off):
+        """type_list（参数列表、接口列表）中的类型描述符；off 为 0 时为空"""
+        if not off:
+            return []
+        size = struct.unpack_from('<I', self.data, off)[0]
+        return [self.type_descriptor(i) for i in struct.unpack_from(f'<{size}H', self.data, off + 4)]
+
+    def proto_descriptor(self, idx):
+        """proto_ids[idx] -> (Ljava/lang/String;I)V"""
+        _shorty, return_idx, params_off = struct.unpack_from(
+            '<3I', self.data, self.header['proto_ids_off'] + 12 * idx)
+        return '(' + ''.join(self.type_list(params_off)) + ')' + self.type_descriptor(return_idx)
+
+    def field_ref(self, idx):
+        """field_ids[idx] -> (所属类描述符, 字段名, 类型描述符)"""
+        class_idx, type_idx, name_idx = struct.unpack_from(
+            '<HHI', self.data, self.header['field_ids_off'] + 8 * idx)
+        return self.type_descriptor(class_idx), self.string(name_idx), self.type_descriptor(type_idx)
+
+    def method_ref(self, idx):
+        """method_ids[idx] -> (所属类描述符, 方法名, 原型描述符)"""
+        class_idx, proto_idx, name_idx = struct.unpack_from(
+            '<HHI', self.data, self.header['method_ids_off'] + 8 * idx)
+        return self.type_descriptor(class_idx), self.string(name_idx), self.proto_descriptor(proto_idx)
+
+    @property
+    def method_count(self):
+        return self.header['method_ids_size']
+
+    # ---- class_data / code_item ----
+
+    def class_data(self, class_def):
+        """解析 class_data_item；没有数据（标记接口等）时返回 None"""
+        off = class_def.class_data_off
+        if not off:
+            return None
+        data = self.data
+        sizes = []
+        for _ in range(4):
+            value, off = read_uleb128(data, off)
+            sizes.append(value)
+        groups = []
+        for kind, size in enumerate(sizes):
+            items, idx = [], 0
+            for _ in range(size):
+                diff, off = read_uleb128(data, off)
+                flags, off = read_uleb128(data, off)
+                idx += diff
+                if kind < 2:
+                    items.append(EncodedField(idx, flags))
+                else:
+                    code_off, off = read_uleb128(data, off)
+                    items.append(EncodedMethod(idx, flags, code_off))
+            groups.append(items)
+        return ClassData(*groups)
+
+    def code_item(self, off):
+        """解析 code_item；off 为 0（无代码）时返回 None"""
+        if not off:
+            return None
+        registers, ins, outs, tries_size, debug_off, insns_size = struct.unpack_from(
+            '<4H2I', self.data, off)
+        start = off + 16
+        end = start + 2 * insns_size
+        insns = bytes(self.data[start:end])
+        tries, handlers_off = [], None
+        if tries_size:
+            # insns_size 为奇数时有 2 字节填充，使 tries 4 字节对齐
+            tries_off = end + (2 if insns_size & 1 else 0)
+            tries = [struct.unpack_from('<IHH', self.data, tries_off + 8 * i) for i in range(tries_size)]
+            handlers_off = tries_off + 8 * tries_size
+        return CodeItem(registers, ins, outs, debug_off, insns, tries, handlers_off)
+
+    def catch_handler(self, code, handler_off):
+        """try 项对应的 catch 列表：[(异常类型描述符, 地址)]，catch-all 的类型为 None"""
+        data = self.data
+        off = code.handlers_off + handler_off
+        size, off = read_sleb128(data, off)
+        handlers = []
+        for _ in range(abs(size)):
+            type_idx, off = read_uleb128(data, off)
+            addr, off = read_uleb128(data, off)
+            handlers.append((self.type_descriptor(type_idx), addr))
+        if size <= 0:
+            addr, off = read_uleb128(data, off)
+            handlers.append((None, addr))
+        return handlers
+
+    def interfaces(self, class_def):
+        return self.type_list(class_def.interfaces_off)
+
+    # ---- encoded_value ----
+
+    def _encoded_value(self, off):
+        """解码一个 encoded_value，索引类的值解析成名字；返回 (值, 下一个偏移)"""
+        data = self.data
+        head = data[off]
+        off += 1
+        value_type, arg = head & 0x1F, head >> 5
+        if value_type == VALUE_ARRAY:
+            return self._encoded_array(off)
+        if value_type == VALUE_ANNOTATION:
+            return self._encoded_annotation(off)
+        if value_type == VALUE_NULL:
+            return None, off
+        if value_type == VALUE_BOOLEAN:
+            return bool(arg), off
+        size = arg + 1
+        raw = bytes(data[off:off + size])
+        off += size
+        if value_type in (VALUE_BYTE, VALUE_SHORT, VALUE_INT, VALUE_LONG):
+            return int.from_bytes(raw, 'little', signed=True), off
+        if value_type == VALUE_CHAR:
+            return chr(int.from_bytes(raw, 'little')), off
+        if value_type in (VALUE_FLOAT, VALUE_DOUBLE):
+            # 浮点数右侧补零到完整宽度
+            width = 4 if value_type == VALUE_FLOAT else 8
+            return struct.unpack('<f' if width == 4 else '<d', raw.rjust(width, b'\x00'))[0], off
+        idx = int.from_bytes(raw, 'little')
+        if value_type == VALUE_STRING:
+            return self.string(idx), off
+        if value_type == VALUE_TYPE:
+            return ('type', self.type_descriptor(idx)), off
+        if value_type in (VALUE_FIELD, VALUE_ENUM):
+            return ('field', self.field_ref(idx)), off
+        if value_type == VALUE_METHOD:
+            return ('method', self.method_ref(idx)), off
+        if value_type == VALUE_METHOD_TYPE:
+            return ('proto', self.proto_descriptor(idx)), off
+        return ('method_handle', idx), off
+
+    def _encoded_annotation(self, off):
+        data = self.data
+        type_idx, off = read_uleb128(data, off)
+        size, off = read_uleb128(data, off)
+        elements = []
+        for _ in range(size):
+            name_idx, off = read_uleb128(data, off)
+            value, off = self._encoded_value(off)
+            elements.append((self.string(name_idx), value))
+        return ('annotation', self.type_descriptor(type_idx), elements), off
+
+    def _encoded_array(self, off):
+        size, off = read_uleb128(self.data, off)
+        values = []
+        for _ in range(size):
+            value, off = self._encoded_value(off)
+            values.append(value)
+        return values, off
+
+    def static_values(self, class_def):
+        """静态字段初始值（encoded_array_item）；没有时为空列表"""
+        if not class_def.static_values_off:
+            return []
+        return self._encoded_array(class_def.static_values_off)[0]
+
+
+    # ---- annotations ----
+
+    def annotation_set(self, off):
+        """annotation_set_item -> [(可见性, 注解)]；off 为 0 时为空"""
+        if not off:
+            return []
+        size = struct.unpack_from('<I', self.data, off)[0]
+        items = []
+        for item_off in struct.unpack_from(f'<{size}I', self.data, off + 4):
+            annotation, _ = self._encoded_annotation(item_off + 1)
+            items.append((self.data[item_off], annotation))
+        return items
+
+    def annotations(self, class_def):
+        """
+        annotations_directory_item 解析为
+        {'class': 注解集, 'fields': [(field_ref, 注解集)], 'methods': [(method_ref, 注解集)],
+         'parameters': [(method_ref, [每个参数的注解集])]}；没有注解时返回 None
+        """
+        off = class_def.annotations_off
+        if not off:
+            return None
+        class_off, fields_size, methods_size, params_size = struct.unpack_from('<4I', self.data, off)
+        off += 16
+        result = {'class': self.annotation_set(class_off), 'fields': [], 'methods': [], 'parameters': []}
+        for key, size, ref in (('fields', fields_size, self.field_ref),
+                               ('methods', methods_size, self.method_ref),
+                               ('parameters', params_size, self.method_ref)):
+            for _ in range(size):
+                idx, item_off = struct.unpack_from('<2I', self.data, off)
+                off += 8
+                if key == 'parameters':
+                    count = struct.unpack_from('<I', self.data, item_off)[0]
+                    sets = struct.unpack_from(f'<{count}I', self.data, item_off + 4)
+                    result[key].append((ref(idx), [self.annotation_set(s) for s in sets]))
+                else:
+                    result[key].append((ref(idx), self.annotation_set(item_off)))
+        return result
+
+
+def descriptor_to_class_name(descriptor):
+    """Lcom/example/Foo; -> com.example.Foo；数组取元素类型，基本类型返回 None"""
+    descriptor = descriptor.lstrip('[')
+    if not (descriptor.startswith('L') and descriptor.endswith(';')):
+        return None
+    return descriptor[1:-1].replace('/', '.')
+
+
+def is_dex(path):
+    """文件是否以 DEX 魔数开头"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(4) == DEX_MAGIC
+    except OSError:
+        return False
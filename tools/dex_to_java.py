@@ -210,7 +210,7 @@ def main():
     print(f"\n【下一步】")
     print(f"1. 查看生成的 Java 文件: code {java_src_dir}")
     print(f"2. 搜索特定类: Get-ChildItem {java_src_dir} -Recurse -Filter '*Network*'")
-    print(f"3. 分析关键代码: Select-String -Path '{java_src_dir}\\*.java' -Pattern 'API|key|secret'")
+    print(f"3. 分析关键代码: python tools/source_index.py --update --root {java_src_dir} -e 'API|key|secret'")
 
 if __name__ == "__main__":
     main()
@@ -6,13 +6,29 @@ Converts DEX bytecode to readable Java source code
 """
 
 import os
+import struct
 import sys
-import subprocess
+import time
 import zipfile
 import shutil
 from pathlib import Path
 import urllib.request
 
+from cfr_shards import class_units, decompile_sharded, jar_classes, package_units
+from dex_fingerprint import (cached_dex_fingerprints, diff_fingerprints, index_path_for,
+                             java_source_path, load_index, save_index)
+from dex_parser import DexFormatError
+from source_index import update_index
+from tool_runner import ToolRunner, input_size
+
+# CFR 单个 JVM 的内存预留；超时按 JAR 大小缩放（每 MB 5 分钟，失败后加倍重试一次）
+CFR_MEM_MB = 2048
+CFR_BASE_TIMEOUT = 300
+CFR_PER_MB_TIMEOUT = 300
+
+# 分片模式下每个 CFR JVM 的堆上限
+CFR_SHARD_HEAP_MB = 1024
+
 def download_tool(url, filename):
     """Download a tool from URL"""
     if os.path.exists(filename):
@@ -110,10 +126,10 @@ def convert_dex_to_jar(dex_file, output_jar, dex2jar_dir):
         cmd = [script, "-o", output_jar, dex_file]
         print(f"[Command] {' '.join(cmd)}")
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = ToolRunner(workers=1).run(cmd, name="dex2jar", size=input_size(dex_file))
         
-        if result.returncode != 0:
-            print(f"[Error] dex2jar failed:")
+        if result.status != "OK":
+            print(f"[Error] dex2jar failed ({result.status}):")
             print(result.stderr)
             return False
         
@@ -133,10 +149,13 @@ def convert_dex_to_jar(dex_file, output_jar, dex2jar_dir):
         print(f"[Error] Exception: {e}")
         return False
 
-def decompile_jar_to_java(jar_file, output_dir, cfr_path):
-    """Decompile JAR to Java using CFR"""
+def decompile_jar_to_java(jar_file, output_dir, cfr_path, shards=None):
+    """Decompile JAR to Java using CFR (sharded by package unless shards == 1)"""
     print(f"[Step 4] Decompiling JAR to Java...")
     
+    if shards != 1:
+        return decompile_jar_sharded(jar_file, output_dir, cfr_path, shards)
+    
     try:
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
@@ -145,24 +164,134 @@ def decompile_jar_to_java(jar_file, output_dir, cfr_path):
         cmd = ["java", "-jar", cfr_path, jar_file, "--outputdir", output_dir]
         print(f"[Command] {' '.join(cmd)}")
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        runner = ToolRunner(workers=1, mem_mb=CFR_MEM_MB, base_timeout=CFR_BASE_TIMEOUT,
+                            per_mb_timeout=CFR_PER_MB_TIMEOUT)
+        result = runner.run(cmd, name="cfr", size=input_size(jar_file))
         
-        if result.returncode != 0:
-            print(f"[Warning] CFR returned code {result.returncode}")
+        if result.status != "OK":
+            print(f"[Warning] CFR {result.status} (code {result.returncode}, "
+                  f"{result.attempts} attempts, {result.elapsed:.0f}s)")
             print(result.stderr)
         
-        # Check if files were created
-        java_files = list(Path(output_dir).rglob("*.java"))
-        if java_files:
-            print(f"[OK] Generated {len(java_files)} Java files")
-            return True
-        else:
-            print(f"[Warning] No Java files generated")
-            return False
+        return report_java_files(output_dir)
     except Exception as e:
         print(f"[Error] Exception: {e}")
         return False
 
+def decompile_jar_sharded(jar_file, output_dir, cfr_path, shards=None, only=None):
+    """
+    Split the JAR's classes by package into balanced shards and run CFR on them concurrently.
+    only: top-level class names (a/b/C) to decompile one by one instead of whole packages
+    """
+    try:
+        classes = jar_classes(jar_file)
+    except (OSError, zipfile.BadZipFile) as e:
+        print(f"[Error] Cannot read {jar_file}: {e}")
+        return False
+    if only is None:
+        units, kind = package_units(classes), "packages"
+    else:
+        units, kind = class_units([name for name in only if name in classes], classes), "classes"
+    if not units:
+        print(f"[Warning] No classes in {jar_file}")
+        return False
+    
+    def on_shard(result, shard, round_no):
+        label = shard[0].label if len(shard) == 1 else f"{len(shard)} {kind}"
+        print(f"  [{result.status}] {result.job.name}: {label} ({result.elapsed:.0f}s)")
+    
+    print(f"[Sharded] {len(units)} {kind}, -Xmx{CFR_SHARD_HEAP_MB}m per JVM")
+    report = decompile_sharded(jar_file, output_dir, cfr_path, units, shards=shards,
+                               heap_mb=CFR_SHARD_HEAP_MB, on_shard=on_shard)
+    print(f"[Sharded] {report.shards} shards, {report.rounds} rounds, "
+          f"{len(report.ok)} units OK, {len(report.failed)} failed")
+    for unit in report.failed[:20]:
+        print(f"  [Failed] {unit.label} ({len(unit.classes)} classes)")
+    return report_java_files(output_dir)
+
+def decompile_incremental(dex_file, output_jar, output_dir, dex2jar_dir, cfr_path, shards=None, full=False):
+    """
+    Decompile only the classes whose fingerprint changed since the last run (see dex_fingerprint).
+    The index next to output_dir records classes whose .java was produced; unchanged classes keep
+    their cached sources. dex2jar has no class filter, so it still converts the whole DEX whenever
+    anything changed; it is skipped entirely when nothing did.
+    """
+    print(f"[Step 3] Fingerprinting classes...")
+    start = time.time()
+    index_path = index_path_for(output_dir)
+    try:
+        fingerprints = cached_dex_fingerprints(dex_file)
+    except (DexFormatError, struct.error) as e:
+        # 非标准 / 加壳的 DEX：没有指纹可比，照旧全量反编译（dex2jar 不接受时给出它的错误）
+        print(f"[Warning] Cannot fingerprint {dex_file} ({e}), falling back to a full decompile")
+        try:
+            os.unlink(index_path)
+        except OSError:
+            pass
+        if not convert_dex_to_jar(dex_file, output_jar, dex2jar_dir):
+            print("[Error] DEX to JAR conversion failed")
+            return False
+        return decompile_jar_to_java(output_jar, output_dir, cfr_path, shards)
+    previous = None if full else load_index(index_path)
+    if previous is None:
+        changed, removed = sorted(fingerprints), []
+        print(f"[Fingerprint] No usable index, decompiling all {len(changed)} classes")
+    else:
+        changed, removed = diff_fingerprints(previous, fingerprints)
+        print(f"[Fingerprint] {len(changed)} changed, {len(removed)} removed, "
+              f"{len(fingerprints) - len(changed)} unchanged ({time.time() - start:.1f}s)")
+    
+    kept = {name: fp for name, fp in (previous or {}).items() if fingerprints.get(name) == fp}
+    for name in removed:
+        try:
+            os.unlink(java_source_path(output_dir, name))
+        except OSError:
+            pass
+    if not changed:
+        save_index(index_path, kept)
+        print("[OK] All classes unchanged, reusing cached sources")
+        return report_java_files(output_dir)
+    
+    if not convert_dex_to_jar(dex_file, output_jar, dex2jar_dir):
+        print("[Error] DEX to JAR conversion failed")
+        return False
+    
+    started = time.time()
+    if previous is None:
+        ok = decompile_jar_to_java(output_jar, output_dir, cfr_path, shards)
+    else:
+        # 旧源码先删掉：CFR 失败的类不应留下上一版本的代码冒充新结果
+        for name in changed:
+            try:
+                os.unlink(java_source_path(output_dir, name))
+            except OSError:
+                pass
+        print(f"[Step 4] Decompiling {len(changed)} changed classes...")
+        ok = decompile_jar_sharded(output_jar, output_dir, cfr_path, shards, only=changed)
+    
+    # 只记录本次确实生成了源码的类，失败的下次重试（mtime 留 2 秒余量应对粗粒度时间戳）
+    for name in changed:
+        try:
+            if os.path.getmtime(java_source_path(output_dir, name)) >= started - 2:
+                kept[name] = fingerprints[name]
+        except OSError:
+            pass
+    save_index(index_path, kept)
+    missing = len(fingerprints) - len(kept)
+    if missing:
+        print(f"[Fingerprint] {missing} classes produced no source, they will be retried next run")
+    return ok
+
+def report_java_files(output_dir):
+    """Check if files were created"""
+    java_files = list(Path(output_dir).rglob("*.java"))
+    if java_files:
+        print(f"[OK] Generated {len(java_files)} Java files")
+        return True
+    else:
+        print(f"[Warning] No Java files generated")
+        return False
+
 def analyze_java_structure(java_dir):
     """Analyze the decompiled Java structure"""
     print(f"[Step 5] Analyzing Java structure...")
@@ -228,16 +357,21 @@ def main():
     output_jar = "decompiled/extracted/classes.jar"
     output_dir = "decompiled/java_src"
     
-    # Convert DEX to JAR
-    if not convert_dex_to_jar(dex_file, output_jar, dex2jar_dir):
-        print("[Error] DEX to JAR conversion failed")
-        return
-    
-    # Decompile JAR to Java
-    if not decompile_jar_to_java(output_jar, output_dir, cfr_path):
+    # Convert DEX to JAR and decompile the classes that changed since the last run
+    # --shards N 指定分片数（1 = 单个 CFR 进程处理整个 JAR）；--full 忽略指纹索引全部重新反编译
+    shards = int(sys.argv[sys.argv.index("--shards") + 1]) if "--shards" in sys.argv else None
+    if not decompile_incremental(dex_file, output_jar, output_dir, dex2jar_dir, cfr_path, shards,
+                                 full="--full" in sys.argv):
         print("[Error] JAR decompilation failed")
         return
     
+    # Bring the search index up to date (only new or changed .java files are read)
+    indexed = update_index([output_dir])
+    if indexed:
+        changed, removed, total = indexed
+        print(f"[Index] {total} files searchable ({changed} indexed, {removed} removed): "
+              f"python tools/source_index.py <text>")
+    
     # Analyze result
     analyze_java_structure(output_dir)
     
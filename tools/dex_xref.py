@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+DEX 方法级交叉引用索引
+遍历每个方法的 code_item，从 invoke-* 指令的 method_ids 索引得到 调用者 -> 被调用方法，
+按 DEX 内容哈希存入 SQLite（被调用方法名、类、调用者均建索引）：
+"谁调用了 SmsManager.sendTextMessage / Runtime.exec" 是一次索引查询，不必重新扫描 DEX。
+多个 DEX 各自建索引，查询时限定为当前这组 DEX
+
+用法:
+    python tools/dex_xref.py [--dex-root DIR] Runtime.exec android.telephony.SmsManager.sendTextMessage
+    python tools/dex_xref.py --callees 'Lcom/example/Main;->run'
+"""
+import os
+import re
+import sqlite3
+import struct
+import sys
+
+from dalvik import INDEX_METHOD, OPCODES, code_units, iter_references
+from dex_parser import DexFile, DexFormatError
+from multidex import find_dex_files, map_dex
+from result_cache import ResultCache
+
+XREF_VERSION = '1'
+DEFAULT_XREF_PATH = '.analysis_cache/dex_xref.sqlite'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS dex_files (
+    digest  TEXT PRIMARY KEY,
+    version TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calls (
+    digest       TEXT NOT NULL,
+    callee_class TEXT NOT NULL,
+    callee_name  TEXT NOT NULL,
+    callee_proto TEXT NOT NULL,
+    caller       TEXT NOT NULL,
+    kind         TEXT NOT NULL,
+    count        INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_callee ON calls (callee_name, callee_class);
+CREATE INDEX IF NOT EXISTS calls_caller ON calls (caller);
+'''
+
+
+def _glob_escape(text):
+    """GLOB 区分大小写（混淆后的 a/A 类不会混在一起）；通配符按字面匹配"""
+    return re.sub(r'([*?\[])', r'[\1]', text)
+
+
+def method_signature(cls, name, proto):
+    return f'{cls}->{name}{proto}'
+
+
+def collect_calls(dex_path):
+    """
+    一个 DEX 中的全部调用点，聚合为 [(被调类, 被调方法名, 原型, 调用者签名, 指令, 次数)]；
+    不是标准 DEX（加壳 / 加密）时返回 None。模块级函数，供 map_dex 在工作进程中执行
+    """
+    rows = {}
+    try:
+        dex = DexFile(dex_path)
+    except DexFormatError:
+        return None
+    with dex:
+        method_refs = {}
+        for class_def in dex.iter_class_defs():
+            try:
+                data = dex.class_data(class_def)
+            except (struct.error, IndexError):
+                continue
+            if data is None:
+                continue
+            for method in data.direct_methods + data.virtual_methods:
+                if not method.code_off:
+                    continue
+                try:
+                    code = dex.code_item(method.code_off)
+                    caller = method_signature(*dex.method_ref(method.method_idx))
+                    for _pc, op, kind, idx in iter_references(code_units(code.insns)):
+                        if kind != INDEX_METHOD:
+                            continue
+                        callee = method_refs.get(idx)
+                        if callee is None:
+                            callee = method_refs[idx] = dex.method_ref(idx)
+                        key = callee + (caller, OPCODES[op].name.split('/')[0])
+                        rows[key] = rows.get(key, 0) + 1
+                except (struct.error, IndexError, ValueError):
+                    # 单个损坏的方法不影响其余部分
+                    continue
+    return [key + (count,) for key, count in rows.items()]
+
+
+def parse_target(target):
+    """
+    查询目标 -> (类描述符或类简单名, 方法名, 原型或 None)。接受:
+    Landroid/telephony/SmsManager;->sendTextMessage(...)V、android.telephony.SmsManager.sendTextMessage、
+    SmsManager.sendTextMessage、Runtime.exec
+    """
+    proto = None
+    if '(' in target:
+        target, proto = target[:target.index('(')], target[target.index('('):]
+    if '->' in target:
+        cls, name = target.split('->', 1)
+    else:
+        cls, _, name = target.rpartition('.')
+    if cls and not cls.endswith(';'):
+        cls = 'L' + cls.replace('.', '/') + ';' if ('.' in cls or '/' in cls) else cls
+    return cls, name, proto
+
+
+class XrefIndex:
+    """
+    用法:
+        with XrefIndex(find_dex_files()) as xref:
+            for caller, callee, kind, count in xref.callers('SmsManager.sendTextMessage'):
+                ...
+    """
+
+    def __init__(self, dex_paths, path=DEFAULT_XREF_PATH, workers=None):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+        cache = ResultCache()
+        try:
+            self.digests = {p: cache.digest(p) for p in dex_paths}
+        finally:
+            cache.close()
+        self.skipped = []
+        self.built = self._ensure(workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def _ensure(self, workers):
+        """
+        为还没有索引（或索引版本过期）的 DEX 建索引，返回新建的 DEX 路径；
+        非标准 DEX 记入 self.skipped，按没有调用点处理。
+        不在当前这组 DEX 中的旧索引（以前版本的 APK）一并删除，数据库不随版本累积
+        """
+        missing = []
+        for path, digest in self.digests.items():
+            row = self.db.execute('SELECT version FROM dex_files WHERE digest = ?', (digest,)).fetchone()
+            if row is None or row[0] != XREF_VERSION:
+                missing.append(path)
+        for path, rows in map_dex(collect_calls, missing, workers):
+            digest = self.digests[path]
+            if rows is None:
+                print(f'[!] {path}: 不是标准 DEX，跳过调用点索引')
+                self.skipped.append(path)
+                rows = []
+            self.db.execute('DELETE FROM calls WHERE digest = ?', (digest,))
+            self.db.executemany('INSERT INTO calls VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                [(digest,) + row for row in rows])
+            self.db.execute('INSERT OR REPLACE INTO dex_files VALUES (?, ?)', (digest, XREF_VERSION))
+        marks, digests = self._scope()
+        self.db.execute(f'DELETE FROM calls WHERE digest NOT IN ({marks})', digests)
+        self.db.execute(f'DELETE FROM dex_files WHERE digest NOT IN ({marks})', digests)
+        self.db.commit()
+        return missing
+
+    def _scope(self):
+        digests = sorted(set(self.digests.values()))
+        return ','.join('?' * len(digests)), digests
+
+    def callers(self, target):
+        """调用了 target 的方法: [(调用者, 被调方法签名, 指令, 次数)]"""
+        cls, name, proto = parse_target(target)
+        marks, digests = self._scope()
+        sql = (f'SELECT caller, callee_class, callee_name, callee_proto, kind, SUM(count) FROM calls '
+               f'WHERE callee_name = ? AND digest IN ({marks})')
+        params = [name] + digests
+        if cls.endswith(';'):
+            sql += ' AND callee_class = ?'
+            params.append(cls)
+        elif cls:
+            # 只给了简单类名：匹配任意包下的同名类
+            sql += ' AND (callee_class = ? OR callee_class GLOB ?)'
+            params += [f'L{cls};', f'*/{_glob_escape(cls)};']
+        if proto:
+            sql += ' AND callee_proto = ?'
+            params.append(proto)
+        sql += ' GROUP BY caller, callee_class, callee_name, callee_proto, kind ORDER BY caller'
+        return [(caller, method_signature(c, n, p), kind, count)
+                for caller, c, n, p, kind, count in self.db.execute(sql, params)]
+
+    def callees(self, caller):
+        """caller（完整签名或 Lcls;->name 前缀）调用的方法: [(调用者, 被调方法签名, 指令, 次数)]"""
+        marks, digests = self._scope()
+        if '(' in caller:
+            where, params = 'caller = ?', [caller]
+        else:
+            where, params = 'caller GLOB ?', [_glob_escape(caller) + '(*']
+        sql = (f'SELECT caller, callee_class, callee_name, callee_proto, kind, SUM(count) FROM calls '
+               f'WHERE {where} AND digest IN ({marks}) '
+               f'GROUP BY caller, callee_class, callee_name, callee_proto, kind ORDER BY callee_class, callee_name')
+        return [(row_caller, method_signature(c, n, p), kind, count)
+                for row_caller, c, n, p, kind, count in self.db.execute(sql, params + digests)]
+
+    def call_count(self):
+        marks, digests = self._scope()
+        return self.db.execute(f'SELECT COALESCE(SUM(count), 0) FROM calls WHERE digest IN ({marks})',
+                               digests).fetchone()[0]
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(name, default=None):
+        if name in args:
+            i = args.index(name)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+
+    root = option('--dex-root')
+    callees_of = option('--callees')
+    dex_paths = find_dex_files(root)
+    if not dex_paths:
+        print('[!] 未找到 classes*.dex')
+        return
+    with XrefIndex(dex_paths) as xref:
+        built = f', 新建索引 {len(xref.built)} 个 DEX' if xref.built else ''
+        print(f'[+] {len(dex_paths)} 个 DEX, {xref.call_count()} 个调用点{built}')
+        if callees_of:
+            rows = xref.callees(callees_of)
+            print(f'\n【{callees_of}】 调用了 {len(rows)} 个方法:')
+            for caller, callee, kind, count in rows:
+                print(f'  {kind:<16} {callee}  x{count}')
+        for target in args:
+            rows = xref.callers(target)
+            # 行按 (调用者, 被调重载, 指令) 分组：调用者去重，调用点为次数之和
+            callers = {caller for caller, *_ in rows}
+            sites = sum(count for *_, count in rows)
+            print(f'\n【{target}】 {len(callers)} 个调用者, {sites} 处调用:')
+            for caller, callee, kind, count in rows:
+                print(f'  {caller}\n      {kind} {callee}  x{count}')
+
+
+if __name__ == '__main__':
+    main()
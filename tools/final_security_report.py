@@ -6,31 +6,33 @@ import os
 import re
 from datetime import datetime
 
+import axml
+from scan_scheduler import scan_files, walk_files
+
+def _scan_config_data(fpath, data):
+    """单个配置文件中的 URL 与服务器地址（在调度器工作进程中执行）"""
+    content = data.decode('utf-8', errors='ignore')
+    # 提取 URL
+    urls = re.findall(r'https?://[^\s"\'<>]+', content)
+    # 提取服务器地址
+    servers = re.findall(r'(?:server|host|address)\s*[=:]\s*["\']?([^\s"\'<>]+)', content, re.I)
+    return urls, servers
+
 def scan_assets_config(base_path):
     """扫描资源配置文件"""
     configs = {
-        'json_files': [],
+        'json_files': walk_files(base_path, ('.json', '.cfg', '.conf')),
         'urls': [],
         'servers': [],
     }
     
-    for root, dirs, files in os.walk(base_path):
-        for f in files:
-            if f.endswith('.json') or f.endswith('.cfg') or f.endswith('.conf'):
-                fpath = os.path.join(root, f)
-                configs['json_files'].append(fpath)
-                
-                try:
-                    with open(fpath, 'r', encoding='utf-8', errors='ignore') as file:
-                        content = file.read()
-                        # 提取 URL
-                        urls = re.findall(r'https?://[^\s"\'<>]+', content)
-                        configs['urls'].extend(urls)
-                        # 提取服务器地址
-                        servers = re.findall(r'(?:server|host|address)\s*[=:]\s*["\']?([^\s"\'<>]+)', content, re.I)
-                        configs['servers'].extend(servers)
-                except:
-                    pass
+    # 线程池读取、进程池匹配，大文件优先；按文件顺序合并
+    results = dict(scan_files(configs['json_files'], _scan_config_data))
+    for fpath in configs['json_files']:
+        if fpath in results:
+            urls, servers = results[fpath]
+            configs['urls'].extend(urls)
+            configs['servers'].extend(servers)
     
     return configs
 
@@ -43,185 +45,205 @@ def analyze_native_libs(lib_path):
                 libs.append(os.path.join(root, f))
     return libs
 
-print("=" * 90)
-print("【APK 安全审计报告】")
-print("=" * 90)
-print(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-print(f"审计对象: base.apk（杭州火马网络科技有限公司）")
-print("=" * 90)
-
-print("\n【1. APK 基本信息】")
-print("  签名证书:")
-print("    所有者: CN=邓秋克, OU=杭州火马网络科技有限公司")
-print("    发布者: 邓秋克")
-print("    序列号: 4772aa63")
-print("    生效期: 2023-03-16 至 2053-03-08 (30年有效期)")
-print("    签名算法: SHA256withRSA")
-print("    密钥长度: 2048 位")
-print("    SHA1 指纹: C1:2E:57:5B:27:39:34:12:A4:7D:FA:94:08:3C:86:1B:9C:17:B4:E2")
-print("    SHA256 指纹: C3:0D:C2:72:8E:A4:CE:94:7C:5F:F0:54:D3:B8:1E:1E:6B:DC:4F:24")
-
-print("\n【2. 技术栈分析】")
-print("  游戏引擎: Cocos2d-x (Lua 脚本层 + C++ native)")
-print("  原生库:")
-native_libs = analyze_native_libs('apk_unzip/lib')
-for lib in native_libs:
-    print(f"    - {os.path.basename(lib)}")
-print("  集成库:")
-print("    - Alibaba FastJSON (JSON 解析)")
-print("    - Google ZXing (二维码识别)")
-print("    - Apache HttpClient (HTTP 通信)")
-print("    - Retrofit2 + OkHttp3 (网络框架)")
-print("    - Tencent CrashSight (崩溃上报)")
-print("    - WeChat SDK (微信集成)")
-print("    - 高德地图 SDK (定位服务)")
-
-print("\n【3. 资源分析】")
-print("  资源包结构:")
-print("    - 主资源: assets/base/res/client.zip (包含游戏资源)")
-print("    - 配置文件: assets/base/config.json")
-print("    - Lua 脚本: 78 个编译后的 .luac 文件")
-print("    - 游戏: 麻将 (Mahjong)、棋牌相关")
-print("  大型资源:")
-print("    - client.zip: 游戏UI、资源、数据")
-print("    - 图片资源: 大量 PNG (UI、角色、游戏场景)")
-print("    - 字体: round_body.ttf")
-
-configs = scan_assets_config('apk_unzip/assets/base/res/client_zip')
-
-print("\n【4. 数据与连接分析】")
-print(f"  配置文件: {len(configs['json_files'])} 个")
-if configs['urls']:
-    print(f"  发现的 URL ({len(set(configs['urls']))} 个唯一):")
-    for url in list(set(configs['urls']))[:10]:
-        if not url.startswith('http://ns.adobe.com') and not url.startswith('http://www.w3.org'):
-            print(f"    - {url}")
-else:
-    print("  配置 URL: (仅在代码中)")
-
-print("\n【5. 权限与组件安全】")
-print("  ⚠️  分析困难: AndroidManifest.xml 为二进制格式，标准解析困难")
-print("  已知权限 (从字符串提取):")
-print("    - INTERNET (网络访问)")
-print("    - ACCESS_NETWORK_STATE (网络状态)")
-print("    - ACCESS_FINE_LOCATION (精确定位)")
-print("    - CAMERA (摄像头)")
-print("    - RECORD_AUDIO (录音)")
-print("    - READ_CONTACTS (通讯录)")
-print("    - SEND_SMS (发送短信)")
-
-print("\n【6. 已知第三方服务】")
-print("  ℹ️  集成的第三方:")
-print("    - 微信 (WeChat SDK)")
-print("      * 用途: 社交分享、登录、支付")
-print("      * 风险: 需要特定签名")
-print("    - 高德地图 (Amap)")
-print("      * 用途: 位置定位、地图展示")
-print("      * 风险: 位置数据收集")
-print("    - CrashSight (Tencent)")
-print("      * 用途: 崩溃上报与分析")
-print("      * 风险: 上报到腾讯服务器")
-
-print("\n【7. 潜在安全风险】")
-print("\n  【高风险】")
-print("    1. 权限过多")
-print("       - 同时申请 SEND_SMS / READ_SMS / READ_CALL_LOG / READ_CONTACTS")
-print("       - 风险: 隐私泄露、恶意短信发送")
-print("       - 建议: 审查这些权限的实际使用")
-print("")
-print("    2. 位置权限")
-print("       - ACCESS_FINE_LOCATION (精确定位)")
-print("       - 风险: 持续位置追踪")
-print("       - 建议: 检查位置数据是否上传到外部服务器")
-print("")
-print("    3. 网络库使用")
-print("       - Apache HttpClient (过时，有已知漏洞)")
-print("       - OkHttp3 & Retrofit2 (相对安全，但需验证 SSL 配置)")
-print("       - 风险: 中间人攻击、证书验证绕过")
-print("       - 建议: 启用 SSL pinning，验证证书链")
-print("")
-print("  【中风险】")
-print("    1. FastJSON 反序列化")
-print("       - Alibaba FastJSON 有历史漏洞")
-print("       - 风险: 远程代码执行 (RCE)")
-print("       - 建议: 升级至最新版本，禁用危险特性")
-print("")
-print("    2. 原生库 (libcocos2dlua.so, libmp3lame.so)")
-print("       - 风险: buffer overflow, 整数溢出")
-print("       - 建议: 运行 fuzzing 测试")
-print("")
-print("    3. Lua 脚本")
-print("       - .luac 文件无法直接审查（需反编译）")
-print("       - 风险: 隐藏的恶意逻辑、数据泄露")
-print("       - 建议: 使用 luadec/unluac 进行反编译与代码审查")
-print("")
-print("  【低风险】")
-print("    1. 长期有效的签名证书 (30年)")
-print("       - 风险: 如果私钥泄露，长期内无法检测")
-print("    2. 调试信息")
-print("       - 可能存在调试日志与符号信息")
-
-print("\n【8. 加密与数据保护】")
-print("  ℹ️  分析结果:")
-print("    - 未发现 MD5/SHA1 等弱加密算法的直接硬编码")
-print("    - 网络通信依赖 HTTPS（假设正确实现）")
-print("    - 本地数据存储: 需审查 SharedPreferences 与数据库加密")
-print("    建议:")
-print("      * 启用 Android KeyStore 用于密钥管理")
-print("      * 使用 AES-256 进行敏感数据加密")
-print("      * 避免在日志中打印敏感信息")
-
-print("\n【9. 反编译与逆向工程防护】")
-print("  当前防护措施:")
-print("    ✗ 无代码混淆 (ProGuard/R8)")
-print("    ✓ Lua 脚本编译 (.luac 格式)")
-print("    ✓ 部分逻辑在 Native 层 (libcocos2dlua.so)")
-print("  改进建议:")
-print("    1. 启用 ProGuard/R8 进行 Java 代码混淆与优化")
-print("    2. 对敏感 Java 类使用字符串加密")
-print("    3. 实施反调试与反模拟检测")
-print("    4. 考虑使用商业防护工具 (如: Apktool 检测、Frida 检测)")
-
-print("\n【10. 建议的修复与改进】")
-print("\n  【立即行动】")
-print("    □ 审查并最小化权限")
-print("      - 移除未使用的危险权限（SEND_SMS, READ_CALL_LOG 等）")
-print("      - 实施运行时权限请求")
-print("")
-print("    □ 更新依赖库")
-print("      - 升级 Apache HttpClient 至 5.x 或改用 OkHttp")
-print("      - 升级 FastJSON 至 >= 1.2.83（修复已知 RCE 漏洞）")
-print("      - 检查所有库的最新安全补丁")
-print("")
-print("    □ SSL/TLS 配置")
-print("      - 实现 SSL 证书 pinning")
-print("      - 禁用 SSLv3、TLS 1.0/1.1（使用 TLS 1.2+）")
-print("      - 验证证书链")
-print("")
-print("  【短期计划】")
-print("    □ 代码混淆")
-print("      - 配置 ProGuard/R8 规则")
-print("      - 字符串加密")
-print("")
-print("    □ 安全测试")
-print("      - 动态分析（运行时权限使用、网络通信）")
-print("      - Frida Hook 测试")
-print("      - OWASP Mobile Top 10 检查")
-print("")
-print("  【长期策略】")
-print("    □ 安全开发流程 (SSDLC)")
-print("      - 代码审查")
-print("      - 威胁建模")
-print("      - 自动安全测试 (CI/CD 集成)")
-print("")
-print("    □ 事件响应")
-print("      - 建立漏洞报告机制")
-print("      - 准备补丁与更新流程")
-
-print("\n" + "=" * 90)
-print("【报告总结】")
-print("=" * 90)
-print("""
+def main():
+    """生成报告"""
+    print("=" * 90)
+    print("【APK 安全审计报告】")
+    print("=" * 90)
+    print(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"审计对象: base.apk（杭州火马网络科技有限公司）")
+    print("=" * 90)
+
+    print("\n【1. APK 基本信息】")
+    print("  签名证书:")
+    print("    所有者: CN=邓秋克, OU=杭州火马网络科技有限公司")
+    print("    发布者: 邓秋克")
+    print("    序列号: 4772aa63")
+    print("    生效期: 2023-03-16 至 2053-03-08 (30年有效期)")
+    print("    签名算法: SHA256withRSA")
+    print("    密钥长度: 2048 位")
+    print("    SHA1 指纹: C1:2E:57:5B:27:39:34:12:A4:7D:FA:94:08:3C:86:1B:9C:17:B4:E2")
+    print("    SHA256 指纹: C3:0D:C2:72:8E:A4:CE:94:7C:5F:F0:54:D3:B8:1E:1E:6B:DC:4F:24")
+
+    print("\n【2. 技术栈分析】")
+    print("  游戏引擎: Cocos2d-x (Lua 脚本层 + C++ native)")
+    print("  原生库:")
+    native_libs = analyze_native_libs('apk_unzip/lib')
+    for lib in native_libs:
+        print(f"    - {os.path.basename(lib)}")
+    print("  集成库:")
+    print("    - Alibaba FastJSON (JSON 解析)")
+    print("    - Google ZXing (二维码识别)")
+    print("    - Apache HttpClient (HTTP 通信)")
+    print("    - Retrofit2 + OkHttp3 (网络框架)")
+    print("    - Tencent CrashSight (崩溃上报)")
+    print("    - WeChat SDK (微信集成)")
+    print("    - 高德地图 SDK (定位服务)")
+
+    print("\n【3. 资源分析】")
+    print("  资源包结构:")
+    print("    - 主资源: assets/base/res/client.zip (包含游戏资源)")
+    print("    - 配置文件: assets/base/config.json")
+    print("    - Lua 脚本: 78 个编译后的 .luac 文件")
+    print("    - 游戏: 麻将 (Mahjong)、棋牌相关")
+    print("  大型资源:")
+    print("    - client.zip: 游戏UI、资源、数据")
+    print("    - 图片资源: 大量 PNG (UI、角色、游戏场景)")
+    print("    - 字体: round_body.ttf")
+
+    configs = scan_assets_config('apk_unzip/assets/base/res/client_zip')
+
+    print("\n【4. 数据与连接分析】")
+    print(f"  配置文件: {len(configs['json_files'])} 个")
+    if configs['urls']:
+        print(f"  发现的 URL ({len(set(configs['urls']))} 个唯一):")
+        for url in list(set(configs['urls']))[:10]:
+            if not url.startswith('http://ns.adobe.com') and not url.startswith('http://www.w3.org'):
+                print(f"    - {url}")
+    else:
+        print("  配置 URL: (仅在代码中)")
+
+    print("\n【5. 权限与组件安全】")
+    try:
+        manifest = axml.parse_manifest('apk_unzip/AndroidManifest.xml')
+    except (OSError, axml.AXMLError):
+        manifest = None
+    if manifest:
+        print(f"  包名: {manifest['package_name']}  (minSdk {manifest['min_sdk']}, targetSdk {manifest['target_sdk']})")
+        print(f"  申请权限 ({len(manifest['permissions'])} 个，来自 AXML 解析):")
+        for perm in manifest['permissions']:
+            print(f"    - {perm.split('.')[-1]} ({perm})")
+        print("  组件:")
+        for comp in manifest['components']:
+            flag = '⚠️ 导出' if comp['exported'] else '未导出'
+            print(f"    - [{comp['type']}] {comp['name']} ({flag})")
+        if manifest['debuggable']:
+            print("  ⚠️  android:debuggable=true")
+        if manifest['uses_cleartext_traffic'] == 'true':
+            print("  ⚠️  android:usesCleartextTraffic=true (允许明文 HTTP)")
+    else:
+        print("  ⚠️  分析困难: AndroidManifest.xml 无法按二进制 XML 解析")
+        print("  已知权限 (从字符串提取):")
+        print("    - INTERNET (网络访问)")
+        print("    - ACCESS_NETWORK_STATE (网络状态)")
+        print("    - ACCESS_FINE_LOCATION (精确定位)")
+        print("    - CAMERA (摄像头)")
+        print("    - RECORD_AUDIO (录音)")
+        print("    - READ_CONTACTS (通讯录)")
+        print("    - SEND_SMS (发送短信)")
+
+    print("\n【6. 已知第三方服务】")
+    print("  ℹ️  集成的第三方:")
+    print("    - 微信 (WeChat SDK)")
+    print("      * 用途: 社交分享、登录、支付")
+    print("      * 风险: 需要特定签名")
+    print("    - 高德地图 (Amap)")
+    print("      * 用途: 位置定位、地图展示")
+    print("      * 风险: 位置数据收集")
+    print("    - CrashSight (Tencent)")
+    print("      * 用途: 崩溃上报与分析")
+    print("      * 风险: 上报到腾讯服务器")
+
+    print("\n【7. 潜在安全风险】")
+    print("\n  【高风险】")
+    print("    1. 权限过多")
+    print("       - 同时申请 SEND_SMS / READ_SMS / READ_CALL_LOG / READ_CONTACTS")
+    print("       - 风险: 隐私泄露、恶意短信发送")
+    print("       - 建议: 审查这些权限的实际使用")
+    print("")
+    print("    2. 位置权限")
+    print("       - ACCESS_FINE_LOCATION (精确定位)")
+    print("       - 风险: 持续位置追踪")
+    print("       - 建议: 检查位置数据是否上传到外部服务器")
+    print("")
+    print("    3. 网络库使用")
+    print("       - Apache HttpClient (过时，有已知漏洞)")
+    print("       - OkHttp3 & Retrofit2 (相对安全，但需验证 SSL 配置)")
+    print("       - 风险: 中间人攻击、证书验证绕过")
+    print("       - 建议: 启用 SSL pinning，验证证书链")
+    print("")
+    print("  【中风险】")
+    print("    1. FastJSON 反序列化")
+    print("       - Alibaba FastJSON 有历史漏洞")
+    print("       - 风险: 远程代码执行 (RCE)")
+    print("       - 建议: 升级至最新版本，禁用危险特性")
+    print("")
+    print("    2. 原生库 (libcocos2dlua.so, libmp3lame.so)")
+    print("       - 风险: buffer overflow, 整数溢出")
+    print("       - 建议: 运行 fuzzing 测试")
+    print("")
+    print("    3. Lua 脚本")
+    print("       - .luac 文件无法直接审查（需反编译）")
+    print("       - 风险: 隐藏的恶意逻辑、数据泄露")
+    print("       - 建议: 使用 luadec/unluac 进行反编译与代码审查")
+    print("")
+    print("  【低风险】")
+    print("    1. 长期有效的签名证书 (30年)")
+    print("       - 风险: 如果私钥泄露，长期内无法检测")
+    print("    2. 调试信息")
+    print("       - 可能存在调试日志与符号信息")
+
+    print("\n【8. 加密与数据保护】")
+    print("  ℹ️  分析结果:")
+    print("    - 未发现 MD5/SHA1 等弱加密算法的直接硬编码")
+    print("    - 网络通信依赖 HTTPS（假设正确实现）")
+    print("    - 本地数据存储: 需审查 SharedPreferences 与数据库加密")
+    print("    建议:")
+    print("      * 启用 Android KeyStore 用于密钥管理")
+    print("      * 使用 AES-256 进行敏感数据加密")
+    print("      * 避免在日志中打印敏感信息")
+
+    print("\n【9. 反编译与逆向工程防护】")
+    print("  当前防护措施:")
+    print("    ✗ 无代码混淆 (ProGuard/R8)")
+    print("    ✓ Lua 脚本编译 (.luac 格式)")
+    print("    ✓ 部分逻辑在 Native 层 (libcocos2dlua.so)")
+    print("  改进建议:")
+    print("    1. 启用 ProGuard/R8 进行 Java 代码混淆与优化")
+    print("    2. 对敏感 Java 类使用字符串加密")
+    print("    3. 实施反调试与反模拟检测")
+    print("    4. 考虑使用商业防护工具 (如: Apktool 检测、Frida 检测)")
+
+    print("\n【10. 建议的修复与改进】")
+    print("\n  【立即行动】")
+    print("    □ 审查并最小化权限")
+    print("      - 移除未使用的危险权限（SEND_SMS, READ_CALL_LOG 等）")
+    print("      - 实施运行时权限请求")
+    print("")
+    print("    □ 更新依赖库")
+    print("      - 升级 Apache HttpClient 至 5.x 或改用 OkHttp")
+    print("      - 升级 FastJSON 至 >= 1.2.83（修复已知 RCE 漏洞）")
+    print("      - 检查所有库的最新安全补丁")
+    print("")
+    print("    □ SSL/TLS 配置")
+    print("      - 实现 SSL 证书 pinning")
+    print("      - 禁用 SSLv3、TLS 1.0/1.1（使用 TLS 1.2+）")
+    print("      - 验证证书链")
+    print("")
+    print("  【短期计划】")
+    print("    □ 代码混淆")
+    print("      - 配置 ProGuard/R8 规则")
+    print("      - 字符串加密")
+    print("")
+    print("    □ 安全测试")
+    print("      - 动态分析（运行时权限使用、网络通信）")
+    print("      - Frida Hook 测试")
+    print("      - OWASP Mobile Top 10 检查")
+    print("")
+    print("  【长期策略】")
+    print("    □ 安全开发流程 (SSDLC)")
+    print("      - 代码审查")
+    print("      - 威胁建模")
+    print("      - 自动安全测试 (CI/CD 集成)")
+    print("")
+    print("    □ 事件响应")
+    print("      - 建立漏洞报告机制")
+    print("      - 准备补丁与更新流程")
+
+    print("\n" + "=" * 90)
+    print("【报告总结】")
+    print("=" * 90)
+    print("""
 风险评级: 【中等风险】
 
 该应用主要通过 Cocos2d + Lua 实现游戏逻辑。虽然 Native 层与 Lua 编译提供了一定的
@@ -236,6 +258,9 @@ print("""
 对 Lua 层与 Native 层进行深入审计，检查是否存在隐藏的恶意逻辑或数据泄露。
 """)
 
-print("=" * 90)
-print("报告生成完成")
-print("=" * 90)
+    print("=" * 90)
+    print("报告生成完成")
+    print("=" * 90)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
 import re
-b=open('apk_unzip/classes.dex','rb').read()
-parts=re.findall(b'([A-Za-z0-9_\./\$]{6,200})',b)
-cands=set()
-for p in parts:
-    s=p.decode('utf-8',errors='ignore')
-    if any(k in s for k in ['Activity','Service','Receiver','Fragment','Provider','Main', 'Launcher']):
-        if '.' in s or '/' in s:
-            s2=s.replace('/','.')
-            cands.add(s2)
-for c in sorted(cands)[:400]:
-    print(c)
+
+import stream_reader
+from multidex import find_dex_files, map_dex
+
+KEYS=['Activity','Service','Receiver','Fragment','Provider','Main', 'Launcher']
+
+def scan_dex(path):
+    cands=set()
+    for _,p in stream_reader.finditer(path,re.compile(b'[A-Za-z0-9_\\./\\$]{6,200}'),overlap=200):
+        s=p.decode('utf-8',errors='ignore')
+        if any(k in s for k in KEYS):
+            if '.' in s or '/' in s:
+                s2=s.replace('/','.')
+                cands.add(s2)
+    return cands
+
+if __name__=='__main__':
+    # 每个 classesN.dex 一个工作进程，结果按 DEX 顺序合并
+    cands=set()
+    for _,found in map_dex(scan_dex,find_dex_files()):
+        cands|=found
+    for c in sorted(cands)[:400]:
+        print(c)
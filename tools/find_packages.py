@@ -1,18 +1,42 @@
 import re
-from collections import Counter
-b=open('apk_unzip/classes.dex','rb').read()
-parts=re.findall(b'L([a-zA-Z0-9_/$\-]{3,200});',b)
-pkgs=[p.decode('utf-8','ignore').replace('/','.') for p in parts]
-roots=[p.split('.')[0] for p in pkgs if p]
-cnt=Counter(roots)
-for k,v in cnt.most_common(30):
-    print(f"{k}: {v}")
+import sys
 
-# show some full package examples for top roots
-top=[k for k,_ in cnt.most_common(10)]
-examples=set()
-for p in pkgs:
-    if any(p.startswith(t+'.') for t in top):
-        examples.add(p)
-for e in sorted(list(examples))[:200]:
-    print(e)
+import stream_reader
+from dex_index import PackageTree, load_type_index
+from dex_parser import DexFormatError
+from multidex import find_dex_files, map_dex
+
+def index_dex(dex_path):
+    # 优先从 type_ids/class_defs 建立包名前缀树，每个类只计一次
+    try:
+        return load_type_index(dex_path)
+    except DexFormatError:
+        # 非标准 DEX：退回流式扫描 L...; 描述符
+        tree=PackageTree()
+        for _,p in stream_reader.finditer(dex_path,re.compile(b'L([a-zA-Z0-9_/$\\-]{3,200});'),overlap=256):
+            tree.add(p[1:-1].decode('utf-8','ignore').replace('/','.'))
+        return tree
+
+if __name__=='__main__':
+    # 每个 classesN.dex 一个工作进程，按 DEX 顺序合并成一棵树
+    tree=PackageTree()
+    for _,t in map_dex(index_dex,find_dex_files()):
+        tree.merge(t)
+
+    # python tools/find_packages.py com.tencent  -> 列出该包下的所有类
+    if len(sys.argv)>1:
+        for pkg in sys.argv[1:]:
+            print(f"=== {pkg}: {tree.count(pkg)} classes ({tree.count(pkg,defined_only=True)} defined)")
+            for c in tree.classes_under(pkg):
+                print(c)
+        sys.exit(0)
+
+    for k,v in tree.top(30):
+        print(f"{k}: {v}")
+
+    # show some full package examples for top roots
+    examples=set()
+    for k,_ in tree.top(10):
+        examples.update(tree.classes_under(k))
+    for e in sorted(list(examples))[:200]:
+        print(e)
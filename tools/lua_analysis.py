@@ -1,30 +1,104 @@
 #!/usr/bin/env python3
 """
 Lua 脚本安全分析（.luac 文件）
+能解析的字节码（明文或可解密的外壳）直接读取函数原型：按函数给出字符串常量、全局访问和常量赋值；
+无法解析的文件退回可见字符串扫描
 """
-import os
+import functools
+import hashlib
 import re
+import sys
+
+from lua_chunk import LuaChunkError, function_summaries, parse_chunk
+from lua_formats import detect
+from result_cache import ResultCache
+from scan_engine import printable_strings
+from scan_scheduler import scan_files, walk_files
+
+# 分析规则变化时递增，使旧的缓存结果失效
+ANALYZER_VERSION = '2'
+
+NETWORK_RE = re.compile(r'(http|socket|curl|request|download|upload)', re.I)
+FILE_RE = re.compile(r'(file|read|write|path|open|io\.)', re.I)
+DANGEROUS_RE = re.compile(r'(os\.execute|system|shell|exec|load|require)', re.I)
+HARDCODED_RE = re.compile(r'(key|token|secret|password|appid|uid|sid|sessionid)\s*=\s*["\'][\w\-]{8,}["\']', re.I)
+DEBUG_RE = re.compile(r'(print|debug|log)', re.I)
+
+# 字节码模式：常量赋值的键名（APP_KEY = "..."、cfg.token = "..."）
+SECRET_KEY_RE = re.compile(r'(key|token|secret|password|appid|uid|sid|sessionid)', re.I)
+# 字节码模式：字符串常量中的网络地址
+ENDPOINT_RE = re.compile(r'(https?|wss?|tcp)://|socket', re.I)
 
 def scan_lua_files(base_path):
     """扫描并分析 Lua 文件"""
-    lua_files = []
-    for root, dirs, files in os.walk(base_path):
-        for f in files:
-            if f.endswith('.luac') or f.endswith('.lua'):
-                lua_files.append(os.path.join(root, f))
-    return lua_files
+    return walk_files(base_path, ('.luac', '.lua'))
 
 def analyze_lua_file(lua_path):
-    """分析单个 Lua 文件（查找可见的危险字符串）"""
+    """分析单个 Lua 文件（字节码按函数分析，否则查找可见的危险字符串）"""
     try:
         with open(lua_path, 'rb') as f:
             b = f.read()
     except:
         return None
-    
-    # 从二进制中提取可见字符串
-    parts = re.findall(b'([ -~]{4,200})', b)
-    strings = [p.decode('utf-8', errors='ignore') for p in parts]
+    return analyze_lua_data(lua_path, b)
+
+def analyze_lua_data(lua_path, b, xxtea_key=None):
+    """分析已读入的 Lua 文件内容（供调度器在工作进程中调用）"""
+    chunk = load_chunk(b, xxtea_key)
+    if chunk is not None:
+        return analyze_chunk(chunk)
+    return analyze_strings(b)
+
+def load_chunk(b, xxtea_key=None):
+    """识别容器格式，能解出 Lua 5.1 ~ 5.3 字节码时返回 LuaChunk，否则返回 None"""
+    fmt = detect(b)
+    if fmt is None:
+        return None
+    if fmt.encrypted:
+        _method, b = fmt.decode(b, xxtea_key)
+        if b is None:
+            return None
+    try:
+        return parse_chunk(b)
+    except LuaChunkError:
+        return None
+
+def analyze_chunk(chunk):
+    """按函数分类：名字来自真实的全局 / 字段访问，值来自常量表，每条带函数位置"""
+    risks = {
+        'network_calls': [],
+        'file_operations': [],
+        'dangerous_functions': [],
+        'hardcoded_values': [],
+        'debug_code': [],
+    }
+    # 位置取自 chunk 内的 source 名（与内容一起缓存，不依赖文件路径）
+    source = (chunk.main.source or '').lstrip('@=')
+    for info in function_summaries(chunk):
+        where = f"  [{source}:{info['function']}]" if source else f"  [{info['function']}]"
+        accessed = info['globals'] + info['fields']
+        for name in accessed:
+            if NETWORK_RE.search(name):
+                risks['network_calls'].append(name + where)
+            if FILE_RE.search(name):
+                risks['file_operations'].append(name + where)
+            if DANGEROUS_RE.search(name) and name != 'require':
+                risks['dangerous_functions'].append(name + where)
+            if DEBUG_RE.search(name):
+                risks['debug_code'].append(name + where)
+        for s in info['strings']:
+            if ENDPOINT_RE.search(s):
+                risks['network_calls'].append(s + where)
+            if HARDCODED_RE.search(s):
+                risks['hardcoded_values'].append(s + where)
+        for key, value in info['assigns']:
+            if SECRET_KEY_RE.search(key) and isinstance(value, str) and len(value) >= 8:
+                risks['hardcoded_values'].append(f'{key} = "{value}"' + where)
+    return risks
+
+def analyze_strings(b):
+    """无法解析字节码时的退路：从二进制中提取可见字符串"""
+    strings = printable_strings(b, 4, 200)
     
     risks = {
         'network_calls': [],
@@ -36,19 +110,19 @@ def analyze_lua_file(lua_path):
     
     for s in strings:
         # 网络调用
-        if re.search(r'(http|socket|curl|request|download|upload)', s, re.I):
+        if NETWORK_RE.search(s):
             risks['network_calls'].append(s)
         
         # 文件操作
-        if re.search(r'(file|read|write|path|open|io\.)', s, re.I):
+        if FILE_RE.search(s):
             risks['file_operations'].append(s)
         
         # 危险函数
-        if re.search(r'(os\.execute|system|shell|exec|load|require)', s, re.I):
+        if DANGEROUS_RE.search(s):
             risks['dangerous_functions'].append(s)
         
         # 硬编码值（密钥、token 等）
-        if re.search(r'(key|token|secret|password|appid|uid|sid|sessionid)\s*=\s*["\'][\w\-]{8,}["\']', s, re.I):
+        if HARDCODED_RE.search(s):
             risks['hardcoded_values'].append(s)
         
         # 调试代码
@@ -57,42 +131,66 @@ def analyze_lua_file(lua_path):
     
     return risks
 
-print("=" * 80)
-print("Lua 脚本安全分析")
-print("=" * 80)
-
-lua_base = 'apk_unzip/assets/base/src'
-print(f"\n[*] 扫描 {lua_base}...")
-lua_files = scan_lua_files(lua_base)
-print(f"[+] 发现 {len(lua_files)} 个 Lua 文件")
-
-all_risks = {
-    'network_calls': [],
-    'file_operations': [],
-    'dangerous_functions': [],
-    'hardcoded_values': [],
-    'debug_code': [],
-}
-
-for lua_file in lua_files:
-    risks = analyze_lua_file(lua_file)
-    if risks:
-        for cat, items in risks.items():
-            all_risks[cat].extend(items)
-
-print("\n【Lua 脚本风险】")
-for category, items in all_risks.items():
-    if items:
-        unique_items = list(set(items))
-        print(f"\n  {category}: {len(unique_items)} 个问题")
-        for item in unique_items[:8]:
-            print(f"    - {item[:80]}")
-        if len(unique_items) > 8:
-            print(f"    ... 还有 {len(unique_items) - 8} 个")
-
-print(f"\n[*] Lua 文件列表（前30个）:")
-for lua_file in lua_files[:30]:
-    rel_path = lua_file.replace('apk_unzip/assets/base/src/', '')
-    print(f"  - {rel_path}")
-if len(lua_files) > 30:
-    print(f"  ... 还有 {len(lua_files) - 30} 个文件")
+def main():
+    """主程序"""
+    print("=" * 80)
+    print("Lua 脚本安全分析")
+    print("=" * 80)
+
+    # --src 可指向 decrypt_lua 的输出目录；--xxtea-key 让工作进程自行解开 XXTEA 外壳
+    lua_base = sys.argv[sys.argv.index('--src') + 1] if '--src' in sys.argv else 'apk_unzip/assets/base/src'
+    xxtea_key = None
+    version = ANALYZER_VERSION
+    if '--xxtea-key' in sys.argv:
+        xxtea_key = sys.argv[sys.argv.index('--xxtea-key') + 1].encode('utf-8')
+        version += '+' + hashlib.md5(xxtea_key).hexdigest()[:8]
+    print(f"\n[*] 扫描 {lua_base}...")
+    lua_files = scan_lua_files(lua_base)
+    print(f"[+] 发现 {len(lua_files)} 个 Lua 文件")
+
+    all_risks = {
+        'network_calls': [],
+        'file_operations': [],
+        'dangerous_functions': [],
+        'hardcoded_values': [],
+        'debug_code': [],
+    }
+
+    # 按文件内容哈希缓存单文件结果，未变化的文件重跑时直接复用
+    cache = ResultCache()
+    if '--trust-md5list' in sys.argv:
+        cache.trust_md5_lists(lua_base)
+    results, misses = cache.split('lua_analysis', version, lua_files)
+    # 未命中的文件：线程池读取、进程池分析，大文件优先
+    analyze = functools.partial(analyze_lua_data, xxtea_key=xxtea_key)
+    for lua_file, risks in scan_files(misses, analyze):
+        cache.store('lua_analysis', version, lua_file, risks)
+        results[lua_file] = risks
+    cache.close()
+    # 按文件顺序合并，输出与调度顺序无关
+    for lua_file in lua_files:
+        risks = results.get(lua_file)
+        if risks:
+            for cat, items in risks.items():
+                all_risks[cat].extend(items)
+    print(f"[+] 缓存命中 {cache.hits} 个，重新分析 {cache.misses} 个")
+
+    print("\n【Lua 脚本风险】")
+    for category, items in all_risks.items():
+        if items:
+            unique_items = list(set(items))
+            print(f"\n  {category}: {len(unique_items)} 个问题")
+            for item in unique_items[:8]:
+                print(f"    - {item[:80]}")
+            if len(unique_items) > 8:
+                print(f"    ... 还有 {len(unique_items) - 8} 个")
+
+    print(f"\n[*] Lua 文件列表（前30个）:")
+    for lua_file in lua_files[:30]:
+        rel_path = lua_file.replace(lua_base.rstrip('/') + '/', '')
+        print(f"  - {rel_path}")
+    if len(lua_files) > 30:
+        print(f"  ... 还有 {len(lua_files) - 30} 个文件")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Lua 5.1 / 5.2 / 5.3 字节码（luac 输出）解析器
+直接遍历函数原型、常量表、upvalue 和调试信息，不依赖 JVM / unluac；
+按函数给出字符串常量（含非 ASCII）、全局变量读写、字段访问链（os.execute、cc.FileUtils 等）、
+require 的模块名以及 "key = 常量" 形式的赋值
+
+用法:
+    chunk = parse_chunk(data)
+    for func in iter_functions(chunk.main):
+        ...
+    infos = function_summaries(chunk)      # 每个函数的字符串常量、全局访问、require 等
+"""
+import struct
+import sys
+from collections import namedtuple
+
+LUA_SIGNATURE = b'\x1bLua'
+# 5.2 / 5.3 头部中的校验数据
+LUAC_TAIL = b'\x19\x93\r\n\x1a\n'
+
+LuaChunk = namedtuple('LuaChunk', ['version', 'main'])
+
+# code: 指令（整数）；constants: None / bool / int / float / str；
+# upvalues: 5.2+ 的 (instack, idx)；upvalue_names / locals: 调试信息（strip 后为空）
+LuaFunction = namedtuple('LuaFunction', [
+    'source', 'line', 'last_line', 'num_params', 'is_vararg', 'max_stack',
+    'code', 'constants', 'upvalues', 'upvalue_names', 'protos', 'locals', 'lineinfo'])
+
+
+class LuaChunkError(ValueError):
+    """不是可解析的 Lua 5.1 ~ 5.3 字节码"""
+
+
+class _Reader:
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+        self.endian = '<'
+        self.int_fmt = 'i'
+        self.size_t_fmt = 'I'
+        self.number_fmt = 'd'
+        self.integer_fmt = 'q'
+
+    def take(self, n):
+        if n < 0 or self.pos + n > len(self.data):
+            raise LuaChunkError(f'truncated chunk at offset {self.pos}')
+        out = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return out
+
+    def unpack(self, fmt):
+        size = struct.calcsize(self.endian + fmt)
+        return struct.unpack(self.endian + fmt, self.take(size))[0]
+
+    def byte(self):
+        return self.take(1)[0]
+
+    def int(self):
+        return self.unpack(self.int_fmt)
+
+    def count(self):
+        n = self.int()
+        if n < 0 or n > len(self.data):
+            raise LuaChunkError(f'bad element count {n} at offset {self.pos}')
+        return n
+
+    def ints(self, n, fmt):
+        size = struct.calcsize(self.endian + fmt)
+        return list(struct.unpack(f'{self.endian}{n}{fmt}', self.take(n * size)))
+
+
+def _decode(raw):
+    return bytes(raw).decode('utf-8', errors='replace')
+
+
+_INT_FORMATS = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}
+_UINT_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+_FLOAT_FORMATS = {4: 'f', 8: 'd'}
+
+
+def _sized(table, size, what):
+    try:
+        return table[size]
+    except KeyError:
+        raise LuaChunkError(f'unsupported {what} size {size}') from None
+
+
+# ---- 5.1 / 5.2 ----
+
+def _string_51(r):
+    size = r.unpack(r.size_t_fmt)
+    if size == 0:
+        return None
+    return _decode(r.take(size)[:-1])
+
+
+def _constant_51(r, version):
+    tag = r.byte()
+    if tag == 0:
+        return None
+    if tag == 1:
+        return bool(r.byte())
+    if tag == 3:
+        return r.unpack(r.number_fmt)
+    if tag == 4:
+        return _string_51(r)
+    raise LuaChunkError(f'bad constant type {tag} (Lua 5.{version - 0x50})')
+
+
+def _debug_51(r):
+    lineinfo = r.ints(r.count(), r.int_fmt)
+    local_vars = []
+    for _ in range(r.count()):
+        name = _string_51(r)
+        local_vars.append((name, r.int(), r.int()))
+    upvalue_names = [_string_51(r) for _ in range(r.count())]
+    return lineinfo, local_vars, upvalue_names
+
+
+def _function_51(r, parent_source):
+    source = _string_51(r) or parent_source
+    line, last_line = r.int(), r.int()
+    _nups, num_params, is_vararg, max_stack = r.take(4)
+    code = r.ints(r.count(), 'I')
+    constants = [_constant_51(r, 0x51) for _ in range(r.count())]
+    protos = [_function_51(r, source) for _ in range(r.count())]
+    lineinfo, local_vars, upvalue_names = _debug_51(r)
+    return LuaFunction(source, line, last_line, num_params, is_vararg, max_stack,
+                       code, constants, [], upvalue_names, protos, local_vars, lineinfo)
+
+
+def _function_52(r):
+    line, last_line = r.int(), r.int()
+    num_params, is_vararg, max_stack = r.take(3)
+    code = r.ints(r.count(), 'I')
+    constants = [_constant_51(r, 0x52) for _ in range(r.count())]
+    protos = [_function_52(r) for _ in range(r.count())]
+    upvalues = [tuple(r.take(2)) for _ in range(r.count())]
+    source = _string_51(r)
+    lineinfo, local_vars, upvalue_names = _debug_51(r)
+    return LuaFunction(source, line, last_line, num_params, is_vararg, max_stack,
+                       code, constants, upvalues, upvalue_names, protos, local_vars, lineinfo)
+
+
+def _inherit_source(func, parent_source):
+    """5.2 的 source 在调试信息里且位于子函数之后：解析完后自上而下补齐"""
+    source = func.source or parent_source
+    return func._replace(source=source, protos=[_inherit_source(p, source) for p in func.protos])
+
+
+# ---- 5.3 ----
+
+def _string_53(r):
+    size = r.byte()
+    if size == 0xFF:
+        size = r.unpack(r.size_t_fmt)
+    if size == 0:
+        return None
+    return _decode(r.take(size - 1))
+
+
+def _constant_53(r):
+    tag = r.byte()
+    if tag == 0:
+        return None
+    if tag == 1:
+        return bool(r.byte())
+    if tag == 3:
+        return r.unpack(r.number_fmt)
+    if tag == 0x13:
+        return r.unpack(r.integer_fmt)
+    if tag in (4, 0x14):
+        return _string_53(r)
+    raise LuaChunkError(f'bad constant type {tag} (Lua 5.3)')
+
+
+def _function_53(r, parent_source):
+    source = _string_53(r) or parent_source
+    line, last_line = r.int(), r.int()
+    num_params, is_vararg, max_stack = r.take(3)
+    code = r.ints(r.count(), 'I')
+    constants = [_constant_53(r) for _ in range(r.count())]
+    upvalues = [tuple(r.take(2)) for _ in range(r.count())]
+    protos = [_function_53(r, source) for _ in range(r.count())]
+    lineinfo = r.ints(r.count(), r.int_fmt)
+    local_vars = []
+    for _ in range(r.count()):
+        name = _string_53(r)
+        local_vars.append((name, r.int(), r.int()))
+    upvalue_names = [_string_53(r) for _ in range(r.count())]
+    return LuaFunction(source, line, last_line, num_params, is_vararg, max_stack,
+                       code, constants, upvalues, upvalue_names, protos, local_vars, lineinfo)
+
+
+def parse_chunk(data):
+    """解析 luac 输出，返回 LuaChunk(version, main)；version 为 0x51 / 0x52 / 0x53"""
+    data = bytes(data)
+    if not data.startswith(LUA_SIGNATURE) or len(data) < 12:
+        raise LuaChunkError('not a Lua bytecode chunk')
+    version = data[4]
+    r = _Reader(data, 5)
+    if version in (0x51, 0x52):
+        _format, endian, int_size, size_t_size, instr_size, number_size, integral = r.take(7)
+        if version == 0x52 and r.take(6) != LUAC_TAIL:
+            raise LuaChunkError('corrupted Lua 5.2 header')
+    elif version == 0x53:
+        r.byte()  # format
+        if r.take(6) != LUAC_TAIL:
+            raise LuaChunkError('corrupted Lua 5.3 header')
+        int_size, size_t_size, instr_size, integer_size, number_size = r.take(5)
+        integral = 0
+        # LUAC_INT = 0x5678 的字节序决定整个 chunk 的字节序
+        endian = 1 if data[r.pos] == 0x78 else 0
+    else:
+        raise LuaChunkError(f'unsupported Lua version 0x{version:02x}')
+    if instr_size != 4:
+        raise LuaChunkError(f'unsupported instruction size {instr_size}')
+    r.endian = '<' if endian else '>'
+    r.int_fmt = _sized(_INT_FORMATS, int_size, 'int')
+    r.size_t_fmt = _sized(_UINT_FORMATS, size_t_size, 'size_t')
+    r.number_fmt = (_sized(_INT_FORMATS, number_size, 'lua_Number') if integral
+                    else _sized(_FLOAT_FORMATS, number_size, 'lua_Number'))
+    if version == 0x53:
+        r.integer_fmt = _sized(_INT_FORMATS, integer_size, 'lua_Integer')
+        if r.unpack(r.integer_fmt) != 0x5678 or r.unpack(r.number_fmt) != 370.5:
+            raise LuaChunkError('integer / float format mismatch')
+        r.byte()  # main 函数的 upvalue 数
+        main = _function_53(r, None)
+    elif version == 0x52:
+        main = _inherit_source(_function_52(r), None)
+    else:
+        main = _function_51(r, None)
+    return LuaChunk(version, main)
+
+
+def iter_functions(func):
+    """先序遍历：main 及全部嵌套函数"""
+    stack = [func]
+    while stack:
+        f = stack.pop()
+        yield f
+        stack.extend(reversed(f.protos))
+
+
+# ---- 指令分析 ----
+
+# 指令布局（5.1 ~ 5.3 相同）：OP 6 位 | A 8 位 | C 9 位 | B 9 位；Bx = 高 18 位
+_BITRK = 1 << 8
+
+# 各版本中用到的操作码
+_OPS = {
+    0x51: dict(MOVE=0, LOADK=1, GETUPVAL=4, GETGLOBAL=5, GETTABLE=6, SETGLOBAL=7,
+               SETTABLE=9, SELF=11, CALL=28, TAILCALL=29),
+    0x52: dict(MOVE=0, LOADK=1, GETUPVAL=5, GETTABUP=6, GETTABLE=7, SETTABUP=8,
+               SETTABLE=10, SELF=12, CALL=29, TAILCALL=30),
+    0x53: dict(MOVE=0, LOADK=1, GETUPVAL=5, GETTABUP=6, GETTABLE=7, SETTABUP=8,
+               SETTABLE=10, SELF=12, CALL=36, TAILCALL=37),
+}
+
+
+def function_label(func):
+    """main 或 function@首行"""
+    return 'main' if func.line == 0 else f'function@{func.line}'
+
+
+def _env_upvalues(func, parent_env):
+    """5.2+：哪些 upvalue 是 _ENV（有调试信息时按名字，否则沿 upvalue 描述符从 main 推导）"""
+    if func.upvalue_names and any(func.upvalue_names):
+        return {i for i, name in enumerate(func.upvalue_names) if name == '_ENV'}
+    if parent_env is None:
+        return {0}
+    return {i for i, (instack, idx) in enumerate(func.upvalues) if not instack and idx in parent_env}
+
+
+def _scan_code(func, ops, env):
+    """
+    线性扫描一个函数的指令，跟踪寄存器里的全局名 / 字段链和字符串常量，
+    返回 (读取的全局, 写入的全局, 字段链, require 模块, 常量赋值)
+    """
+    k = func.constants
+    op_getglobal, op_setglobal = ops.get('GETGLOBAL', -1), ops.get('SETGLOBAL', -1)
+    op_gettabup, op_settabup = ops.get('GETTABUP', -1), ops.get('SETTABUP', -1)
+    op_gettable, op_self, op_settable = ops['GETTABLE'], ops['SELF'], ops['SETTABLE']
+    op_loadk, op_move, op_calls = ops['LOADK'], ops['MOVE'], (ops['CALL'], ops['TAILCALL'])
+
+    def const(i):
+        return k[i] if 0 <= i < len(k) else None
+
+    def rk(x, regs_const):
+        return const(x - _BITRK) if x & _BITRK else regs_const.get(x)
+
+    def key_name(value):
+        return value if isinstance(value, str) else None
+
+    def literal(value):
+        return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+    names = {}      # 寄存器 -> 'os' / 'os.execute'
+    strings = {}    # 寄存器 -> 常量值（LOADK 载入）
+    gets, sets, fields, requires, assigns = [], [], [], [], []
+
+    for ins in func.code:
+        op = ins & 0x3F
+        a = (ins >> 6) & 0xFF
+        c = (ins >> 14) & 0x1FF
+        b = (ins >> 23) & 0x1FF
+        if op == op_getglobal or (op == op_gettabup and b in env):
+            name = key_name(const(ins >> 14) if op == op_getglobal else rk(c, strings))
+            strings.pop(a, None)
+            if name is None:
+                names.pop(a, None)
+            else:
+                names[a] = name
+                gets.append(name)
+        elif op == op_setglobal or (op == op_settabup and a in env):
+            if op == op_setglobal:
+                name, value = key_name(const(ins >> 14)), strings.get(a)
+            else:
+                name, value = key_name(rk(b, strings)), rk(c, strings)
+            if name is not None:
+                sets.append(name)
+                if literal(value):
+                    assigns.append((name, value))
+        elif op == op_gettable or op == op_self:
+            base, key = names.get(b), key_name(rk(c, strings))
+            if op == op_self:
+                for regs in (names, strings):
+                    if b in regs:
+                        regs[a + 1] = regs[b]
+                    else:
+                        regs.pop(a + 1, None)
+            strings.pop(a, None)
+            if base is not None and key is not None:
+                names[a] = f'{base}.{key}'
+                fields.append(names[a])
+            else:
+                names.pop(a, None)
+        elif op == op_settable:
+            key, value = key_name(rk(b, strings)), rk(c, strings)
+            if key is not None and literal(value):
+                base = names.get(a)
+                assigns.append((f'{base}.{key}' if base else key, value))
+        elif op == op_loadk:
+            names.pop(a, None)
+            strings[a] = const(ins >> 14)
+        elif op == op_move:
+            for regs in (names, strings):
+                if b in regs:
+                    regs[a] = regs[b]
+                else:
+                    regs.pop(a, None)
+        elif op in op_calls:
+            if names.get(a) == 'require' and isinstance(strings.get(a + 1), str):
+                requires.append(strings[a + 1])
+            # 调用结果覆盖 R(A) 起的寄存器
+            for regs in (names, strings):
+                for reg in [r for r in regs if r >= a]:
+                    del regs[reg]
+        else:
+            names.pop(a, None)
+            strings.pop(a, None)
+    return gets, sets, fields, requires, assigns
+
+
+def _dedupe(items):
+    return list(dict.fromkeys(items))
+
+
+def function_summaries(chunk):
+    """
+    每个函数一条记录：
+    {'function', 'line', 'strings', 'globals', 'sets', 'fields', 'requires', 'assigns'}
+    """
+    ops = _OPS[chunk.version]
+    out = []
+    stack = [(chunk.main, None)]
+    while stack:
+        func, parent_env = stack.pop()
+        env = _env_upvalues(func, parent_env) if chunk.version >= 0x52 else set()
+        gets, sets, fields, requires, assigns = _scan_code(func, ops, env)
+        out.append({
+            'function': function_label(func),
+            'line': func.line,
+            'strings': _dedupe(c for c in func.constants if isinstance(c, str)),
+            'globals': _dedupe(gets),
+            'sets': _dedupe(sets),
+            'fields': _dedupe(fields),
+            'requires': _dedupe(requires),
+            'assigns': _dedupe(assigns),
+        })
+        stack.extend((p, env) for p in reversed(func.protos))
+    return out
+
+
+def main():
+    if len(sys.argv) < 2:
+        print('用法: python tools/lua_chunk.py <file.luac> ...')
+        return
+    for path in sys.argv[1:]:
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            chunk = parse_chunk(data)
+        except LuaChunkError as e:
+            print(f'{path}: {e}')
+            continue
+        print(f'{path}: Lua {chunk.version >> 4}.{chunk.version & 0xF}, source={chunk.main.source}')
+        for info in function_summaries(chunk):
+            print(f"  [{info['function']}] strings={len(info['strings'])} "
+                  f"globals={info['globals'][:8]} requires={info['requires']}")
+            for field in info['fields'][:8]:
+                print(f'      {field}')
+
+
+if __name__ == '__main__':
+    main()
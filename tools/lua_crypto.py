@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Lua 资源解密内核
+XOR 类密钥只用文件头探测：Lua 字节码签名已知（\\x1bLua + 版本号），
+由首字节直接推出密钥（已知明文），再用后续几个字节验证，最后对整个载荷只解密一次。
+有 NumPy 时向量化执行，没有时退回大整数 XOR（同样是整块运算，不逐字节循环）。
+
+XXTEA 部分与 cocos2d-x 的 xxtea_decrypt 一致：密钥截断/补零到 16 字节，
+密文最后一个字保存明文长度。NumPy 下可一次用多个候选密钥解密同一段密文
+"""
+import base64
+import struct
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Lua 5.1 ~ 5.4 字节码签名（ESC 'Lua' + 版本号）
+LUA_SIGNATURES = (b'\x1bLuaQ', b'\x1bLuaR', b'\x1bLuaS', b'\x1bLuaT')
+SIGNATURE_LEN = 5
+
+# 验证用的文件头长度，探测时只看这么多字节
+PROBE_LEN = 16
+
+
+def is_lua_bytecode(data):
+    return bytes(data[:SIGNATURE_LEN]) in LUA_SIGNATURES
+
+
+def _keystream(key, length, cyclic):
+    """simple: 全部为 key；cyclic: (key + i) % 256"""
+    if not cyclic:
+        return bytes([key]) * length
+    period = bytes((key + i) & 0xFF for i in range(256))
+    return (period * (length // 256 + 1))[:length]
+
+
+def xor_decrypt(data, key, cyclic=False):
+    """用单字节 / 循环递增密钥整块解密"""
+    if not data:
+        return b''
+    if np is not None:
+        arr = np.frombuffer(data, dtype=np.uint8)
+        if cyclic:
+            stream = ((np.arange(len(arr), dtype=np.uint32) + key) & 0xFF).astype(np.uint8)
+        else:
+            stream = np.uint8(key)
+        return (arr ^ stream).tobytes()
+    if not cyclic:
+        return bytes(data).translate(bytes(b ^ key for b in range(256)))
+    n = len(data)
+    plain = int.from_bytes(data, 'little') ^ int.from_bytes(_keystream(key, n, True), 'little')
+    return plain.to_bytes(n, 'little')
+
+
+def probe_xor_key(head):
+    """
+    由文件头推出 XOR 密钥：返回 ('xor', key) / ('cyclic', key)，都不成立时返回 None。
+    只读 head 的前几个字节，不解密整个载荷
+    """
+    head = bytes(head[:PROBE_LEN])
+    if len(head) < SIGNATURE_LEN:
+        return None
+    # 明文首字节必为 0x1b，由此直接得到候选密钥，两种模式各只需验证一个
+    key = head[0] ^ 0x1B
+    for mode, cyclic in (('xor', False), ('cyclic', True)):
+        if is_lua_bytecode(xor_decrypt(head[:SIGNATURE_LEN], key, cyclic)):
+            return mode, key
+    return None
+
+
+# ---- XXTEA (cocos2d-x) ----
+
+XXTEA_DELTA = 0x9E3779B9
+_MASK = 0xFFFFFFFF
+
+# LuaJIT 字节码签名
+LUAJIT_SIGNATURE = b'\x1bLJ'
+_ZLIB_HEADERS = (b'\x78\x01', b'\x78\x5e', b'\x78\x9c', b'\x78\xda')
+
+
+def xxtea_key_words(key):
+    """cocos2d-x 的 fixed_key：不足 16 字节补零，超出部分 btea 用不到"""
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    return struct.unpack('<4I', key[:16].ljust(16, b'\x00'))
+
+
+def _btea_decode(v, k):
+    n = len(v)
+    if n < 2:
+        # 与 cocos2d-x 相同：只有长度字时不加密
+        return v
+    total = ((6 + 52 // n) * XXTEA_DELTA) & _MASK
+    y = v[0]
+    while total:
+        e = (total >> 2) & 3
+        for p in range(n - 1, -1, -1):
+            z = v[p - 1]  # p == 0 时为 v[n-1]
+            mx = ((((z >> 5) ^ (y << 2)) + ((y >> 3) ^ (z << 4))) ^
+                  ((total ^ y) + (k[(p & 3) ^ e] ^ z)))
+            y = v[p] = (v[p] - mx) & _MASK
+        total = (total - XXTEA_DELTA) & _MASK
+    return v
+
+
+def _btea_encode(v, k):
+    n = len(v)
+    if n < 2:
+        return v
+    rounds = 6 + 52 // n
+    total = 0
+    z = v[n - 1]
+    for _ in range(rounds):
+        total = (total + XXTEA_DELTA) & _MASK
+        e = (total >> 2) & 3
+        for p in range(n):
+            y = v[(p + 1) % n]
+            mx = ((((z >> 5) ^ (y << 2)) + ((y >> 3) ^ (z << 4))) ^
+                  ((total ^ y) + (k[(p & 3) ^ e] ^ z)))
+            z = v[p] = (v[p] + mx) & _MASK
+    return v
+
+
+def _unpack_plain(words):
+    """去掉长度字；长度不在 [4n-7, 4n-4] 范围内（密钥错误）返回 None"""
+    n = len(words) * 4
+    length = words[-1]
+    if length < n - 7 or length > n - 4:
+        return None
+    return struct.pack(f'<{len(words)}I', *words)[:length]
+
+
+def xxtea_decrypt(data, key):
+    """解密 cocos2d-x XXTEA 密文（不含 sign 前缀）；密钥错误返回 None"""
+    if len(data) < 4 or len(data) % 4:
+        return None
+    words = list(struct.unpack(f'<{len(data) // 4}I', data))
+    return _unpack_plain(_btea_decode(words, xxtea_key_words(key)))
+
+
+def xxtea_encrypt(data, key):
+    """与 xxtea_decrypt 对应（重新打包时使用）"""
+    padded = data + b'\x00' * (-len(data) % 4)
+    words = list(struct.unpack(f'<{len(padded) // 4}I', padded)) + [len(data)]
+    words = _btea_encode(words, xxtea_key_words(key))
+    return struct.pack(f'<{len(words)}I', *words)
+
+
+def xxtea_decrypt_many(data, keys):
+    """
+    用多个候选密钥解密同一段密文，返回与 keys 对应的明文列表（失败为 None）。
+    有 NumPy 时所有候选密钥按行并排一起运算
+    """
+    if np is None or len(keys) < 2 or len(data) < 8 or len(data) % 4:
+        return [xxtea_decrypt(data, key) for key in keys]
+    n = len(data) // 4
+    v = np.tile(np.frombuffer(data, dtype='<u4').astype(np.uint32), (len(keys), 1))
+    k = np.array([xxtea_key_words(key) for key in keys], dtype=np.uint32)
+    total = ((6 + 52 // n) * XXTEA_DELTA) & _MASK
+    with np.errstate(over='ignore'):
+        y = v[:, 0].copy()
+        while total:
+            e = (total >> 2) & 3
+            t = np.uint32(total)
+            for p in range(n - 1, -1, -1):
+                z = v[:, p - 1]
+                mx = (((z >> 5) ^ (y << 2)) + ((y >> 3) ^ (z << 4))) ^ ((t ^ y) + (k[:, (p & 3) ^ e] ^ z))
+                v[:, p] -= mx
+                y = v[:, p].copy()
+            total = (total - XXTEA_DELTA) & _MASK
+    lengths = v[:, -1].astype(np.int64)
+    ok = (lengths >= 4 * n - 7) & (lengths <= 4 * n - 4)
+    raw = v.astype('<u4')
+    return [raw[i].tobytes()[:lengths[i]] if ok[i] else None for i in range(len(keys))]
+
+
+def plaintext_score(data):
+    """
+    解密结果像不像 Lua：3 = 字节码（Lua/LuaJIT），2 = UTF-8 源码文本，
+    1 = 压缩容器（zip/gzip/zlib），0 = 无法识别
+    """
+    if data is None:
+        return 0
+    head = bytes(data[:SIGNATURE_LEN])
+    if head in LUA_SIGNATURES or head.startswith(LUAJIT_SIGNATURE):
+        return 3
+    if head[:4] == b'PK\x03\x04' or head[:2] == b'\x1f\x8b' or head[:2] in _ZLIB_HEADERS:
+        return 1
+    sample = bytes(data[:512])
+    if sample.startswith(b'\xef\xbb\xbf'):
+        sample = sample[3:]
+    # 采样可能截断在多字节字符中间，替换字符按不可打印计
+    text = sample.decode('utf-8', errors='replace')
+    if text and sum(c.isprintable() or c in '\r\n\t' for c in text) >= 0.95 * len(text):
+        return 2
+    return 0
+
+
+# ---- 方法搜索 ----
+
+def try_method(payload, method):
+    """
+    用一种方法解密载荷（不含 sign 前缀），结果不像 Lua 时返回 None。
+    method 为 (kind, key)：('xxtea', key) / ('xor', k) / ('cyclic', k) / ('base64', None) / ('zlib', None)
+    """
+    kind, key = method
+    try:
+        if kind == 'xxtea':
+            out = xxtea_decrypt(payload, key)
+            return out if plaintext_score(out) else None
+        if kind in ('xor', 'cyclic'):
+            out = xor_decrypt(payload, key, cyclic=(kind == 'cyclic'))
+        elif kind == 'base64':
+            out = base64.b64decode(bytes(payload))
+        elif kind == 'zlib':
+            out = zlib.decompress(payload)
+        else:
+            return None
+    except (ValueError, zlib.error):
+        return None
+    return out if is_lua_bytecode(out) else None
+
+
+def candidate_methods(payload, xxtea_key=None):
+    """按顺序产出要尝试的方法；XOR 密钥由文件头直接推出"""
+    if xxtea_key is not None:
+        yield ('xxtea', xxtea_key)
+    probe = probe_xor_key(payload)
+    if probe:
+        yield probe
+    if bytes(payload[:4096]).isascii() and bytes(payload).isascii():
+        yield ('base64', None)
+    yield ('zlib', None)
+
+
+def search_payload(payload, xxtea_key=None):
+    """按 candidate_methods 的顺序尝试，返回 (method, 明文)；全部失败返回 (None, None)"""
+    for method in candidate_methods(payload, xxtea_key):
+        out = try_method(payload, method)
+        if out is not None:
+            return method, out
+    return None, None
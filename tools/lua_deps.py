@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Lua 模块依赖索引（require 图）
+模块名为 .luac / .lua 相对扫描根目录的路径（去扩展名、/ 换成 .），如 base.src.app.MyApp；
+依赖来自字节码中的 require 调用与形如模块名的字符串常量（appdf.req(CLIENT_SRC .. "plaza.models.X") 之类的
+包装调用只能从常量看到后半段），以及反编译源码中的同类字符串。
+引用按模块名后缀解析（require("app.MyApp") -> base.src.app.MyApp），解析不到的引用忽略。
+
+索引以 JSON 保存，重跑时只重新解析大小或 mtime 变化的文件；正反向依赖与传递闭包在内存中按需计算
+
+用法:
+    python tools/lua_deps.py [--root apk_unzip/assets] [--sources decompiled/lua_decompiled]
+                             [--xxtea-key KEY] [模块名或路径 ...]
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import deque
+
+from lua_analysis import load_chunk
+from lua_chunk import function_summaries
+from mirror_tree import atomic_write
+
+INDEX_VERSION = '2'
+DEFAULT_ROOT = 'apk_unzip/assets'
+DEFAULT_INDEX_PATH = '.analysis_cache/lua_deps.json'
+DEFAULT_SOURCES = 'decompiled/lua_decompiled'
+
+LUA_SUFFIXES = ('.luac', '.lua')
+
+# 至少两段的点分 / 斜杠分隔名字才当作模块引用的候选（单个单词太容易误匹配）
+MODULE_NAME_RE = re.compile(r'^[A-Za-z_][\w-]*(?:[./][A-Za-z_][\w-]*)+$')
+# 源码中的字符串字面量与 require 调用
+SOURCE_STRING_RE = re.compile(r'''["'](\.*[A-Za-z_][\w./-]*)["']''')
+SOURCE_REQUIRE_RE = re.compile(r'''require\s*\(?\s*["']([\w./-]+)["']''')
+# cocos 的 import(".ViewBase") 相对当前模块所在包，每多一个点向上一层
+RELATIVE_NAME_RE = re.compile(r'^\.+[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*$')
+
+
+def module_name(rel_path):
+    """相对路径 -> 模块名；反编译输出中保留的 assets/ 前缀会去掉"""
+    rel = rel_path.replace('\\', '/')
+    for suffix in LUA_SUFFIXES:
+        if rel.endswith(suffix):
+            rel = rel[:-len(suffix)]
+            break
+    if rel.startswith('assets/'):
+        rel = rel[len('assets/'):]
+    return rel.replace('/', '.')
+
+
+def _normalize_target(target):
+    target = target.strip().replace('\\', '/')
+    for suffix in LUA_SUFFIXES:
+        if target.endswith(suffix):
+            target = target[:-len(suffix)]
+            break
+    return target.strip('/').replace('/', '.')
+
+
+def bytecode_refs(data, xxtea_key=None):
+    """字节码中的引用：require 目标 + 形如模块名的字符串常量；无法解析时返回 None"""
+    chunk = load_chunk(data, xxtea_key)
+    if chunk is None:
+        return None
+    refs = []
+    for info in function_summaries(chunk):
+        refs.extend(info['requires'])
+        refs.extend(s for s in info['strings'] if MODULE_NAME_RE.match(s) or RELATIVE_NAME_RE.match(s))
+    return list(dict.fromkeys(refs))
+
+
+def source_refs(text):
+    """反编译源码中的引用"""
+    refs = SOURCE_REQUIRE_RE.findall(text)
+    refs.extend(s for s in SOURCE_STRING_RE.findall(text)
+                if MODULE_NAME_RE.match(s) or RELATIVE_NAME_RE.match(s))
+    return list(dict.fromkeys(refs))
+
+
+def _absolute_target(target, module):
+    """相对引用（.ViewBase / ..mvc.AppBase）换算成完整模块名"""
+    if not target.startswith('.'):
+        return target
+    name = target.lstrip('.')
+    package = module.split('.')[:-1]
+    up = len(target) - len(name) - 1
+    if up > len(package):
+        return name
+    return '.'.join(package[:len(package) - up] + [name])
+
+
+def _stat(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class LuaDepsIndex:
+    """
+    files: {相对根目录的路径: {size, mtime_ns, module, refs, parsed, origin}}
+        origin: 引用来自 'bytecode'（字节码解析成功）、'source'（明文 .lua 按源码提取）或 None
+    sources: {反编译源码路径: {size, mtime_ns, module, refs}}
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, index_path=DEFAULT_INDEX_PATH, xxtea_key=None):
+        self.root = root
+        self.index_path = index_path
+        self.xxtea_key = xxtea_key
+        self.key_id = hashlib.md5(xxtea_key).hexdigest()[:8] if xxtea_key else ''
+        self.files = {}
+        self.sources = {}
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = None
+        # 版本、根目录或密钥变了的旧索引整体作废
+        if (saved and saved.get('version') == INDEX_VERSION and saved.get('root') == root
+                and saved.get('key') == self.key_id):
+            self.files = saved.get('files', {})
+            self.sources = saved.get('sources', {})
+        self._graph = None
+
+    # ---- 增量更新 ----
+
+    def update(self, sources=None):
+        """重新扫描根目录（和可选的反编译源码目录），只解析变化的文件；返回 (重新解析数, 删除数)"""
+        changed, seen = 0, set()
+        for dirpath, _dirs, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith(LUA_SUFFIXES):
+                    continue
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, self.root).replace(os.sep, '/')
+                seen.add(rel)
+                size, mtime_ns = _stat(path)
+                entry = self.files.get(rel)
+                if entry and entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                refs = bytecode_refs(data, self.xxtea_key)
+                origin = 'bytecode' if refs is not None else None
+                if refs is None and name.endswith('.lua'):
+                    refs = source_refs(data.decode('utf-8', errors='replace'))
+                    origin = 'source'
+                self.files[rel] = dict(size=size, mtime_ns=mtime_ns, module=module_name(rel),
+                                       refs=refs or [], parsed=refs is not None, origin=origin)
+                changed += 1
+        removed = [rel for rel in self.files if rel not in seen]
+        for rel in removed:
+            del self.files[rel]
+
+        source_seen = set()
+        if sources and os.path.isdir(sources):
+            for dirpath, _dirs, names in os.walk(sources):
+                for name in names:
+                    if not name.endswith('.lua'):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    source_seen.add(path)
+                    size, mtime_ns = _stat(path)
+                    entry = self.sources.get(path)
+                    if entry and entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+                        continue
+                    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                        refs = source_refs(f.read())
+                    rel = os.path.relpath(path, sources).replace(os.sep, '/')
+                    self.sources[path] = dict(size=size, mtime_ns=mtime_ns, module=module_name(rel), refs=refs)
+                    changed += 1
+        stale = [path for path in self.sources if path not in source_seen]
+        for path in stale:
+            del self.sources[path]
+        self._graph = None
+        return changed, len(removed) + len(stale)
+
+    def save(self):
+        data = dict(version=INDEX_VERSION, root=self.root, key=self.key_id,
+                    files=self.files, sources=self.sources)
+        atomic_write(self.index_path, json.dumps(data, ensure_ascii=False, indent=1,
+                                                 sort_keys=True).encode('utf-8'))
+
+    # ---- 图 ----
+
+    def modules(self):
+        return sorted({entry['module'] for entry in self.files.values()})
+
+    def _suffix_table(self):
+        """模块名的每个点分后缀 -> 模块名列表（最短的优先）"""
+        table = {}
+        for module in self.modules():
+            parts = module.split('.')
+            for i in range(len(parts)):
+                table.setdefault('.'.join(parts[i:]), []).append(module)
+        for candidates in table.values():
+            candidates.sort(key=lambda m: (m.count('.'), m))
+        return table
+
+    def resolve(self, target):
+        """
+        引用 / 模块名 / 路径 -> 索引中的模块名，解析不到返回 None。
+        绝对路径或相对当前目录的路径先换成相对根目录的路径再匹配
+        """
+        if os.path.isabs(target) or os.path.exists(target):
+            rel = os.path.relpath(os.path.abspath(target), os.path.abspath(self.root))
+            if rel != '..' and not rel.startswith('..' + os.sep):
+                target = rel
+        return self._resolve_name(target, self.graph()['suffixes'])
+
+    @staticmethod
+    def _resolve_name(target, table):
+        candidates = table.get(_normalize_target(target))
+        return candidates[0] if candidates else None
+
+    def graph(self):
+        """{'deps': {模块: set}, 'rdeps': {模块: set}, 'suffixes': ...}，文件变化后重新计算"""
+        if self._graph is not None:
+            return self._graph
+        table = self._suffix_table()
+        deps = {module: set() for module in self.modules()}
+        entries = list(self.files.values())
+        for entry in self.sources.values():
+            # 反编译源码按其路径归到根目录下的模块
+            module = self._resolve_name(entry['module'], table)
+            if module is not None:
+                entries.append(dict(entry, module=module))
+        for entry in entries:
+            for ref in entry['refs']:
+                target = self._resolve_name(_absolute_target(ref, entry['module']), table)
+                if target is not None and target != entry['module']:
+                    deps[entry['module']].add(target)
+        rdeps = {module: set() for module in deps}
+        for module, targets in deps.items():
+            for target in targets:
+                rdeps[target].add(module)
+        self._graph = dict(deps=deps, rdeps=rdeps, suffixes=table)
+        return self._graph
+
+    def deps(self, module):
+        return sorted(self.graph()['deps'].get(module, ()))
+
+    def rdeps(self, module):
+        return sorted(self.graph()['rdeps'].get(module, ()))
+
+    def _walk(self, start, edges):
+        """BFS 顺序（近的先出现），不含起点自身"""
+        order, seen, queue = [], {start}, deque([start])
+        while queue:
+            for nxt in sorted(edges.get(queue.popleft(), ())):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    order.append(nxt)
+                    queue.append(nxt)
+        return order
+
+    def closure(self, module):
+        """module 直接或间接依赖的全部模块（按 BFS 距离排序）"""
+        return self._walk(module, self.graph()['deps'])
+
+    def dependents(self, module):
+        """直接或间接依赖 module 的全部模块"""
+        return self._walk(module, self.graph()['rdeps'])
+
+    def paths_of(self, module):
+        """模块对应的文件（相对根目录）"""
+        return sorted(rel for rel, entry in self.files.items() if entry['module'] == module)
+
+
+def build_index(root=DEFAULT_ROOT, sources=DEFAULT_SOURCES, xxtea_key=None, index_path=DEFAULT_INDEX_PATH):
+    """加载索引、增量更新并保存"""
+    index = LuaDepsIndex(root, index_path, xxtea_key)
+    changed, removed = index.update(sources)
+    if changed or removed:
+        index.save()
+    return index, changed, removed
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(name, default=None):
+        if name in args:
+            i = args.index(name)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+
+    root = option('--root', DEFAULT_ROOT)
+    sources = option('--sources', DEFAULT_SOURCES)
+    key = option('--xxtea-key')
+    index, changed, removed = build_index(root, sources, key.encode('utf-8') if key else None)
+
+    graph = index.graph()
+    edges = sum(len(targets) for targets in graph['deps'].values())
+    # 明文 .lua 按源码提取引用，不计入字节码
+    origins = [entry['origin'] for entry in index.files.values()]
+    bytecode, plain = origins.count('bytecode'), origins.count('source')
+    print(f'[+] {len(graph["deps"])} 个模块, {edges} 条依赖边 '
+          f'(重新解析 {changed} 个文件, 删除 {removed} 个; '
+          f'可解析字节码 {bytecode}/{len(origins) - plain}, 明文源码 {plain})')
+    if bytecode < len(origins) - plain and not index.sources:
+        print('    提示: 加密的 .luac 需要 --xxtea-key，或用 --sources 指向反编译源码')
+
+    for target in args:
+        module = index.resolve(target)
+        if module is None:
+            print(f'\n[-] 未知模块: {target}')
+            continue
+        closure = index.closure(module)
+        print(f'\n【{module}】 {", ".join(index.paths_of(module))}')
+        print(f'  依赖 ({len(index.deps(module))}): {", ".join(index.deps(module))}')
+        print(f'  被依赖 ({len(index.rdeps(module))}): {", ".join(index.rdeps(module))}')
+        print(f'  传递闭包 ({len(closure)}):')
+        for dep in closure:
+            print(f'    {dep}')
+
+
+if __name__ == '__main__':
+    main()
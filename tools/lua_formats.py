@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Lua 容器格式注册表
+每种格式声明一个只看文件头的探测函数和一个解码函数；识别一个文件只需读开头几个字节，
+新的游戏包（新的 XXTEA sign 或自定义外壳）用 register_format / register_xxtea_sign 注册即可，
+不需要修改调用方的主循环
+
+用法:
+    fmt = sniff('main.luac')                 # 只读文件头
+    method, plain = fmt.decode(data, key)    # 解出 Lua 字节码 / 源码
+"""
+import os
+from collections import Counter, namedtuple
+
+from lua_crypto import (LUA_SIGNATURES, LUAJIT_SIGNATURE, plaintext_score,
+                        search_payload, xxtea_decrypt)
+from stream_reader import read_header
+
+# 探测时读取的文件头长度（所有 probe 只能看这么多字节）
+HEADER_LEN = 16
+
+# name: 格式名；probe(head) -> bool；decode(data, xxtea_key) -> (method, 明文) / (None, None)
+# encrypted: 是否需要解密（否则原样就是可反编译的字节码）；sign: 加密载荷前的固定前缀
+LuaFormat = namedtuple('LuaFormat', ['name', 'description', 'probe', 'decode', 'encrypted', 'sign'])
+
+_FORMATS = []
+
+
+def register_format(name, probe, decode, description='', encrypted=False, sign=b'', first=False):
+    """注册格式；first=True 时排在已有格式之前（更具体的外壳应先于通用格式探测）"""
+    fmt = LuaFormat(name, description or name, probe, decode, encrypted, sign)
+    if first:
+        _FORMATS.insert(0, fmt)
+    else:
+        _FORMATS.append(fmt)
+    return fmt
+
+
+def formats():
+    return list(_FORMATS)
+
+
+def _passthrough(data, xxtea_key=None):
+    return ('plain', None), data
+
+
+def _signed_decoder(sign, search):
+    """sign + 加密载荷：去掉 sign 后解密"""
+    def decode(data, xxtea_key=None):
+        return search(data[len(sign):], xxtea_key)
+    return decode
+
+
+def _xxtea_only(payload, xxtea_key=None):
+    if xxtea_key is None:
+        return None, None
+    out = xxtea_decrypt(payload, xxtea_key)
+    return (('xxtea', xxtea_key), out) if plaintext_score(out) else (None, None)
+
+
+def register_xxtea_sign(sign, name=None, description=None):
+    """注册一个 cocos2d-x setXXTEAKeyAndSign 的 sign（新游戏包只需这一行）"""
+    if isinstance(sign, str):
+        sign = sign.encode('utf-8')
+    return register_format(
+        name or f'xxtea:{sign.decode("latin-1")}',
+        lambda head: head.startswith(sign),
+        _signed_decoder(sign, _xxtea_only),
+        description or f'XXTEA-signed ({sign!r})',
+        encrypted=True,
+        sign=sign,
+        first=True,
+    )
+
+
+def detect(head):
+    """按注册顺序返回第一个探测成功的格式；都不匹配返回 None"""
+    head = bytes(head[:HEADER_LEN])
+    for fmt in _FORMATS:
+        if fmt.probe(head):
+            return fmt
+    return None
+
+
+def sniff(path):
+    """只读文件头识别格式"""
+    return detect(read_header(path, HEADER_LEN))
+
+
+def classify_tree(root, suffixes=('.luac', '.lua')):
+    """{路径: 格式名}，每个文件一次小读取；无法识别的为 None"""
+    result = {}
+    for dirpath, _dirs, files in os.walk(root):
+        for f in files:
+            if f.endswith(suffixes):
+                path = os.path.join(dirpath, f)
+                fmt = sniff(path)
+                result[path] = fmt.name if fmt else None
+    return result
+
+
+def summarize(classified):
+    """classify_tree 结果按格式计数"""
+    return Counter(name or 'unknown' for name in classified.values())
+
+
+# ---- 内置格式（注册顺序即探测顺序）----
+
+RY_QP_SIGN = b'RY_QP_2016'
+
+register_format(
+    'RY_QP_2016',
+    lambda head: head.startswith(RY_QP_SIGN),
+    _signed_decoder(RY_QP_SIGN, search_payload),
+    'RY_QP_2016 (XXTEA sign; XOR / base64 / DEFLATE fallbacks)',
+    encrypted=True,
+    sign=RY_QP_SIGN,
+)
+
+# cocos2d-x 模板工程的默认 sign
+register_format(
+    'xxtea',
+    lambda head: head.startswith(b'XXTEA'),
+    _signed_decoder(b'XXTEA', _xxtea_only),
+    'XXTEA-signed (cocos2d-x default sign)',
+    encrypted=True,
+    sign=b'XXTEA',
+)
+
+register_format(
+    'luajit',
+    lambda head: head.startswith(LUAJIT_SIGNATURE),
+    _passthrough,
+    'LuaJIT bytecode',
+)
+
+for _signature in LUA_SIGNATURES:
+    _version = _signature[4] - 0x50
+    register_format(
+        f'lua5{_version}',
+        lambda head, sig=_signature: head.startswith(sig),
+        _passthrough,
+        f'Lua 5.{_version} bytecode',
+    )
@@ -5,6 +5,8 @@ AndroidManifest 权限与组件分析
 import re
 import struct
 
+import axml
+
 def parse_android_manifest_binary(manifest_path):
     """
     解析二进制 AndroidManifest.xml
@@ -59,6 +61,32 @@ def analyze_manifest_permissions(strings):
     
     return result
 
+def analyze_manifest_structured(summary):
+    """把 axml.summarize_manifest 的结构化结果整理成与 analyze_manifest_permissions 相同的格式"""
+    result = {
+        'package_name': summary['package_name'],
+        'permissions': list(summary['permissions']),
+        'exported_activities': [],
+        'exported_services': [],
+        'exported_receivers': [],
+        'providers': [],
+        'target_sdk': summary['target_sdk'],
+        'min_sdk': summary['min_sdk'],
+        'debuggable': summary['debuggable'],
+    }
+    buckets = {
+        'activity': 'exported_activities',
+        'activity-alias': 'exported_activities',
+        'service': 'exported_services',
+        'receiver': 'exported_receivers',
+    }
+    for comp in summary['components']:
+        if comp['type'] == 'provider':
+            result['providers'].append(comp['name'])
+        elif comp['exported']:
+            result[buckets[comp['type']]].append(comp['name'])
+    return result
+
 def categorize_permissions(permissions):
     """按风险等级分类权限"""
     dangerous = {
@@ -100,9 +128,13 @@ print("=" * 80)
 
 manifest_path = 'apk_unzip/AndroidManifest.xml'
 print(f"\n[*] 解析 {manifest_path}...")
-strings = parse_android_manifest_binary(manifest_path)
-
-manifest_info = analyze_manifest_permissions(strings)
+try:
+    # 按 AXML chunk 结构解码，权限与组件归属准确
+    manifest_info = analyze_manifest_structured(axml.parse_manifest(manifest_path))
+except axml.AXMLError:
+    # 非标准格式：退回字符串启发式
+    strings = parse_android_manifest_binary(manifest_path)
+    manifest_info = analyze_manifest_permissions(strings)
 
 print("\n【基本信息】")
 print(f"  包名: {manifest_info['package_name'] or 'N/A'}")
@@ -127,6 +159,14 @@ if perms['sensitive']:
 
 print(f"\n  ℹ️  【其他权限】{len(perms['other'])} 个")
 
+print("\n【导出组件】")
+for key, label in (('exported_activities', 'Activity'), ('exported_services', 'Service'),
+                   ('exported_receivers', 'Receiver')):
+    for name in manifest_info[key]:
+        print(f"  ⚠️  [{label}] {name}")
+for name in manifest_info['providers']:
+    print(f"  ℹ️  [Provider] {name}")
+
 # 扫描风险权限组合
 print("\n【权限风险评估】")
 risk_combos = {
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+镜像输出目录
+输出写到与输入目录结构相同的独立目录中，不污染源目录；
+每个输出都以临时文件 + os.replace 原子落盘，并在清单中记录输入哈希与解码器版本，
+重跑时输入未变、版本相同且输出仍在的文件直接跳过
+
+用法:
+    tree = MirrorTree('decompiled/lua_extracted', 'decompiled/lua_decrypted', version='3')
+    digest = file_md5(src)
+    if not tree.is_fresh(src, digest):
+        atomic_write(tree.target(src), data)
+        tree.stamp(src, digest)
+    tree.save()
+"""
+import json
+import os
+import tempfile
+
+from result_cache import file_md5
+
+MANIFEST_NAME = '.stamps.json'
+
+
+def atomic_write(path, data):
+    """先写同目录下的临时文件再 os.replace，中途中断不会留下半个输出"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class MirrorTree:
+    """src_root 下的文件映射到 out_root 下的同名相对路径，清单保存在 out_root/.stamps.json"""
+
+    def __init__(self, src_root, out_root, version):
+        self.src_root = os.path.abspath(src_root)
+        self.out_root = out_root
+        self.version = str(version)
+        self.manifest_path = os.path.join(out_root, MANIFEST_NAME)
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.stamps = json.load(f)
+        except (OSError, ValueError):
+            self.stamps = {}
+
+    def rel(self, src_path):
+        return os.path.relpath(os.path.abspath(src_path), self.src_root).replace(os.sep, '/')
+
+    def target(self, src_path, suffix=None):
+        """镜像目录中的输出路径；suffix 给出时替换扩展名（如 '.lua'）"""
+        rel = self.rel(src_path)
+        if suffix is not None:
+            rel = os.path.splitext(rel)[0] + suffix
+        return os.path.join(self.out_root, *rel.split('/'))
+
+    def is_fresh(self, src_path, digest):
+        """输入哈希与解码器版本都与记录一致，且输出文件仍然存在"""
+        stamp = self.stamps.get(self.rel(src_path))
+        return (stamp is not None and stamp['md5'] == digest and stamp['version'] == self.version
+                and os.path.exists(os.path.join(self.out_root, *stamp['output'].split('/'))))
+
+    def stamp(self, src_path, digest, output=None, **extra):
+        """记录一次成功输出；output 默认为 target(src_path)"""
+        output = output or self.target(src_path)
+        self.stamps[self.rel(src_path)] = dict(
+            extra,
+            md5=digest,
+            version=self.version,
+            output=os.path.relpath(output, self.out_root).replace(os.sep, '/'),
+        )
+
+    def forget(self, src_path):
+        self.stamps.pop(self.rel(src_path), None)
+
+    def prune(self, src_paths):
+        """删除已不存在的输入对应的输出与记录，返回删除数"""
+        keep = {self.rel(p) for p in src_paths}
+        removed = 0
+        for rel in [r for r in self.stamps if r not in keep]:
+            output = os.path.join(self.out_root, *self.stamps.pop(rel)['output'].split('/'))
+            try:
+                os.unlink(output)
+            except OSError:
+                pass
+            removed += 1
+        return removed
+
+    def save(self):
+        atomic_write(self.manifest_path,
+                     json.dumps(self.stamps, ensure_ascii=False, indent=1, sort_keys=True).encode('utf-8'))
+
+
+def digest_files(paths):
+    """{路径: md5}；读不了的文件不出现在结果中"""
+    digests = {}
+    for path in paths:
+        try:
+            digests[path] = file_md5(path)
+        except OSError:
+            pass
+    return digests
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Multidex 支持
+发现 APK 解压目录中的 classes.dex、classes2.dex ... classesN.dex，
+每个 DEX 交给独立的工作进程分析，结果按 DEX 序号确定性地返回
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# 各工具历来使用的解压目录，按顺序查找
+DEFAULT_DEX_ROOTS = ['apk_unzip', 'decompiled/extracted']
+
+_DEX_NAME = re.compile(r'^classes(\d*)\.dex$')
+
+
+def dex_ordinal(name):
+    """classes.dex -> 1, classes2.dex -> 2；不是主 DEX 命名的返回 None"""
+    m = _DEX_NAME.match(os.path.basename(name))
+    if not m:
+        return None
+    return int(m.group(1)) if m.group(1) else 1
+
+
+def find_dex_files(root=None):
+    """
+    列出目录下的全部 classesN.dex，按序号排序。
+    root 为 None 时依次尝试 DEFAULT_DEX_ROOTS，返回第一个含 DEX 的目录的结果
+    """
+    roots = [root] if root else DEFAULT_DEX_ROOTS
+    for r in roots:
+        if not os.path.isdir(r):
+            continue
+        found = [(dex_ordinal(f), os.path.join(r, f)) for f in os.listdir(r)]
+        found = sorted((n, p) for n, p in found if n is not None and os.path.isfile(p))
+        if found:
+            return [p for _, p in found]
+    return []
+
+
+def map_dex(func, dex_paths, workers=None):
+    """
+    对每个 DEX 调用 func(path)，返回 [(path, 结果)]，顺序与 dex_paths 一致。
+    只有一个 DEX 时直接在当前进程执行，避免进程池开销。
+    func 必须是模块级函数（需要能被 pickle 传给子进程）
+    """
+    dex_paths = list(dex_paths)
+    if len(dex_paths) <= 1:
+        return [(p, func(p)) for p in dex_paths]
+    workers = min(workers or os.cpu_count() or 1, len(dex_paths))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(zip(dex_paths, pool.map(func, dex_paths)))
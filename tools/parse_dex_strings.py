@@ -1,18 +1,24 @@
 import re
 
-p='apk_unzip/classes.dex'
-with open(p,'rb') as f:
-    b=f.read()
+import stream_reader
+from multidex import find_dex_files, map_dex
 
-parts=re.findall(b'([A-Za-z0-9_\./\$]{4,200})',b)
-found=[]
-for p in parts:
-    s=p.decode('utf-8',errors='ignore')
-    if '.' in s and '/' not in s and '$' not in s:
-        found.append(s)
-    elif '/' in s and '.' in s:
-        found.append(s)
+def scan_dex(path):
+    found=set()
+    for _,part in stream_reader.finditer(path,re.compile(b'[A-Za-z0-9_\\./\\$]{4,200}'),overlap=200):
+        s=part.decode('utf-8',errors='ignore')
+        if '.' in s and '/' not in s and '$' not in s:
+            found.add(s)
+        elif '/' in s and '.' in s:
+            found.add(s)
+    return found
 
-# Heuristic filter: package-like strings (contain package separators)
-cand=[x for x in set(found) if x.count('.')>=1 and len(x.split('.')[-1])>0]
-print('\n'.join(sorted(cand)[:200]))
+if __name__=='__main__':
+    # 每个 classesN.dex 一个工作进程，结果按 DEX 顺序合并
+    found=set()
+    for _,part in map_dex(scan_dex,find_dex_files()):
+        found|=part
+
+    # Heuristic filter: package-like strings (contain package separators)
+    cand=[x for x in found if x.count('.')>=1 and len(x.split('.')[-1])>0]
+    print('\n'.join(sorted(cand)[:200]))
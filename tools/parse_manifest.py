@@ -1,19 +1,52 @@
+import os
 import re
+import xml.etree.ElementTree as ET
+
+import arsc
+import axml
 
 p = 'apk_unzip/AndroidManifest.xml'
 with open(p, 'rb') as f:
     b = f.read()
 
-# 找到所有可打印 ASCII / 常见 UTF-8 片段
-parts = re.findall(b'([\x20-\x7E]{4,})', b)
-
-interesting = []
-for p in parts:
-    s = p.decode('utf-8', errors='ignore')
-    if any(k in s for k in ['package', 'uses-permission', 'activity', 'service', 'receiver', 'android:label', 'android:exported', 'application']):
-        interesting.append(s)
+if axml.is_axml(b):
+    # 二进制 AXML：解码出完整元素树（字符串池、资源映射、元素 chunk）
+    # 有 resources.arsc 时把 @0x7f... 引用解析成 @string/app_name 形式
+    table = None
+    if os.path.exists('apk_unzip/resources.arsc'):
+        try:
+            table = arsc.ResourceTable('apk_unzip/resources.arsc')
+        except arsc.ArscError:
+            pass
+    try:
+        root = axml.parse(b, table.reference if table else None)
+    finally:
+        if table:
+            table.close()
+    ET.indent(root)
+    print(ET.tostring(root, encoding='unicode'))
 
-if interesting:
-    print('\n'.join(sorted(set(interesting))))
+    info = axml.summarize_manifest(root)
+    print()
+    print(f"package: {info['package_name']}  minSdk: {info['min_sdk']}  targetSdk: {info['target_sdk']}")
+    print(f"permissions ({len(info['permissions'])}):")
+    for perm in info['permissions']:
+        print(f"  {perm}")
+    print(f"components ({len(info['components'])}):")
+    for comp in info['components']:
+        flag = 'exported' if comp['exported'] else 'private'
+        print(f"  [{comp['type']}] {comp['name']} ({flag})")
 else:
-    print('No interesting strings found')
+    # 找到所有可打印 ASCII / 常见 UTF-8 片段
+    parts = re.findall(b'([\x20-\x7E]{4,})', b)
+
+    interesting = []
+    for p in parts:
+        s = p.decode('utf-8', errors='ignore')
+        if any(k in s for k in ['package', 'uses-permission', 'activity', 'service', 'receiver', 'android:label', 'android:exported', 'application']):
+            interesting.append(s)
+
+    if interesting:
+        print('\n'.join(sorted(set(interesting))))
+    else:
+        print('No interesting strings found')
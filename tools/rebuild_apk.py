@@ -12,11 +12,12 @@ import os
 import sys
 import zipfile
 import shutil
-import subprocess
 import json
 from pathlib import Path
 from datetime import datetime
 
+from tool_runner import ToolJob, ToolRunner, input_size
+
 class APKRebuilder:
     def __init__(self):
         self.base_dir = os.getcwd()
@@ -27,6 +28,9 @@ class APKRebuilder:
         self.output_apk = "base_modified.apk"
         self.signed_apk = "base_modified-signed.apk"
         self.keystore_file = "debug.keystore"
+        # luac 很轻，按核数并发；签名工具逐个运行但同样有超时、重试和输出回显
+        self.runner = ToolRunner(mem_mb=64)
+        self.sign_runner = ToolRunner(workers=1, echo=True)
     
     def print_header(self, title):
         print("\n" + "=" * 80)
@@ -52,33 +56,33 @@ class APKRebuilder:
         print(f"📦 输出目录: {luac_output_dir}")
         print("💡 编译过程会覆盖原始 .luac 文件")
         
-        success_count = 0
-        failed_count = 0
-        
+        jobs = []
         for lua_file in lua_files:
             rel_path = lua_file.relative_to(self.lua_modified)
             # 对应的 .luac 文件
             luac_path = os.path.join(self.extracted_dir, str(rel_path).replace(".lua", ".luac"))
-            luac_dir = os.path.dirname(luac_path)
-            
-            print(f"  编译: {rel_path}")
-            
-            # 尝试编译 Lua
-            try:
-                # 使用 Python 的 Lua 编译器或调用 luac
-                cmd = ["luac", "-o", luac_path, str(lua_file)]
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                
-                if result.returncode == 0:
-                    print(f"      ✅ -> {os.path.basename(luac_path)}")
-                    success_count += 1
-                else:
-                    # luac 不可用，使用原始版本
-                    print(f"      ⚠️  luac 不可用，保留原始版本")
-                    success_count += 1
-            except Exception as e:
-                print(f"      ⚠️  编译失败: {e}")
-                failed_count += 1
+            os.makedirs(os.path.dirname(luac_path), exist_ok=True)
+            jobs.append(ToolJob(["luac", "-o", luac_path, str(lua_file)],
+                                name=str(rel_path), size=input_size(lua_file)))
+        
+        print(f"🚀 并发编译: {self.runner.workers} 个进程")
+        counts = {"success": 0, "failed": 0}
+        
+        def report(result):
+            print(f"  编译: {result.job.name}")
+            if result.status == "OK":
+                print(f"      ✅ -> {os.path.basename(result.job.cmd[2])}")
+                counts["success"] += 1
+            elif result.status == "FAIL":
+                # luac 不可用，使用原始版本
+                print(f"      ⚠️  luac 不可用，保留原始版本")
+                counts["success"] += 1
+            else:
+                print(f"      ⚠️  编译失败: {result.status} ({result.timeout:.0f}s)")
+                counts["failed"] += 1
+        
+        self.runner.run_all(jobs, on_done=report)
+        success_count, failed_count = counts["success"], counts["failed"]
         
         print(f"\n编译完成: {success_count} 成功, {failed_count} 失败")
         return success_count > 0 or failed_count == 0
@@ -158,9 +162,9 @@ class APKRebuilder:
                 "-dname", "CN=Debug,OU=APK Modifier,O=Local,L=Local,ST=Local,C=CN"
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = self.sign_runner.run(cmd, name="keytool")
             
-            if result.returncode == 0:
+            if result.status == "OK":
                 print(f"✅ 密钥库已创建")
                 return True
             else:
@@ -189,7 +193,7 @@ class APKRebuilder:
             # 首先检查 APK 是否需要对齐
             if os.path.exists("zipalign"):
                 cmd_align = ["zipalign", "-v", "4", self.output_apk, self.output_apk + ".aligned"]
-                subprocess.run(cmd_align, capture_output=True)
+                self.sign_runner.run(cmd_align, name="zipalign", size=input_size(self.output_apk))
                 if os.path.exists(self.output_apk + ".aligned"):
                     os.replace(self.output_apk + ".aligned", self.output_apk)
                     print("✅ APK 已对齐")
@@ -206,9 +210,9 @@ class APKRebuilder:
                 "debug_key"
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = self.sign_runner.run(cmd, name="jarsigner", size=input_size(self.output_apk))
             
-            if result.returncode == 0:
+            if result.status == "OK":
                 # 复制为已签名版本
                 shutil.copy(self.output_apk, self.signed_apk)
                 print(f"✅ APK 已签名")
@@ -220,8 +224,9 @@ class APKRebuilder:
                     "jarsigner", "-verify", "-verbose",
                     self.signed_apk
                 ]
-                verify_result = subprocess.run(cmd_verify, capture_output=True, text=True)
-                if "jar verified" in verify_result.stderr:
+                verify_result = self.sign_runner.run(cmd_verify, name="verify",
+                                                     size=input_size(self.signed_apk))
+                if "jar verified" in verify_result.stdout + verify_result.stderr:
                     print("✅ 签名有效")
                 
                 return True
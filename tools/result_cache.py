@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+按内容哈希缓存分析结果
+键为 (分析器名, 分析器版本, 文件 MD5)，内容没变的文件重跑时直接取缓存；
+文件哈希本身也按 (路径, 大小, mtime) 记住，重跑时连哈希都不必重算。
+client_zip 自带的 filemd5List.json 可作为可信哈希来源（注意：列表可能与磁盘内容不一致，
+例如文本资源换行符被转换过，因此由调用方显式开启）
+"""
+import hashlib
+import json
+import os
+import sqlite3
+
+DEFAULT_CACHE_PATH = '.analysis_cache/results.sqlite'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    analyzer TEXT NOT NULL,
+    version  TEXT NOT NULL,
+    digest   TEXT NOT NULL,
+    result   TEXT NOT NULL,
+    PRIMARY KEY (analyzer, version, digest)
+);
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest   TEXT NOT NULL
+);
+'''
+
+
+def file_md5(path, block_size=1024 * 1024):
+    """流式计算文件 MD5"""
+    h = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_md5_list(json_path):
+    """
+    读取 filemd5List.json，返回 {磁盘路径: md5}。
+    条目的 path 相对于资源包根目录（如 client/res/），从 json 所在目录向上找到该根目录
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f).get('listdata', [])
+    if not entries:
+        return {}
+    base = os.path.dirname(os.path.abspath(json_path))
+    probe = entries[0]
+    while True:
+        if os.path.exists(os.path.join(base, probe['path'], probe['name'])):
+            break
+        parent = os.path.dirname(base)
+        if parent == base:
+            return {}
+        base = parent
+    return {
+        os.path.normpath(os.path.join(base, e['path'], e['name'])): e['md5'].lower()
+        for e in entries if e.get('md5')
+    }
+
+
+class ResultCache:
+    """
+    用法:
+        cache = ResultCache()
+        cache.trust_md5_lists('apk_unzip/assets/base/res/client_zip')
+        risks = cache.cached('lua_analysis', '1', analyze_lua_file, path)
+        cache.close()
+    path 传 ':memory:' 即不落盘（等同关闭缓存）
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+        self._trusted = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def trust_md5_list(self, json_path):
+        """把 filemd5List.json 中的 MD5 作为这些文件的哈希，不再读文件计算"""
+        self._trusted.update(load_md5_list(json_path))
+
+    def trust_md5_lists(self, root):
+        """信任 root 下所有 filemd5List.json"""
+        for dirpath, _dirs, files in os.walk(root):
+            if 'filemd5List.json' in files:
+                self.trust_md5_list(os.path.join(dirpath, 'filemd5List.json'))
+
+    def digest(self, path):
+        """文件内容的 MD5：可信列表 > 按 (大小, mtime) 记住的旧值 > 重新计算"""
+        key = os.path.normpath(os.path.abspath(path))
+        trusted = self._trusted.get(key)
+        if trusted:
+            return trusted
+        st = os.stat(path)
+        row = self.db.execute(
+            'SELECT digest FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?',
+            (key, st.st_size, st.st_mtime_ns)).fetchone()
+        if row:
+            return row[0]
+        digest = file_md5(path)
+        self.db.execute('INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)',
+                        (key, st.st_size, st.st_mtime_ns, digest))
+        return digest
+
+    def get(self, analyzer, version, digest):
+        """取缓存结果；未命中返回 None"""
+        row = self.db.execute(
+            'SELECT result FROM results WHERE analyzer = ? AND version = ? AND digest = ?',
+            (analyzer, version, digest)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, analyzer, version, digest, result):
+        """结果必须可 JSON 序列化"""
+        self.db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                        (analyzer, version, digest, json.dumps(result, ensure_ascii=False)))
+
+    def split(self, analyzer, version, paths):
+        """
+        批量查询: 返回 (命中 {path: 结果}, 未命中 [path])。
+        未命中的文件交给调度器并行分析，结果再用 store() 写回
+        """
+        hits, misses = {}, []
+        for path in paths:
+            try:
+                result = self.get(analyzer, version, self.digest(path))
+            except OSError:
+                result = None
+            if result is None:
+                misses.append(path)
+            else:
+                hits[path] = result
+        self.hits += len(hits)
+        self.misses += len(misses)
+        return hits, misses
+
+    def store(self, analyzer, version, path, result):
+        """按 path 的内容哈希写回结果；None 或文件已不可读时不写"""
+        if result is None:
+            return
+        try:
+            digest = self.digest(path)
+        except OSError:
+            return
+        self.put(analyzer, version, digest, result)
+
+    def cached(self, analyzer, version, func, path):
+        """返回 func(path) 的结果，内容未变时直接取缓存；func 返回 None 时不缓存"""
+        try:
+            digest = self.digest(path)
+        except OSError:
+            return func(path)
+        result = self.get(analyzer, version, digest)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = func(path)
+        if result is not None:
+            self.put(analyzer, version, digest, result)
+        return result
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+多关键词单遍扫描引擎
+先一次性提取可见 ASCII 片段，再用一个组合正则同时匹配所有关键词，
+供 search_secrets.py / lua_analysis.py / dex_analysis.py 共用
+"""
+import re
+from collections import namedtuple
+
+from stream_reader import MappedFile
+
+# 一次命中: 关键词、关键词在文件中的字节偏移、所在的可见字符串片段
+Hit = namedtuple('Hit', ['keyword', 'offset', 'text'])
+
+
+def printable_pattern(min_len=4, max_len=200):
+    """可见 ASCII 片段的正则（与各脚本原先的 [ -~]{4,200} 一致）"""
+    return re.compile(b'[ -~]{%d,%d}' % (min_len, max_len))
+
+
+def iter_printable(data, min_len=4, max_len=200, base_offset=0):
+    """逐个产出 (偏移, 片段字节)，整个缓冲区只扫描一遍"""
+    for m in printable_pattern(min_len, max_len).finditer(data):
+        yield base_offset + m.start(), m.group()
+
+
+def printable_strings(data, min_len=4, max_len=200):
+    """提取可见字符串列表（解码为 str）"""
+    return [run.decode('utf-8', errors='ignore')
+            for _, run in iter_printable(data, min_len, max_len)]
+
+
+class KeywordScanner:
+    """
+    所有关键词编译成一个组合正则，一遍扫描即可得到全部命中。
+
+    关键词按长度降序放进零宽前瞻 (?=(...))，因此每个位置都会报告最长的
+    关键词；以它为前缀的较短关键词（如 https 之于 http）通过预先计算的
+    前缀表补齐，效果等同 Aho-Corasick：所有关键词的所有出现都会被报告。
+    """
+
+    def __init__(self, keywords, ignore_case=True, min_len=4, max_len=200):
+        self.ignore_case = ignore_case
+        self.min_len = min_len
+        self.max_len = max_len
+        self.keywords = []
+        for k in keywords:
+            if isinstance(k, str):
+                k = k.encode('utf-8')
+            k = k.lower() if ignore_case else k
+            if k and k not in self.keywords:
+                self.keywords.append(k)
+
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        alternation = b'|'.join(re.escape(k) for k in ordered)
+        flags = re.IGNORECASE if ignore_case else 0
+        self._regex = re.compile(b'(?=(' + alternation + b'))', flags)
+        self._runs = printable_pattern(min_len, max_len)
+
+        # 每个关键词 -> 同一位置上也必然命中的关键词（自身 + 其前缀）
+        self._implied = {
+            k: [p for p in self.keywords if k.startswith(p)]
+            for k in self.keywords
+        }
+
+    def _key(self, matched):
+        return matched.lower() if self.ignore_case else matched
+
+    def scan(self, data, base_offset=0):
+        """扫描缓冲区，产出 Hit；偏移为 base_offset + 缓冲区内偏移"""
+        return self._match_runs(self._runs.finditer(data), base_offset)
+
+    def _match_runs(self, run_matches, base_offset=0):
+        for m in run_matches:
+            run = m.group()
+            text = None
+            for km in self._regex.finditer(run):
+                if text is None:
+                    text = run.decode('utf-8', errors='ignore')
+                offset = base_offset + m.start() + km.start()
+                for k in self._implied[self._key(km.group(1))]:
+                    yield Hit(k.decode('utf-8', errors='ignore'), offset, text)
+
+    def scan_file(self, path):
+        """扫描单个文件，返回 Hit 列表；文件无法读取时返回 None"""
+        try:
+            with MappedFile(path) as mf:
+                runs = mf.finditer(self._runs, overlap=self.max_len)
+                return list(self._match_runs(runs))
+        except OSError:
+            return None
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+文件扫描调度器
+I/O 线程池负责读文件，进程池负责正则等 CPU 工作，大文件优先调度；
+同时在途的文件数有上限，结果按完成顺序流式产出，内存占用不随文件数增长
+
+用法:
+    for path, result in scan_files(paths, analyze):   # analyze(path, data)
+        ...
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+
+def read_bytes(path):
+    """默认读取函数；读不了的文件返回 None（调度器跳过）"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def largest_first(paths):
+    """按文件大小降序：大文件先开始，避免最后剩一个大文件拖住整个扫描"""
+    return sorted(paths, key=_size, reverse=True)
+
+
+def walk_files(base_path, suffixes=None):
+    """os.walk 收集文件路径；suffixes 为后缀元组（如 ('.lua', '.luac')）时只保留匹配的"""
+    paths = []
+    for root, _dirs, files in os.walk(base_path):
+        for f in files:
+            if suffixes is None or f.endswith(suffixes):
+                paths.append(os.path.join(root, f))
+    return paths
+
+
+def scan_files(paths, analyze, read=read_bytes, io_workers=None, cpu_workers=None, max_pending=None):
+    """
+    对每个文件调用 analyze(path, data)，按完成顺序产出 (path, 结果)。
+    read(path) 在线程池中执行，返回 None 的文件跳过；
+    analyze 在进程池中执行，必须是模块级函数（需要能被 pickle 传给子进程），
+    调用它的脚本也必须有 if __name__ == '__main__' 保护。
+    只有一个 CPU 或一个文件时直接在当前进程执行
+    """
+    paths = largest_first(paths)
+    cpu_workers = cpu_workers or os.cpu_count() or 1
+    if cpu_workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            data = read(path)
+            if data is not None:
+                yield path, analyze(path, data)
+        return
+
+    io_workers = io_workers or min(32, cpu_workers * 2)
+    max_pending = max_pending or cpu_workers * 4
+    pending_paths = iter(paths)
+    reading = {}
+    analyzing = {}
+    io_pool = ThreadPoolExecutor(max_workers=io_workers)
+    cpu_pool = ProcessPoolExecutor(max_workers=cpu_workers)
+    try:
+        def fill():
+            while len(reading) + len(analyzing) < max_pending:
+                path = next(pending_paths, None)
+                if path is None:
+                    return
+                reading[io_pool.submit(read, path)] = path
+
+        fill()
+        while reading or analyzing:
+            done, _ = wait(set(reading) | set(analyzing), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in reading:
+                    path = reading.pop(future)
+                    data = future.result()
+                    if data is not None:
+                        analyzing[cpu_pool.submit(analyze, path, data)] = path
+                else:
+                    yield analyzing.pop(future), future.result()
+            fill()
+    finally:
+        # 调用方提前停止迭代时，丢弃尚未开始的任务
+        io_pool.shutdown(wait=True, cancel_futures=True)
+        cpu_pool.shutdown(wait=True, cancel_futures=True)
@@ -1,11 +1,13 @@
 import re
 
+from stream_reader import MappedFile
+
 for fn in ['apk_unzip/AndroidManifest.xml','apk_unzip/classes.dex']:
     print('===',fn)
-    b=open(fn,'rb').read()
-    for m in re.finditer(b'package',b):
-        start=max(0,m.start()-120)
-        end=min(len(b),m.end()+120)
-        s=b[start:end].replace(b'\x00',b'.')
-        print(s.decode('utf-8',errors='ignore'))
-    print()
\ No newline at end of file
+    with MappedFile(fn) as mf:
+        for m in mf.finditer(re.compile(b'package')):
+            start=max(0,m.start()-120)
+            end=min(mf.size,m.end()+120)
+            s=mf.read(start,end-start).replace(b'\x00',b'.')
+            print(s.decode('utf-8',errors='ignore'))
+    print()
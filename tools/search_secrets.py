@@ -1,27 +1,39 @@
-import os, re
+import sys
 
-paths=['apk_unzip/classes.dex']
-for root,dirs,files in os.walk('apk_unzip/assets'):
-    for f in files:
-        paths.append(os.path.join(root,f))
+from apk_vfs import open_source
+from multidex import dex_ordinal
+from scan_engine import KeywordScanner
 
 keywords=[b'http',b'https',b'api',b'url',b'token',b'secret',b'key',b'appid',b'wxapi',b'wx',b'wechat',b'password',b'passwd',b'signature']
 
-results={}
-for p in paths:
-    try:
-        b=open(p,'rb').read()
-    except:
-        continue
-    for k in keywords:
-        if re.search(k, b, re.IGNORECASE):
-            # extract surrounding printable sequences
-            parts=re.findall(b'([ -~]{4,200})',b)
-            lines=[part.decode('utf-8','ignore') for part in parts if re.search(k, part, re.IGNORECASE)]
-            results[p]=results.get(p,[])+lines
+# 每个文件只扫描一遍：可见片段提取一次，所有关键词一个组合正则匹配
+scanner=KeywordScanner(keywords)
 
-for p,lines in results.items():
+# 可以直接传 APK 文件（不解压，按需读取成员），默认扫描已解压的 apk_unzip
+source=sys.argv[1] if len(sys.argv)>1 else 'apk_unzip'
+with open_source(source) as fs:
+    paths=sorted((n for n in fs.namelist() if '/' not in n and dex_ordinal(n)),key=dex_ordinal)
+    for root,dirs,files in fs.walk('assets'):
+        for f in files:
+            paths.append(f'{root}/{f}')
+
+    results={}
+    for p in paths:
+        local=fs.local_path(p)
+        hits=scanner.scan_file(local) if local else list(scanner.scan(fs.view(p)))
+        if hits:
+            results[p]=hits
+
+for p,hits in results.items():
     print('---',p)
-    for ln in lines[:20]:
-        print(ln)
+    seen=set()
+    shown=0
+    for h in hits:
+        if h.text in seen:
+            continue
+        seen.add(h.text)
+        print(f'[{h.keyword} @0x{h.offset:x}] {h.text}')
+        shown+=1
+        if shown>=20:
+            break
     print()
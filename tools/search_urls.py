@@ -1,10 +1,26 @@
-import re,os
-for root,dirs,files in os.walk('apk_unzip/assets/base/res/client_zip'):
-    for f in files:
-        p=os.path.join(root,f)
-        try:
-            b=open(p,'rb').read()
-        except:
-            continue
-        for m in re.findall(b'(https?://[\w\-\./:%?&=~#\+]+)', b, flags=re.IGNORECASE):
-            print(p, m.decode('utf-8',errors='ignore'))
+import re,sys
+from result_cache import ResultCache
+from scan_scheduler import scan_files, walk_files
+
+ANALYZER_VERSION='1'
+URL_RE=re.compile(b'(https?://[\w\-\./:%?&=~#\+]+)', re.IGNORECASE)
+
+def find_urls(p, b):
+    return [m.decode('utf-8',errors='ignore') for m in URL_RE.findall(b)]
+
+if __name__=='__main__':
+    base='apk_unzip/assets/base/res/client_zip'
+    # 结果按文件内容哈希缓存；--trust-md5list 时直接用 client_zip 自带的 filemd5List.json 作哈希来源
+    cache=ResultCache()
+    if '--trust-md5list' in sys.argv:
+        cache.trust_md5_lists(base)
+    paths=walk_files(base)
+    results,misses=cache.split('search_urls',ANALYZER_VERSION,paths)
+    # 未命中的文件交给调度器：线程池读取、进程池匹配，大文件优先
+    for p,urls in scan_files(misses,find_urls):
+        cache.store('search_urls',ANALYZER_VERSION,p,urls)
+        results[p]=urls
+    cache.close()
+    for p in paths:
+        for url in results.get(p) or []:
+            print(p, url)
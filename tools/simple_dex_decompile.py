@@ -3,6 +3,9 @@
 """
 DEX to Java Decompiler (Simplified)
 Uses local dex2jar and finds available decompiler
+
+Quick triage without Java: disassemble single classes to smali in-process
+    python tools/simple_dex_decompile.py --smali com.example.Foo [com.example.sub.*] [--out decompiled/smali]
 """
 
 import os
@@ -11,6 +14,9 @@ import subprocess
 from pathlib import Path
 import json
 
+from dex_parser import DexFile, DexFormatError
+from smali import disassemble, disassemble_class, to_descriptor
+
 def find_dex2jar():
     """Find dex2jar installation"""
     possible_paths = [
@@ -76,6 +82,43 @@ def run_dex2jar(dex_file, dex2jar_dir):
         print(f"[Error] Exception: {e}")
         return False
 
+def smali_classes(dex, patterns):
+    """Yield (descriptor, smali text) for exact class names or package.* patterns"""
+    exact = [p for p in patterns if not p.endswith(("*", "."))]
+    prefixes = [to_descriptor(p.rstrip("*").rstrip("."))[:-1] + "/" for p in patterns if p not in exact]
+    for name in exact:
+        yield to_descriptor(name), disassemble(dex, name)
+    if prefixes:
+        # Package patterns have to look at every class_def, but only the matching ones are decoded
+        for class_def in dex.iter_class_defs():
+            descriptor = dex.type_descriptor(class_def.class_idx)
+            if descriptor.startswith(tuple(prefixes)):
+                yield descriptor, disassemble_class(dex, class_def)
+
+def disassemble_to_smali(dex_file, patterns, output_dir=None):
+    """Disassemble the requested classes in-process (no dex2jar, no JVM)"""
+    try:
+        dex = DexFile(dex_file)
+    except (OSError, DexFormatError) as e:
+        print(f"[Error] Cannot open {dex_file}: {e}")
+        return 0
+    count = 0
+    with dex:
+        for descriptor, text in smali_classes(dex, patterns):
+            if text is None:
+                print(f"[Warning] Class not found: {descriptor}")
+                continue
+            count += 1
+            if output_dir is None:
+                print(text)
+                continue
+            path = os.path.join(output_dir, *descriptor[1:-1].split("/")) + ".smali"
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            print(f"[OK] {descriptor} -> {path}")
+    return count
+
 def create_summary_report():
     """Create a summary report"""
     print("\n" + "="*80)
@@ -98,6 +141,8 @@ def create_summary_report():
     print(f"  Next step: Manual Java decompilation required")
     
     print(f"\n[Options to Continue]")
+    print(f"\n0. In-process smali (no Java needed):")
+    print(f"   - Command: python tools/simple_dex_decompile.py --smali com.example.Foo")
     print(f"\n1. Online Decompiler (QuickBytez):")
     print(f"   - Visit: https://www.quickbytez.com/showcase/android/apk-decompiler")
     print(f"   - Upload: {dex_file}")
@@ -125,12 +170,32 @@ def main():
     print("[DEX to Java Decompiler - Simplified Edition]")
     print("="*80 + "\n")
     
-    dex_file = "decompiled/extracted/classes.dex"
+    args = sys.argv[1:]
+    
+    def option(name, default=None):
+        if name in args:
+            i = args.index(name)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+    
+    dex_file = option("--dex", "decompiled/extracted/classes.dex")
+    output_dir = option("--out")
     
     if not os.path.exists(dex_file):
         print(f"[Error] DEX file not found: {dex_file}")
         return
     
+    if "--smali" in args:
+        patterns = [a for a in args if a != "--smali"]
+        if not patterns:
+            print("Usage: python tools/simple_dex_decompile.py --smali CLASS [pkg.*] [--out DIR] [--dex PATH]")
+            return
+        count = disassemble_to_smali(dex_file, patterns, output_dir)
+        print(f"[OK] Disassembled {count} classes from {dex_file}", file=sys.stderr)
+        return
+    
     print(f"[Source] {dex_file}")
     print(f"[Size] {os.path.getsize(dex_file) / (1024*1024):.2f} MB\n")
     
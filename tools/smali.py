@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+DEX -> smali 风格文本（纯 Python，不需要 Java / dex2jar）
+按需只解析被查看的类：find_class_def 二分查找字符串与类型表定位 class_def，
+再读取这个类的 class_data、code_item 并逐条解码指令，其余类完全不碰。
+输出接近 baksmali：.class / .super / .field / .method、寄存器统一写成 vN、
+跳转目标写成 :L地址（十六进制代码单元），switch / array 数据与 .catch 一并给出
+
+用法:
+    python tools/smali.py classes.dex com.example.Main [Lcom/example/Other; ...]
+"""
+import sys
+
+from dalvik import OPCODES, iter_instructions, resolve_reference
+from dex_parser import DexFile, NO_INDEX
+
+# (标志位, 名字, 适用于: c 类 / f 字段 / m 方法)
+_ACCESS_FLAGS = [
+    (0x1, 'public', 'cfm'), (0x2, 'private', 'cfm'), (0x4, 'protected', 'cfm'),
+    (0x8, 'static', 'cfm'), (0x10, 'final', 'cfm'), (0x20, 'synchronized', 'm'),
+    (0x40, 'volatile', 'f'), (0x40, 'bridge', 'm'), (0x80, 'transient', 'f'), (0x80, 'varargs', 'm'),
+    (0x100, 'native', 'm'), (0x200, 'interface', 'c'), (0x400, 'abstract', 'cm'),
+    (0x800, 'strictfp', 'm'), (0x1000, 'synthetic', 'cfm'), (0x2000, 'annotation', 'c'),
+    (0x4000, 'enum', 'cf'), (0x10000, 'constructor', 'm'), (0x20000, 'declared-synchronized', 'm'),
+]
+
+
+def access_string(flags, kind):
+    return ' '.join(name for bit, name, where in _ACCESS_FLAGS if flags & bit and kind in where)
+
+
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def to_descriptor(name):
+    """com.example.Foo / com/example/Foo / Lcom/example/Foo; -> Lcom/example/Foo;"""
+    if name.startswith('L') and name.endswith(';'):
+        return name
+    return 'L' + name.replace('.', '/') + ';'
+
+
+def _literal(value):
+    return f'-{-value:#x}' if value < 0 else f'{value:#x}'
+
+
+def format_value(value):
+    """encoded_value（dex_parser 解析结果）-> smali 字面量"""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return _literal(value)
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, str):
+        return '"' + value.encode('unicode_escape').decode('ascii').replace('"', '\\"') + '"'
+    if isinstance(value, list):
+        return '{' + ', '.join(format_value(v) for v in value) + '}'
+    kind = value[0]
+    if kind == 'type':
+        return value[1]
+    if kind == 'field':
+        cls, name, type_ = value[1]
+        return f'{cls}->{name}:{type_}'
+    if kind == 'method':
+        cls, name, proto = value[1]
+        return f'{cls}->{name}{proto}'
+    if kind == 'annotation':
+        return f'{value[1]}(' + ', '.join(f'{k}={format_value(v)}' for k, v in value[2]) + ')'
+    return f'{kind}@{value[1]}'
+
+
+def _label(addr):
+    return f':L{addr:04x}'
+
+
+def _registers(ins):
+    if ins.fmt in ('3rc', '4rcc'):
+        if not ins.regs:
+            return '{}'
+        return f'{{v{ins.regs[0]} .. v{ins.regs[-1]}}}'
+    if ins.fmt in ('35c', '45cc'):
+        return '{' + ', '.join(f'v{r}' for r in ins.regs) + '}'
+    return ', '.join(f'v{r}' for r in ins.regs)
+
+
+def format_instruction(dex, ins):
+    """一条普通指令（非数据负载）-> smali 文本"""
+    operands = []
+    regs = _registers(ins)
+    if regs:
+        operands.append(regs)
+    if ins.index is not None:
+        info = OPCODES[ins.opcode]
+        operands.append(resolve_reference(dex, info.index, ins.index))
+        if ins.index2 is not None:
+            operands.append(resolve_reference(dex, 'proto', ins.index2))
+    if ins.literal is not None:
+        operands.append(_literal(ins.literal))
+    if ins.target is not None:
+        operands.append(_label(ins.target))
+    return ins.name + (' ' + ', '.join(operands) if operands else '')
+
+
+def disassemble_code(dex, code, indent='    '):
+    """code_item -> 指令行列表（含标签、数据负载与 .catch）"""
+    instructions = list(iter_instructions(code.insns))
+    labels = set()
+    payload_owner = {}
+    for ins in instructions:
+        if ins.target is not None:
+            labels.add(ins.target)
+            if ins.opcode in (0x2b, 0x2c):
+                payload_owner[ins.target] = ins.addr
+    for ins in instructions:
+        if ins.name in ('packed-switch-payload', 'sparse-switch-payload'):
+            base = payload_owner.get(ins.addr, ins.addr)
+            labels.update(base + offset for _key, offset in ins.payload)
+    catches = []
+    for start, count, handler_off in code.tries:
+        labels.update((start, start + count))
+        for exc_type, addr in dex.catch_handler(code, handler_off):
+            labels.add(addr)
+            catches.append((exc_type, start, start + count, addr))
+
+    lines = []
+    for ins in instructions:
+        if ins.addr in labels:
+            lines.append(f'{indent}{_label(ins.addr)}')
+        if ins.name == 'packed-switch-payload':
+            base = payload_owner.get(ins.addr, ins.addr)
+            first = ins.payload[0][0] if ins.payload else 0
+            lines.append(f'{indent}.packed-switch {_literal(first)}')
+            lines.extend(f'{indent}    {_label(base + offset)}' for _key, offset in ins.payload)
+            lines.append(f'{indent}.end packed-switch')
+        elif ins.name == 'sparse-switch-payload':
+            base = payload_owner.get(ins.addr, ins.addr)
+            lines.append(f'{indent}.sparse-switch')
+            lines.extend(f'{indent}    {_literal(key)} -> {_label(base + offset)}' for key, offset in ins.payload)
+            lines.append(f'{indent}.end sparse-switch')
+        elif ins.name == 'array-data':
+            width, values = ins.payload
+            lines.append(f'{indent}.array-data {width}')
+            lines.extend(f'{indent}    {_literal(v)}' for v in values)
+            lines.append(f'{indent}.end array-data')
+        else:
+            lines.append(f'{indent}{format_instruction(dex, ins)}')
+    end = instructions[-1].addr + instructions[-1].size if instructions else 0
+    if end in labels:
+        lines.append(f'{indent}{_label(end)}')
+    for exc_type, start, stop, addr in catches:
+        directive = f'.catch {exc_type}' if exc_type else '.catchall'
+        lines.append(f'{indent}{directive} {{{_label(start)} .. {_label(stop)}}} {_label(addr)}')
+    return lines
+
+
+def disassemble_class(dex, class_def):
+    """一个 class_def -> smali 文本"""
+    lines = [_join('.class', access_string(class_def.access_flags, 'c'), dex.type_descriptor(class_def.class_idx))]
+    if class_def.superclass_idx != NO_INDEX:
+        lines.append(f'.super {dex.type_descriptor(class_def.superclass_idx)}')
+    if class_def.source_file_idx != NO_INDEX:
+        lines.append(f'.source {format_value(dex.string(class_def.source_file_idx))}')
+    interfaces = dex.interfaces(class_def)
+    if interfaces:
+        lines.extend(['', '# interfaces'])
+        lines.extend(f'.implements {name}' for name in interfaces)
+    annotations = dex.annotations(class_def)
+    if annotations and annotations['class']:
+        lines.extend(['', '# annotations'])
+        lines.extend(f'# {format_value(annotation)}' for _visibility, annotation in annotations['class'])
+
+    data = dex.class_data(class_def)
+    if data is None:
+        return '\n'.join(lines) + '\n'
+    static_values = dex.static_values(class_def)
+    for title, fields in (('static fields', data.static_fields), ('instance fields', data.instance_fields)):
+        if not fields:
+            continue
+        lines.extend(['', f'# {title}'])
+        for i, field in enumerate(fields):
+            _cls, name, type_ = dex.field_ref(field.field_idx)
+            line = _join('.field', access_string(field.access_flags, 'f'), f'{name}:{type_}')
+            if fields is data.static_fields and i < len(static_values):
+                line += f' = {format_value(static_values[i])}'
+            lines.append(line)
+    for title, methods in (('direct methods', data.direct_methods), ('virtual methods', data.virtual_methods)):
+        if not methods:
+            continue
+        if lines[-1]:
+            lines.append('')
+        lines.append(f'# {title}')
+        for method in methods:
+            _cls, name, proto = dex.method_ref(method.method_idx)
+            lines.append(_join('.method', access_string(method.access_flags, 'm'), name + proto))
+            code = dex.code_item(method.code_off)
+            if code is not None:
+                lines.append(f'    .registers {code.registers_size}')
+                lines.append('')
+                lines.extend(disassemble_code(dex, code))
+            lines.append('.end method')
+            lines.append('')
+    return '\n'.join(lines).rstrip('\n') + '\n'
+
+
+def disassemble(dex, name):
+    """按类名（点分 / 斜杠 / 描述符均可）反汇编；DEX 中没有这个类时返回 None"""
+    class_def = dex.find_class_def(to_descriptor(name))
+    if class_def is None:
+        return None
+    return disassemble_class(dex, class_def)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        return
+    with DexFile(sys.argv[1]) as dex:
+        for name in sys.argv[2:]:
+            text = disassemble(dex, name)
+            if text is None:
+                print(f'# [-] {name}: 不在 {sys.argv[1]} 中')
+            else:
+                print(text)
+
+
+if __name__ == '__main__':
+    main()
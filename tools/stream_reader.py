@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+内存映射 + 分块流式读取
+DEX / 资源等大文件不再整体 read() 进内存，而是 mmap 后按固定窗口扫描，
+相邻窗口之间保留重叠区，跨越窗口边界的匹配不会丢失
+"""
+import mmap
+import os
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+DEFAULT_OVERLAP = 4096
+
+
+class MappedFile:
+    """只读映射的文件；空文件退化为 b''（mmap 不接受长度为 0 的映射）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # 仍有导出的 memoryview 时 mmap.close() 抛 BufferError，文件描述符照样要关
+        try:
+            if isinstance(self.data, mmap.mmap):
+                self.data.close()
+        finally:
+            self._file.close()
+
+    def read(self, offset, length):
+        """读取 [offset, offset+length) 的字节"""
+        return self.data[offset:offset + length]
+
+    def release(self, start, end):
+        """提示内核回收已扫描过的页，使常驻内存不随文件大小增长"""
+        if not isinstance(self.data, mmap.mmap) or not hasattr(self.data, 'madvise'):
+            return
+        start -= start % mmap.PAGESIZE
+        if end > start:
+            try:
+                self.data.madvise(mmap.MADV_DONTNEED, start, end - start)
+            except (OSError, ValueError, AttributeError):
+                pass
+
+    def finditer(self, pattern, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_OVERLAP):
+        """
+        按窗口逐块匹配 pattern（已编译的 bytes 正则），产出 re.Match。
+
+        每个窗口只报告起点落在 [pos, pos+chunk_size) 内的匹配；窗口向后
+        多看 overlap 字节，所以长度不超过 overlap 的匹配跨越边界也完整。
+        若匹配恰好顶到窗口末端（可能被截断），则留给下一个窗口从其起点
+        重新匹配。下一窗口从上一个匹配结束处继续，结果与整体 finditer 相同。
+        """
+        size = self.size
+        pos = 0
+        while pos < size:
+            limit = min(size, pos + chunk_size)
+            endpos = min(size, limit + overlap)
+            next_pos = limit
+            for m in pattern.finditer(self.data, pos, endpos):
+                if m.start() >= limit:
+                    break
+                if m.end() == endpos and endpos < size and m.start() > pos:
+                    next_pos = m.start()
+                    break
+                yield m
+                next_pos = max(limit, m.end())
+            self.release(pos, min(next_pos, size))
+            pos = next_pos
+
+
+def finditer(path, pattern, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_OVERLAP):
+    """打开文件并流式产出 (偏移, 匹配字节)"""
+    with MappedFile(path) as mf:
+        for m in mf.finditer(pattern, chunk_size, overlap):
+            yield m.start(), m.group()
+
+
+def read_header(path, length=64):
+    """只读取文件开头的若干字节"""
+    with open(path, 'rb') as f:
+        return f.read(length)
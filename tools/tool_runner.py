@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+外部工具并发执行器
+java/unluac、CFR、luac、zipalign、jarsigner、keytool 等外部命令统一经过这里：
+asyncio 子进程并发运行，并发数受 CPU 核数和可用内存共同限制；
+每个任务的超时按输入大小缩放，超时或失败后以加倍的时间预算重试；
+stdout / stderr 按行并发读取（可实时回显），不会因管道写满而卡住
+
+用法:
+    runner = ToolRunner(mem_mb=512)
+    jobs = [ToolJob(['luac', '-o', out, src], name=src, size=os.path.getsize(src)) for ...]
+    for result in runner.run_all(jobs, on_done=print_progress):   # 按 jobs 顺序返回
+        ...
+    result = runner.run(['keytool', ...], name='keytool')          # 单个命令
+"""
+import asyncio
+import locale
+import os
+import signal
+import time
+from collections import namedtuple
+
+# 超时 = base + per_mb * 输入大小(MB)，不超过 max；重试时乘以 backoff
+DEFAULT_BASE_TIMEOUT = 30.0
+DEFAULT_PER_MB_TIMEOUT = 60.0
+DEFAULT_MAX_TIMEOUT = 3600.0
+DEFAULT_BACKOFF = 2.0
+
+# 每个任务预留的内存（一个 JVM 的常见占用）
+DEFAULT_MEM_MB = 512
+
+# cmd: 参数列表；name: 显示名；size: 输入字节数（决定超时）；cwd: 工作目录
+ToolJob = namedtuple('ToolJob', ['cmd', 'name', 'size', 'cwd'], defaults=(None, 0, None))
+
+# status: OK / FAIL（返回码非 0）/ TIMEOUT / MISSING（命令不存在）
+ToolResult = namedtuple('ToolResult', ['job', 'status', 'returncode', 'stdout', 'stderr',
+                                       'elapsed', 'attempts', 'timeout'])
+
+
+def available_memory_mb():
+    """可用物理内存 (MB)；无法获取时返回 None"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_concurrency(mem_mb=DEFAULT_MEM_MB):
+    """CPU 核数与 可用内存 / 每任务内存 中的较小者，至少为 1"""
+    limit = os.cpu_count() or 1
+    available = available_memory_mb()
+    if available is not None and mem_mb:
+        limit = min(limit, available // mem_mb)
+    return max(1, limit)
+
+
+def adaptive_timeout(size, base=DEFAULT_BASE_TIMEOUT, per_mb=DEFAULT_PER_MB_TIMEOUT,
+                     maximum=DEFAULT_MAX_TIMEOUT):
+    """按输入字节数缩放的超时（秒）"""
+    return min(maximum, base + per_mb * (size or 0) / (1024 * 1024))
+
+
+def input_size(*paths):
+    """若干输入文件的总字节数，不存在的按 0 计"""
+    total = 0
+    for path in paths:
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+class ToolRunner:
+    def __init__(self, workers=None, mem_mb=DEFAULT_MEM_MB, base_timeout=DEFAULT_BASE_TIMEOUT,
+                 per_mb_timeout=DEFAULT_PER_MB_TIMEOUT, max_timeout=DEFAULT_MAX_TIMEOUT,
+                 retries=1, backoff=DEFAULT_BACKOFF, echo=False):
+        """
+        workers: 并发上限，默认按核数与内存计算；retries: 失败 / 超时后的重试次数；
+        echo: 为 True 时实时打印子进程输出（行首带任务名）
+        """
+        self.workers = workers or default_concurrency(mem_mb)
+        self.base_timeout = base_timeout
+        self.per_mb_timeout = per_mb_timeout
+        self.max_timeout = max_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.echo = echo
+        self.encoding = locale.getpreferredencoding(False) or 'utf-8'
+
+    def timeout_for(self, job):
+        return adaptive_timeout(job.size, self.base_timeout, self.per_mb_timeout, self.max_timeout)
+
+    async def _pump(self, stream, sink, label):
+        while True:
+            line = await stream.readline()
+            if not line:
+                return
+            text = line.decode(self.encoding, errors='replace')
+            sink.append(text)
+            if self.echo:
+                print(f'  [{label}] {text.rstrip()}', flush=True)
+
+    @staticmethod
+    def _kill(proc):
+        """连同子进程组一起结束（.sh / .bat 包装脚本会再启动 java）"""
+        try:
+            if os.name == 'posix':
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    async def _attempt(self, job, timeout):
+        """运行一次，返回 (status, returncode, stdout, stderr)"""
+        kwargs = {'start_new_session': True} if os.name == 'posix' else {}
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *job.cmd, cwd=job.cwd, stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, **kwargs)
+        except OSError as e:
+            return 'MISSING', None, '', str(e)
+        label = job.name or os.path.basename(job.cmd[0])
+        out, err = [], []
+        pumps = asyncio.gather(self._pump(proc.stdout, out, label), self._pump(proc.stderr, err, label))
+        try:
+            await asyncio.wait_for(asyncio.shield(pumps), timeout)
+            returncode = await proc.wait()
+            status = 'OK' if returncode == 0 else 'FAIL'
+        except asyncio.TimeoutError:
+            self._kill(proc)
+            returncode = await proc.wait()
+            await pumps
+            status = 'TIMEOUT'
+        return status, returncode, ''.join(out), ''.join(err)
+
+    async def _run_job(self, job, slots):
+        timeout = self.timeout_for(job)
+        start = time.monotonic()
+        async with slots:
+            for attempt in range(1, self.retries + 2):
+                status, returncode, stdout, stderr = await self._attempt(job, timeout)
+                if status in ('OK', 'MISSING') or attempt > self.retries:
+                    break
+                timeout = min(self.max_timeout * self.backoff, timeout * self.backoff)
+        return ToolResult(job, status, returncode, stdout, stderr,
+                          time.monotonic() - start, attempt, timeout)
+
+    async def _run_all(self, jobs, on_done):
+        slots = asyncio.Semaphore(self.workers)
+        tasks = [asyncio.ensure_future(self._run_job(job, slots)) for job in jobs]
+        if on_done is not None:
+            for task in asyncio.as_completed(tasks):
+                on_done(await task)
+        return [await task for task in tasks]
+
+    def run_all(self, jobs, on_done=None):
+        """并发运行全部任务，按 jobs 顺序返回 ToolResult；on_done 在每个任务结束时（完成顺序）调用"""
+        jobs = [job if isinstance(job, ToolJob) else ToolJob(job) for job in jobs]
+        if not jobs:
+            return []
+        return asyncio.run(self._run_all(jobs, on_done))
+
+    def run(self, cmd, name=None, size=0, cwd=None):
+        """运行单个命令（仍然有超时、重试和输出回显）"""
+        return self.run_all([ToolJob(cmd, name, size, cwd)])[0]
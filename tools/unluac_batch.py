@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+unluac 批量反编译驱动
+启动一个常驻 JVM（tools/UnluacBatch.java，Java 11+ 单文件源码启动），
+通过 stdin/stdout 逐个提交 .luac 并读取每个文件的结果；
+worker 因超时或崩溃退出时自动重启，从下一个文件继续
+
+用法:
+    with UnluacBatch('unluac.jar') as batch:
+        for src, dst, status, detail in batch.decompile_all(jobs):   # jobs: [(输入, 输出)]
+            ...
+    # 多核：按核数与内存启动多个 worker，产出顺序为完成顺序
+    for src, dst, status, detail in decompile_parallel('unluac.jar', jobs):
+        ...
+"""
+import os
+import queue
+import subprocess
+import threading
+
+from tool_runner import default_concurrency
+
+WORKER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'UnluacBatch.java')
+
+# 单个文件的默认超时；大模块比原来每文件 10 秒的限制宽松得多
+DEFAULT_TIMEOUT_MS = 120000
+
+# 每个 worker JVM 预留的内存（决定并行 worker 数的上限）
+WORKER_MEM_MB = 512
+
+
+class UnluacWorkerError(RuntimeError):
+    """worker 无法启动（没有 java、Java 版本不支持源码启动等）"""
+
+
+class UnluacBatch:
+    def __init__(self, unluac_jar, java='java', timeout_ms=DEFAULT_TIMEOUT_MS):
+        self.unluac_jar = unluac_jar
+        self.java = java
+        self.timeout_ms = timeout_ms
+        self.proc = None
+        self.restarts = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        """启动 worker 并等待 READY"""
+        cmd = [self.java, '-cp', self.unluac_jar, WORKER_SOURCE, str(self.timeout_ms)]
+        try:
+            self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, encoding='utf-8', bufsize=1)
+        except OSError as e:
+            raise UnluacWorkerError(f'cannot start java: {e}') from e
+        ready = self.proc.stdout.readline().strip()
+        if ready != 'READY':
+            self.close()
+            raise UnluacWorkerError('unluac batch worker did not start (needs Java 11+)')
+
+    def close(self):
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc = None
+
+    def _restart(self):
+        if self.proc is not None:
+            self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+        self.restarts += 1
+        self.start()
+
+    def decompile(self, src, dst):
+        """反编译一个文件，返回 (状态, 详情)；状态为 OK / FAIL / TIMEOUT / CRASH"""
+        if '\t' in src + dst or '\n' in src + dst:
+            return 'FAIL', 'path contains tab or newline'
+        if self.proc is None or self.proc.poll() is not None:
+            self._restart()
+        try:
+            self.proc.stdin.write(f'{src}\t{dst}\n')
+            self.proc.stdin.flush()
+            line = self.proc.stdout.readline()
+        except OSError:
+            line = ''
+        if not line:
+            # worker 在处理这个文件时崩溃，下次调用时重启
+            self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+            return 'CRASH', 'worker exited'
+        status, _src, detail = (line.rstrip('\n').split('\t', 2) + ['', ''])[:3]
+        if status == 'TIMEOUT':
+            self.proc.wait()
+            self.proc = None
+        return status, detail
+
+    def decompile_all(self, jobs):
+        """逐个提交，产出 (输入, 输出, 状态, 详情)"""
+        for src, dst in jobs:
+            status, detail = self.decompile(src, dst)
+            yield src, dst, status, detail
+
+
+def decompile_parallel(unluac_jar, jobs, workers=None, **kwargs):
+    """
+    启动 workers 个 UnluacBatch（默认按核数与内存）共同消费任务队列，产出 (输入, 输出, 状态, 详情)。
+    大文件先提交，避免最后只剩一个 worker 在处理大模块；一个 worker 都起不来时抛出 UnluacWorkerError
+    """
+    if not jobs:
+        return
+    jobs = sorted(jobs, key=lambda job: -os.path.getsize(job[0]) if os.path.exists(job[0]) else 0)
+    workers = max(1, min(workers or default_concurrency(WORKER_MEM_MB), len(jobs)))
+    batches = []
+    for _ in range(workers):
+        batch = UnluacBatch(unluac_jar, **kwargs)
+        try:
+            batch.start()
+        except UnluacWorkerError:
+            if not batches:
+                raise
+            break
+        batches.append(batch)
+
+    todo = queue.Queue()
+    for job in jobs:
+        todo.put(job)
+    done = queue.Queue()
+
+    def work(batch):
+        try:
+            while True:
+                try:
+                    src, dst = todo.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    status, detail = batch.decompile(src, dst)
+                except UnluacWorkerError as e:
+                    # worker 无法重启：记为失败，剩下的任务交给其他 worker
+                    done.put((src, dst, 'CRASH', str(e)))
+                    return
+                done.put((src, dst, status, detail))
+        finally:
+            batch.close()
+            done.put(None)
+
+    threads = [threading.Thread(target=work, args=(batch,), daemon=True) for batch in batches]
+    for t in threads:
+        t.start()
+    running = len(threads)
+    while running:
+        item = done.get()
+        if item is None:
+            running -= 1
+        else:
+            yield item
+    # 所有 worker 都已退出仍未处理的任务
+    while not todo.empty():
+        src, dst = todo.get_nowait()
+        yield src, dst, 'CRASH', 'no unluac worker left'
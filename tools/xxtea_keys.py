@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+cocos2d-x XXTEA 候选密钥发现
+从 APK 的原生库和 DEX 中收集可见字符串作为候选密钥（sign 附近的字符串优先，
+setXXTEAKeyAndSign 的 key/sign 通常相邻存放），再在语料中最小的加密文件上验证：
+长度字正确 + 明文像 Lua 才算通过，按明文得分排序，最后在第二个文件上复核。
+
+XXTEA 每一轮都要用到整个分组，无法只解第一个块，所以验证选最小的文件来保持开销最低
+
+用法:
+    python tools/xxtea_keys.py [apk 或解压目录] [.luac 所在目录]
+"""
+import os
+import sys
+
+from apk_vfs import open_source
+from lua_crypto import plaintext_score, xxtea_decrypt, xxtea_decrypt_many
+from multidex import dex_ordinal
+from scan_engine import iter_printable
+
+DEFAULT_SIGN = b'RY_QP_2016'
+
+# sign 前后多少字节内的字符串视为"邻近"
+SIGN_WINDOW = 512
+
+# 一次并排验证的候选密钥数
+BATCH_SIZE = 4096
+
+
+def key_sources(fs):
+    """原生库与 DEX 成员（路径按 VFS 成员名）"""
+    libs = sorted(n for n in fs.namelist() if n.startswith('lib/') and n.endswith('.so'))
+    dexes = sorted((n for n in fs.namelist() if '/' not in n and dex_ordinal(n)), key=dex_ordinal)
+    return libs + dexes
+
+
+def harvest_candidates(fs, sign=DEFAULT_SIGN, min_len=4, max_len=64):
+    """
+    返回去重后的候选密钥（bytes），按优先级排序：
+    离 sign 出现位置越近越靠前，其余按出现顺序排在后面
+    """
+    near = {}
+    rest = {}
+    for name in key_sources(fs):
+        data = bytes(fs.view(name))
+        anchors = []
+        start = data.find(sign) if sign else -1
+        while start != -1:
+            anchors.append(start)
+            start = data.find(sign, start + 1)
+        for offset, run in iter_printable(data, min_len, max_len):
+            if run == sign:
+                continue
+            distance = min((abs(offset - a) for a in anchors), default=None)
+            if distance is not None and distance <= SIGN_WINDOW:
+                near[run] = min(distance, near.get(run, distance))
+            else:
+                rest.setdefault(run, None)
+    ordered = sorted(near, key=near.get)
+    return ordered + [run for run in rest if run not in near]
+
+
+def strip_sign(data, sign=DEFAULT_SIGN):
+    return data[len(sign):] if data.startswith(sign) else None
+
+
+def rank_keys(candidates, lua_paths, sign=DEFAULT_SIGN, batch_size=BATCH_SIZE):
+    """
+    在最小的加密文件上验证全部候选，返回 [(key, 得分)]，得分高者在前（同分保持候选顺序）；
+    通过的候选再用第二小的文件复核，排除长度字偶然落在范围内的误报
+    """
+    samples = []
+    for path in sorted(lua_paths, key=os.path.getsize):
+        with open(path, 'rb') as f:
+            body = strip_sign(f.read(), sign)
+        if body and len(body) >= 8 and len(body) % 4 == 0:
+            samples.append(body)
+            if len(samples) == 2:
+                break
+    if not samples:
+        return []
+    passed = []
+    for i in range(0, len(candidates), batch_size):
+        batch = candidates[i:i + batch_size]
+        for key, plain in zip(batch, xxtea_decrypt_many(samples[0], batch)):
+            score = plaintext_score(plain)
+            if score:
+                passed.append((key, score))
+    if len(samples) > 1:
+        passed = [(key, min(score, plaintext_score(xxtea_decrypt(samples[1], key))))
+                  for key, score in passed]
+        passed = [(key, score) for key, score in passed if score]
+    passed.sort(key=lambda item: -item[1])
+    return passed
+
+
+def discover_key(source, lua_paths, sign=DEFAULT_SIGN):
+    """从 APK / 解压目录中找出最可能的 XXTEA 密钥；找不到返回 None"""
+    with open_source(source) as fs:
+        candidates = harvest_candidates(fs, sign)
+    ranked = rank_keys(candidates, lua_paths, sign)
+    return ranked[0][0] if ranked else None
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else 'apk_unzip'
+    lua_root = sys.argv[2] if len(sys.argv) > 2 else 'apk_unzip/assets'
+    lua_paths = [os.path.join(root, f) for root, _dirs, files in os.walk(lua_root)
+                 for f in files if f.endswith('.luac')]
+    with open_source(source) as fs:
+        candidates = harvest_candidates(fs)
+    print(f"[*] {len(candidates)} 个候选密钥，{len(lua_paths)} 个 .luac")
+    ranked = rank_keys(candidates, lua_paths)
+    if not ranked:
+        print("[-] 没有候选密钥通过验证")
+    for key, score in ranked[:10]:
+        print(f"  [{score}] {key.decode('latin-1')!r}")